@@ -0,0 +1,109 @@
+"""
+Times the archive and upload stages separately over synthetic corpora of growing size.
+
+Grouping (copy_raw_data + zip_files_with_same_names), compression (compress per document,
+or bundle_documents with --layout bundles) and upload (upload_all against a filesystem blob stand-in) are measured on their own, and
+the growth exponent between consecutive sizes is reported: ~1.0 is linear, ~2.0 quadratic.
+
+Usage:
+    python -m benchmarks.archiveBenchmark --sizes 500 1000 2000 4000
+    python -m benchmarks.archiveBenchmark --layout bundles
+"""
+import argparse
+import math
+import os
+import shutil
+import tempfile
+
+from benchmarks.benchUtils import StageTimer, directory_stats, write_results
+from benchmarks.syntheticCorpus import DISTRIBUTIONS, generate_corpus
+from src.utils.bundleArchive import bundle_documents
+from src.utils.localBlobStorage import LocalBlobServiceClient
+from src.utils.uploadFiles import upload_all
+from src.utils.zipFiles import compress, copy_raw_data, zip_files_with_same_names
+
+STAGES = ('group', 'compress', 'upload')
+
+
+def run_size(size: int, mean_bytes: int, distribution: str, workdir: str, layout: str = 'documents') -> dict:
+    raw_dir = os.path.join(workdir, 'raw')
+    processed_dir = os.path.join(workdir, 'processed')
+    corpus_bytes = generate_corpus(raw_dir, size, mean_bytes=mean_bytes, distribution=distribution)
+    blob_client = LocalBlobServiceClient(os.path.join(workdir, 'blob'))
+    timer = StageTimer()
+
+    with timer.stage('group'):
+        copy_raw_data(raw_dir, processed_dir)
+        files_, destination = zip_files_with_same_names(raw_dir, processed_dir)
+
+    with timer.stage('compress'):
+        if layout == 'bundles':
+            bundle_documents(files_, destination, processed_dir, os.path.join(workdir, 'bundle_index.json'))
+        else:
+            for index, (item, values) in enumerate(files_.items()):
+                compress(values, destination[index], os.path.basename(item) + '.zip')
+
+    cwd = os.getcwd()
+    os.chdir(processed_dir)
+    try:
+        with timer.stage('upload'):
+            for site_dir in os.listdir():
+                upload_all(None, None, None, site_dir, 'sisecam-zipped', blob_service_client=blob_client)
+    finally:
+        os.chdir(cwd)
+
+    archive_files, archive_bytes = directory_stats(processed_dir)
+    return {
+        'size': size,
+        'layout': layout,
+        'corpus_bytes': corpus_bytes,
+        'archive_files': archive_files,
+        'archive_bytes': archive_bytes,
+        'stages': timer.stages
+    }
+
+
+def growth_exponents(results) -> dict:
+    """
+    Log-log slope of each stage's time between consecutive corpus sizes.
+    """
+    exponents = {stage: [] for stage in STAGES}
+    for small, large in zip(results, results[1:]):
+        for stage in STAGES:
+            t_small = max(small['stages'][stage]['seconds'], 1e-6)
+            t_large = max(large['stages'][stage]['seconds'], 1e-6)
+            exponents[stage].append(round(math.log(t_large / t_small) / math.log(large['size'] / small['size']), 2))
+    return exponents
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000, 4000])
+    parser.add_argument('--mean-bytes', type=int, default=16384)
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--layout', choices=('documents', 'bundles'), default='documents',
+                        help='One zip per document, or one per site, keyword and crawl date.')
+    parser.add_argument('--keep', action='store_true', help='Keep the working directories.')
+    args = parser.parse_args()
+
+    results = []
+    for size in sorted(args.sizes):
+        workdir = tempfile.mkdtemp(prefix=f'archive-{size}-')
+        try:
+            result = run_size(size, args.mean_bytes, args.distribution, workdir, args.layout)
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+        results.append(result)
+        print(f"{size:>7} docs: " + '  '.join(f"{stage}={result['stages'][stage]['seconds']:.3f}s" for stage in STAGES))
+
+    exponents = growth_exponents(results)
+    for stage, values in exponents.items():
+        flag = '  <-- superlinear' if values and max(values) > 1.5 else ''
+        print(f"growth exponent {stage:<9} {values}{flag}")
+
+    print(f"Results written to {write_results('archive', {'runs': results, 'growth_exponents': exponents})}")
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,92 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process and of its reaped children (browsers, drivers), in MB.
+    """
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(max(self_kb, children_kb) / scale, 1)
+
+
+def directory_stats(path: str):
+    """
+    Returns (file count, total bytes) of everything below path.
+    """
+    files = 0
+    size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(root, name))
+    return files, size
+
+
+class StageTimer:
+    """
+    Collects wall time and peak RSS per pipeline stage.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = {
+                'seconds': round(time.perf_counter() - started, 4),
+                'peak_rss_mb': peak_rss_mb()
+            }
+
+    @property
+    def total_seconds(self) -> float:
+        return round(sum(stage['seconds'] for stage in self.stages.values()), 4)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_DIR), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def write_results(benchmark: str, results: dict, results_dir: str = RESULTS_DIR) -> str:
+    """
+    Stores a benchmark run as JSON, tagged with the commit and machine it ran on.
+
+    Returns:
+        str: Path of the written result file.
+    """
+    commit = git_commit()
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+    payload = {
+        'benchmark': benchmark,
+        'commit': commit,
+        'timestamp': stamp,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{benchmark}-{stamp}-{commit}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    return path
@@ -0,0 +1,50 @@
+"""
+Compares two benchmark result files written by benchmarks.benchUtils.write_results.
+
+Usage:
+    python -m benchmarks.compareResults benchmarks/results/old.json benchmarks/results/new.json
+"""
+import json
+import sys
+
+
+def _flatten(value, prefix=''):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}{key}.")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix[:-1], value
+
+
+def _runs(payload: dict) -> list:
+    results = payload['results']
+    return results['runs'] if isinstance(results, dict) else results
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    print(f"{old['benchmark']}: {old['commit']} -> {new['commit']}")
+    old_runs = {run['size']: run for run in _runs(old)}
+    for run in _runs(new):
+        previous = old_runs.get(run['size'])
+        if previous is None:
+            continue
+        print(f"\nsize {run['size']}")
+        old_metrics = dict(_flatten(previous))
+        for metric, value in _flatten(run):
+            before = old_metrics.get(metric)
+            if before is None or metric == 'size':
+                continue
+            change = (value - before) / before * 100 if before else 0.0
+            print(f"  {metric:<40} {before:>14} {value:>14} {change:>+8.1f}%")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    compare(sys.argv[1], sys.argv[2])
@@ -0,0 +1,109 @@
+"""
+End-to-end benchmark of the scrape -> archive -> upload flow of main.py.
+
+Scraping runs against synthetic replay fixtures (headless Chrome is still required for the
+Selenium part), uploads go to a filesystem blob stand-in. Every run is written to
+benchmarks/results/ as JSON so commits can be compared with benchmarks.compareResults.
+
+Usage:
+    python -m benchmarks.pipelineBenchmark --sizes 100 10000 100000 --latency 0.05
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import main
+from benchmarks.benchUtils import StageTimer, directory_stats, write_results
+from benchmarks.syntheticFixtures import SITES, build_fixtures, write_scripts_file
+from src.utils.localBlobStorage import LocalBlobServiceClient
+from src.utils.recordReplay import FixtureArchive, Replayer
+
+
+def count_documents(raw_dir: str) -> int:
+    documents = 0
+    for root, _, names in os.walk(raw_dir):
+        if os.path.basename(root) in ('pdf', 'text'):
+            documents += len(names)
+    return documents
+
+
+def run_size(size: int, sites, latency: float, jitter: float, body_bytes: int, workdir: str) -> dict:
+    fixtures_dir = os.path.join(workdir, 'fixtures')
+    build_fixtures(fixtures_dir, size, sites=sites, body_bytes=body_bytes)
+    write_scripts_file(os.path.join(workdir, 'scripts.txt'), sites=sites)
+
+    raw_dir = os.path.join(workdir, 'data', 'raw')
+    processed_dir = os.path.join(workdir, 'data', 'processed')
+    blob_client = LocalBlobServiceClient(os.path.join(workdir, 'blob'))
+    timer = StageTimer()
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        replayer = Replayer(FixtureArchive(fixtures_dir), latency=latency, jitter=jitter)
+        try:
+            with timer.stage('scrape'):
+                main.scrape('scripts.txt', os.path.join(workdir, 'executed_scripts.txt'), fixtures=replayer)
+        finally:
+            replayer.close()
+
+        with timer.stage('extract_text'):
+            main.extract_text(raw_dir, os.path.join(workdir, 'data', 'cache', 'pdf_text'))
+
+        with timer.stage('archive'):
+            main.archive(raw_dir, processed_dir)
+
+        with timer.stage('upload'):
+            main.upload(processed_dir, blob_service_client=blob_client)
+    finally:
+        os.chdir(cwd)
+
+    documents = count_documents(raw_dir)
+    raw_files, raw_bytes = directory_stats(raw_dir)
+    archive_files, archive_bytes = directory_stats(processed_dir)
+    total = timer.total_seconds or 1e-9
+    return {
+        'size': size,
+        'sites': list(sites),
+        'latency': latency,
+        'documents': documents,
+        'raw_files': raw_files,
+        'raw_bytes': raw_bytes,
+        'archive_files': archive_files,
+        'archive_bytes': archive_bytes,
+        'documents_per_second': round(documents / total, 2),
+        'bytes_per_second': round(raw_bytes / total, 1),
+        'total_seconds': timer.total_seconds,
+        'stages': timer.stages
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000])
+    parser.add_argument('--sites', nargs='+', default=list(SITES), choices=list(SITES))
+    parser.add_argument('--latency', type=float, default=0.0, help='Injected replay latency in seconds.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Injected random replay latency in seconds.')
+    parser.add_argument('--body-bytes', type=int, default=4096, help='Approximate size of every document.')
+    parser.add_argument('--keep', action='store_true', help='Keep the working directories.')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix=f'pipeline-{size}-')
+        try:
+            result = run_size(size, args.sites, args.latency, args.jitter, args.body_bytes, workdir)
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+        results.append(result)
+        print(f"{size:>7} docs: {result['documents_per_second']:>9} docs/s "
+              f"{result['bytes_per_second'] / 1e6:>8.2f} MB/s  " +
+              '  '.join(f"{name}={stage['seconds']}s" for name, stage in result['stages'].items()))
+
+    print(f"Results written to {write_results('pipeline', results)}")
+
+
+if __name__ == '__main__':
+    main_cli()
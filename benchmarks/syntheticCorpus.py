@@ -0,0 +1,87 @@
+"""
+Generates a synthetic data/raw/<site>/<keyword>/{text,pdf,json,metadata} tree shaped like the
+bots' output, for benchmarking the archive and upload stages without scraping.
+
+Usage:
+    python -m benchmarks.syntheticCorpus data/raw --documents 10000 --distribution lognormal
+"""
+import argparse
+import json
+import os
+import random
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal')
+
+
+def file_size(rng: random.Random, mean_bytes: int, distribution: str) -> int:
+    if distribution == 'fixed':
+        return mean_bytes
+    if distribution == 'uniform':
+        return rng.randint(0, 2 * mean_bytes)
+    # lognormal with sigma 1 keeps the mean at mean_bytes and gives a long tail of large PDFs
+    return int(rng.lognormvariate(0, 1) * mean_bytes / 1.6487)
+
+
+def generate_corpus(raw_dir: str, documents: int, sites=('ECHA', 'eur_lex', 'resmigazete'),
+                    keywords=('Water', 'REACH'), mean_bytes: int = 16384, distribution: str = 'lognormal',
+                    pdf_ratio: float = 0.5, table_ratio: float = 0.3, seed: int = 0) -> int:
+    """
+    Writes `documents` synthetic documents spread evenly over sites and keywords.
+
+    Every document gets a summary and a metadata file; a pdf_ratio share also gets a PDF of
+    a size drawn from the distribution and a table_ratio share gets a table JSON.
+
+    Returns:
+        int: Total bytes written.
+    """
+    rng = random.Random(seed)
+    folders = [(site, keyword) for site in sites for keyword in keywords]
+    written = 0
+    for index in range(documents):
+        site, keyword = folders[index % len(folders)]
+        keyword_folder = os.path.join(raw_dir, site, keyword.replace(':', '').replace(' ', '_'))
+        stem = f"2024-01-{index % 28 + 1:02d}-Document_{index:07d}"
+
+        outputs = {
+            ('text', f"{stem}.txt"): (f"Title: {stem}\nDistribution date: 2024-01-01\n"
+                                      f"Keywords: {keyword}\nSummary: synthetic document {index}\n").encode('utf-8'),
+            ('metadata', f"metadata_{stem}.json"): json.dumps({
+                "name": stem, "notified_date": "2024-01-01", "notified_country": None,
+                "URL": f"https://example.org/{index}", "keyword": keyword
+            }, indent=4).encode('utf-8'),
+        }
+        if rng.random() < pdf_ratio:
+            outputs[('pdf', f"{stem}.pdf")] = rng.randbytes(file_size(rng, mean_bytes, distribution))
+        if rng.random() < table_ratio:
+            rows = [[f"cell {r}-{c}" for c in range(4)] for r in range(rng.randint(1, 200))]
+            outputs[('json', f"{stem}.json")] = json.dumps(
+                [{'headers': ['a', 'b', 'c', 'd'], 'rows': rows}], ensure_ascii=False, indent=4).encode('utf-8')
+
+        for (kind, name), data in outputs.items():
+            folder = os.path.join(keyword_folder, kind)
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(data)
+            written += len(data)
+
+    # The archive stage expects every kind folder to exist, as create_folder_structure guarantees
+    for site, keyword in folders:
+        for kind in ('text', 'pdf', 'json', 'metadata'):
+            os.makedirs(os.path.join(raw_dir, site, keyword.replace(':', '').replace(' ', '_'), kind), exist_ok=True)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('raw_dir')
+    parser.add_argument('--documents', type=int, default=1000)
+    parser.add_argument('--mean-bytes', type=int, default=16384)
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--pdf-ratio', type=float, default=0.5)
+    parser.add_argument('--table-ratio', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    total = generate_corpus(args.raw_dir, args.documents, mean_bytes=args.mean_bytes,
+                            distribution=args.distribution, pdf_ratio=args.pdf_ratio,
+                            table_ratio=args.table_ratio, seed=args.seed)
+    print(f"Wrote {args.documents} documents ({total / 1e6:.1f} MB) to {args.raw_dir}")
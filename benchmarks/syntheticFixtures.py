@@ -0,0 +1,175 @@
+"""
+Builds replay fixture archives that look like ECHA, EUR-Lex and Resmi Gazete result pages,
+so the whole pipeline can be benchmarked at any corpus size without recording the live sites.
+"""
+import os
+from datetime import date, timedelta
+from html import escape
+
+from src.utils.recordReplay import FixtureArchive, detail_page_key, results_page_key
+
+PAGE_SIZE = 20
+LINKS_PER_GAZETTE = 10
+
+SITES = {
+    'ECHA': {'script': 'echaWebScraping.py', 'link': 'https://echa.europa.eu/home', 'keyword': 'Water'},
+    'eur_lex': {'script': 'eur_lexWebScraping.py', 'link': 'https://eur-lex.europa.eu/homepage.html',
+                'keyword': 'Water'},
+    'resmigazete': {'script': 'resmiWebScraping.py', 'link': 'https://www.resmigazete.gov.tr/',
+                    'keyword': 'Su'},
+}
+
+
+def minimal_pdf(text: str, padding: int = 0) -> bytes:
+    """
+    Returns a small, valid single-page PDF showing text, padded with a comment to the requested size.
+    """
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode('latin-1', 'replace')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    if padding:
+        out += b"%" + b"x" * padding + b"\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def detail_html(title: str, rows: int, padding: int = 0) -> bytes:
+    cells = ''.join(
+        f"<tr><td>{escape(title)} {i}</td><td>{i * 7}</td><td>2024-01-{i % 28 + 1:02d}</td></tr>"
+        for i in range(rows)
+    )
+    filler = f"<p>{'lorem ipsum ' * (padding // 12)}</p>" if padding else ''
+    return (f"<html><head><title>{escape(title)}</title></head><body><h1>{escape(title)}</h1>{filler}"
+            f"<table><thead><tr><th>Item</th><th>Value</th><th>Date</th></tr></thead>"
+            f"<tbody>{cells}</tbody></table></body></html>").encode('utf-8')
+
+
+def _document(archive: FixtureArchive, url: str, index: int, is_pdf: bool, body_bytes: int, table_rows: int):
+    title = f"Document {index:07d}"
+    if is_pdf:
+        archive.add_response(url, 200, 'application/pdf', minimal_pdf(title, padding=body_bytes))
+    else:
+        archive.add_response(url, 200, 'text/html; charset=utf-8',
+                             detail_html(title, table_rows, padding=body_bytes))
+
+
+def _pages(documents: int, page_size: int):
+    for start in range(0, documents, page_size):
+        yield start // page_size + 1, range(start, min(start + page_size, documents))
+
+
+def _day(index: int) -> date:
+    return date(2024, 1, 1) - timedelta(days=index % 3650)
+
+
+def build_echa(archive: FixtureArchive, keyword: str, documents: int, body_bytes: int, table_rows: int):
+    for page_number, indexes in _pages(documents, PAGE_SIZE):
+        rows = []
+        for i in indexes:
+            is_pdf = i % 2 == 0
+            if is_pdf:
+                url = f"https://echa.europa.eu/documents/10162/doc-{i:07d}.pdf/{i:07d}"
+            else:
+                url = f"https://echa.europa.eu/-/document-{i:07d}"
+            _document(archive, url, i, is_pdf, body_bytes, table_rows)
+            rows.append(
+                f"<tr><td><div class='search-result-title'><a href='{url}'>Document {i:07d}</a></div>"
+                f"<div class='search-result-content'>Synthetic {escape(keyword)} result {i}</div></td>"
+                f"<td>{_day(i).strftime('%d/%m/%y')}</td></tr>"
+            )
+        html = f"<html><body><table>{''.join(rows)}</table></body></html>"
+        archive.add_page('ECHA', keyword, results_page_key(page_number), '', html)
+
+
+def build_eur_lex(archive: FixtureArchive, keyword: str, documents: int, body_bytes: int, table_rows: int):
+    for page_number, indexes in _pages(documents, PAGE_SIZE):
+        results = []
+        for i in indexes:
+            is_pdf = i % 2 == 0
+            kind = 'pdf' if is_pdf else 'html'
+            url = f"https://eur-lex.europa.eu/legal-content/EN/TXT/{kind.upper()}/?uri=CELEX:{i:07d}"
+            _document(archive, url, i, is_pdf, body_bytes, table_rows)
+            results.append(
+                f"<div class='SearchResult'><h2><a id='cellar_{i}' href='{url}'>Doc {i:07d} on "
+                f"{escape(keyword)}</a></h2><dl><dt>Date of document:</dt>"
+                f"<dd>{_day(i).strftime('%d/%m/%Y')}</dd></dl>"
+                f"<a title='{kind} document' href='{url}'>{kind}</a></div>"
+            )
+        html = f"<html><body><div id='EurlexContent'>{''.join(results)}</div></body></html>"
+        archive.add_page('eur_lex', keyword, results_page_key(page_number), '', html)
+
+
+def build_resmigazete(archive: FixtureArchive, keyword: str, documents: int, body_bytes: int, table_rows: int):
+    gazettes = (documents + LINKS_PER_GAZETTE - 1) // LINKS_PER_GAZETTE
+    for page_number, gazette_indexes in _pages(gazettes, PAGE_SIZE):
+        rows = []
+        for position, g in enumerate(gazette_indexes):
+            day = _day(g).strftime('%d.%m.%Y')
+            rows.append(f"<tr><td><span><a href='#g{g}'>Resmi Gazete {g}</a></span></td><td>{day}</td></tr>")
+            links = []
+            for i in range(g * LINKS_PER_GAZETTE, min((g + 1) * LINKS_PER_GAZETTE, documents)):
+                is_pdf = i % 2 == 0
+                suffix = '.pdf' if is_pdf else '.htm'
+                url = f"https://www.resmigazete.gov.tr/eskiler/{g:06d}/{i:07d}{suffix}"
+                _document(archive, url, i, is_pdf, body_bytes, table_rows)
+                links.append(f"<li><a href='{url}'>{escape(keyword)} {i:07d} hakkında karar</a></li>")
+            archive.add_page('resmigazete', keyword, detail_page_key(page_number, position), '',
+                             f"<html><body><ul>{''.join(links)}</ul></body></html>")
+        html = f"<html><body><table id='filterTable'>{''.join(rows)}</table></body></html>"
+        archive.add_page('resmigazete', keyword, results_page_key(page_number), '', html)
+
+
+BUILDERS = {
+    'ECHA': build_echa,
+    'eur_lex': build_eur_lex,
+    'resmigazete': build_resmigazete,
+}
+
+
+def build_fixtures(root: str, documents: int, sites=tuple(SITES), body_bytes: int = 4096,
+                   table_rows: int = 20) -> FixtureArchive:
+    """
+    Writes a fixture archive with `documents` documents spread evenly over the given sites.
+
+    Args:
+        root (str): Directory of the fixture archive.
+        documents (int): Total number of documents.
+        sites (tuple): Site names to generate, keys of SITES.
+        body_bytes (int): Approximate padding added to every document body.
+        table_rows (int): Rows of the table embedded in every HTML document.
+
+    Returns:
+        FixtureArchive: The saved archive.
+    """
+    archive = FixtureArchive(root)
+    per_site = max(1, documents // len(sites))
+    for site in sites:
+        BUILDERS[site](archive, SITES[site]['keyword'], per_site, body_bytes, table_rows)
+    archive.save()
+    return archive
+
+
+def write_scripts_file(path: str, sites=tuple(SITES)):
+    """
+    Writes a scripts.txt for the synthetic sites, without page limits.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for site in sites:
+            config = SITES[site]
+            f.write(f"Name: {config['script']}\nLink: {config['link']}\nLimited page number: 0\n"
+                    f"Keywords:\n{config['keyword']}\n\n")
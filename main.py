@@ -1,11 +1,22 @@
-from src.saved import ScriptRunner
+"""
+Runs the pipeline, or one stage of it:
 
-from src.utils.uploadFiles import upload_all
-from src.utils.zipFiles import compress, zip_files_with_same_names, copy_raw_data
+    python main.py                  scrape -> extract-text -> index -> archive -> upload
+    python main.py scrape           scrape, extract-text, index, archive, upload: one stage
+    python main.py upload --site ECHA eur_lex
+    python main.py worker|coordinate   sharded crawl, see src/utils/workQueue.py
+    python main.py daemon           keeps refreshing the sites on their schedules
 
+Each stage imports only what it needs, so e.g. re-running the upload does not load
+Selenium or the bots.
+"""
 from dotenv import load_dotenv
 
+import argparse
 import os
+import signal
+import sys
+import time
 
 load_dotenv()
 
@@ -14,6 +25,12 @@ ROOT_DIR = os.path.join(os.path.join(os.getcwd(), 'data'), 'processed')
 
 source_directory = os.path.join(os.path.join(os.getcwd(), 'data'), 'raw')
 destination_directory = os.path.join(os.path.join(os.getcwd(), 'data'), 'processed')
+# Extracted PDF text keyed by content hash, kept across runs
+pdf_text_cache_directory = os.path.join(os.path.join(os.getcwd(), 'data'), 'cache', 'pdf_text')
+# Full-text index over data/raw, see src/utils/searchIndex.py for querying it
+search_index_path = os.path.join(os.path.join(os.getcwd(), 'data'), 'index', 'search.sqlite')
+# Metadata catalogs; bots write them relative to the working directory, like data/raw
+catalog_directory = os.path.join('data', 'catalog')
 
 # Azure Storage Account Name
 ACCOUNT_NAME = os.getenv("account_name")
@@ -22,23 +39,389 @@ ACCOUNT_URL = os.getenv("account_url")
 # Account Key
 ACCOUNT_KEY = os.getenv("account_key")
 
-if __name__ == '__main__':
-    script_keywords_file = 'executed_scripts.txt'
-    scripts_file_path = 'scripts.txt'
+# Offline record/replay of the scraped sites: 'record', 'replay' or empty for live runs
+FIXTURES_MODE = os.getenv("fixtures_mode", "")
+FIXTURES_DIR = os.getenv("fixtures_dir", os.path.join(os.getcwd(), 'fixtures'))
+# Latency injected by the replay server, in seconds
+REPLAY_LATENCY = float(os.getenv("replay_latency", "0"))
+REPLAY_JITTER = float(os.getenv("replay_jitter", "0"))
+
+# Archive layout: 'documents' (one zip per document) or 'bundles' (one zip per site, keyword and
+# crawl date, appended to by later runs), see src/utils/bundleArchive.py
+ARCHIVE_LAYOUT = os.getenv("archive_layout", "documents")
+
+# Bot logging, see src/utils/structuredLogging.py: default level, and levels per component
+# ('ECHA=DEBUG,eur_lex=WARNING')
+LOG_LEVEL = os.getenv("log_level", "INFO")
+LOG_LEVELS = os.getenv("log_levels", "")
+
+# Extracted table formats, comma separated: json (default), parquet, feather
+TABLE_FORMATS = os.getenv("table_formats", "json")
+
+# Browser profile for every site, e.g. 'full' to measure the unblocked baseline; empty for per-site profiles
+BROWSER_PROFILE = os.getenv("browser_profile", "") or None
+
+# Persistent per-site Chrome profiles keeping the HTTP disk cache and cookies across runs, '1' to
+# enable ('Browser cache: off' in scripts.txt opts a site out); disk cache size per browser in MB
+BROWSER_CACHE = os.getenv("browser_cache", "0") == "1"
+BROWSER_CACHE_MB = int(os.getenv("browser_cache_mb", "256"))
+
+# Browsers ECHA searches its date windows on at once
+WINDOW_WORKERS = int(os.getenv("window_workers", "2"))
+
+# Search all keywords of a site with one OR query where the site supports it (EUR-Lex); '1' to enable
+BATCH_SEARCHES = os.getenv("batch_searches", "0") == "1"
+
+# Watchdog: wall-clock seconds per keyword, seconds without a results page, browser memory (MB)
+# above which a keyword is stopped and retried on a new browser, process memory (MB) to warn at
+# and retries per keyword; a budget of 0 disables it
+TASK_BUDGET = float(os.getenv("task_budget", "3600"))
+STALL_TIMEOUT = float(os.getenv("stall_timeout", "600"))
+MAX_BROWSER_RSS = float(os.getenv("max_browser_rss", "2048"))
+MAX_PROCESS_RSS = float(os.getenv("max_process_rss", "4096"))
+TASK_RESTARTS = int(os.getenv("task_restarts", "2"))
+
+# Sharded crawling: queue shared by the coordinator and every worker, result pages per work item
+WORK_QUEUE = os.getenv("work_queue", os.path.join(os.getcwd(), 'data', 'state', 'work_queue.sqlite'))
+PAGES_PER_SHARD = int(os.getenv("pages_per_shard", "5"))
+# Search plans younger than this (seconds) size the shards and skip keywords without hits
+PLAN_MAX_AGE = float(os.getenv("plan_max_age", "86400"))
+
+# Daemon mode: seconds between refreshes, overridable per script as 'script=seconds,...'
+REFRESH_INTERVAL = float(os.getenv("refresh_interval", "3600"))
+REFRESH_SCHEDULES = os.getenv("refresh_schedules", "")
+
+# Site folder under data/raw -> its bot in scripts.txt, for --site
+SITE_SCRIPTS = {
+    'ECHA': 'echaWebScraping.py',
+    'eur_lex': 'eur_lexWebScraping.py',
+    'resmigazete': 'resmiWebScraping.py',
+}
+
+
+def select_scripts(scripts, sites=None):
+    # Entries of scripts.txt belonging to the given sites, all of them without sites
+    if not sites:
+        return scripts
+    wanted = {SITE_SCRIPTS[site] for site in sites}
+    return [entry for entry in scripts if entry[0] in wanted]
+
+
+def table_formats_of(table_formats):
+    from src.utils.tableExtractor import parse_table_formats
+
+    if isinstance(table_formats, str):
+        return parse_table_formats(table_formats)
+    return table_formats
+
+
+def create_watchdog():
+    from src.utils.watchdog import Watchdog
+
+    if not TASK_BUDGET:
+        return None
+    return Watchdog(TASK_BUDGET, STALL_TIMEOUT, MAX_BROWSER_RSS, MAX_PROCESS_RSS, TASK_RESTARTS)
+
+
+def create_browser_cache():
+    if not BROWSER_CACHE:
+        return None
+    # Imported only when enabled, the slot locks need fcntl
+    from src.utils.browserCache import BrowserCache
+
+    return BrowserCache(disk_cache_mb=BROWSER_CACHE_MB, max_slot_mb=2 * BROWSER_CACHE_MB)
+
+
+def scrape(scripts_file_path='scripts.txt', script_keywords_file='executed_scripts.txt', fixtures=None,
+           table_formats=TABLE_FORMATS, sites=None):
+    from src.saved import ScriptRunner
+    from src.utils.metadataCatalog import compact_catalogs
+
+    runner = ScriptRunner(script_keywords_file, fixtures=fixtures, table_formats=table_formats_of(table_formats),
+                          browser_profile=BROWSER_PROFILE, window_workers=WINDOW_WORKERS,
+                          batch_searches=BATCH_SEARCHES, watchdog=create_watchdog(),
+                          browser_cache=create_browser_cache())
+    try:
+        scripts = select_scripts(runner.read_scripts_from_file(scripts_file_path), sites)
+        runner.run_scripts(scripts)
+    finally:
+        runner.close()
+    compact_catalogs(catalog_directory)
+
+
+def work(queue_path=WORK_QUEUE, worker_id=None, fixtures=None, table_formats=TABLE_FORMATS, run_id=None,
+         scripts_file_path='scripts.txt'):
+    """
+    Worker of a sharded crawl: scrapes (site, keyword, page range) items from the queue
+    until it is drained. Outputs are flushed before an item is marked done.
+    """
+    from src.saved import ScriptRunner
+    from src.utils.workQueue import WorkQueue, default_worker_id, run_worker
+
+    queue = WorkQueue(queue_path)
+    worker_id = worker_id or default_worker_id()
+    executed_file = os.path.join(os.path.dirname(queue_path), f'executed_scripts_{worker_id}.txt')
+    runner = ScriptRunner(executed_file, fixtures=fixtures, table_formats=table_formats_of(table_formats),
+                          browser_profile=BROWSER_PROFILE, window_workers=WINDOW_WORKERS,
+                          watchdog=create_watchdog(), browser_cache=create_browser_cache())
+    # Only for the site profiles, the items come from the queue
+    runner.read_scripts_from_file(scripts_file_path)
+
+    def process_item(item):
+        runner.run_script(item['script'], item['link'], [item['keyword']], item['last_page'],
+                          first_page=item['first_page'])
+        runner.writer.flush()
+
+    try:
+        stats = run_worker(queue, process_item, worker_id, run_id=run_id)
+    finally:
+        runner.close()
+        queue.close()
+    print(f"Worker {worker_id}: {stats}")
+
+
+def coordinate(scripts_file_path='scripts.txt', queue_path=WORK_QUEUE, pages_per_shard=PAGES_PER_SHARD,
+               run_id=None, poll_interval=30, sites=None):
+    """
+    Coordinator of a sharded crawl: queues every (site, keyword, page range) of scripts.txt,
+    waits for the workers to finish them, then runs the stages after scraping once.
+    """
+    from src.saved import ScriptRunner
+    from src.utils.metadataCatalog import compact_catalogs
+    from src.utils.searchPlan import estimate_run, latest_plans
+    from src.utils.workQueue import WorkQueue, plan_shards
+
+    run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+    runner = ScriptRunner(os.devnull)
+    try:
+        scripts = select_scripts(runner.read_scripts_from_file(scripts_file_path), sites)
+        # Bots searching date windows split their search themselves, they get whole keywords
+        whole_scripts = tuple(script for script, _, _, _ in scripts if runner.discovery(script) == 'windows')
+        shard_pages = {script: runner.profile(script).pages_per_shard for script, _, _, _ in scripts
+                       if runner.profile(script).pages_per_shard is not None}
+    finally:
+        runner.close()
+    # Pages found by the searches of recent runs
+    page_counts = {(SITE_SCRIPTS[site], keyword): plan['pages']
+                   for (site, keyword), plan in latest_plans(max_age=PLAN_MAX_AGE).items()
+                   if site in SITE_SCRIPTS and plan['pages'] is not None}
+    items = plan_shards(scripts, pages_per_shard, whole_scripts=whole_scripts, page_counts=page_counts,
+                        shard_pages=shard_pages)
+    queue = WorkQueue(queue_path)
+    added = queue.enqueue(run_id, items)
+    print(f"Run {run_id}: queued {added} work items, estimated {estimate_run(items)}")
 
-    runner = ScriptRunner(script_keywords_file)
-    scripts = runner.read_scripts_from_file(scripts_file_path)
-    runner.run_scripts(scripts)
+    while not queue.finished(run_id):
+        print(f"Run {run_id}: {queue.counts(run_id)}")
+        time.sleep(poll_interval)
+    counts = queue.counts(run_id)
+    queue.close()
+    print(f"Run {run_id} finished: {counts}")
 
-    copy_raw_data(source_directory, destination_directory)
+    compact_catalogs(catalog_directory)
+    extract_text()
+    index()
+    # Archives of modified documents replace their blobs, the rest are uploaded if missing
+    upload(sites=sites, replace=archive(sites=sites))
 
-    files_, destination = zip_files_with_same_names(source_directory, destination_directory)
 
-    index = 0
-    for item, values in files_.items():
-        compress(values, destination[index], item + '.zip')
-        index += 1
+def daemon(scripts_file_path='scripts.txt', schedules=None, fixtures=None, table_formats=TABLE_FORMATS):
+    """
+    Refreshes the sites on their schedules with a warm browser, HTTP session and blob client,
+    archiving and uploading only the documents that changed. Stops on SIGTERM or Ctrl+C.
+    """
+    from src.daemon import RefreshDaemon, parse_schedules
+    from src.saved import ScriptRunner
+    from src.utils.metadataCatalog import compact_catalogs
+    from src.utils.uploadFiles import create_blob_service_client
+
+    if schedules is None:
+        schedules = parse_schedules(REFRESH_SCHEDULES, REFRESH_INTERVAL)
+    # The daemon refreshes regardless of executed keywords, keep its bookkeeping apart
+    executed_file = os.path.join(os.getcwd(), 'data', 'state', 'executed_scripts_daemon.txt')
+    os.makedirs(os.path.dirname(executed_file), exist_ok=True)
+    runner = ScriptRunner(executed_file, fixtures=fixtures, table_formats=table_formats_of(table_formats),
+                          browser_profile=BROWSER_PROFILE, window_workers=WINDOW_WORKERS,
+                          batch_searches=BATCH_SEARCHES, watchdog=create_watchdog(),
+                          browser_cache=create_browser_cache())
+    clients = {}
+
+    def on_refreshed(started):
+        compact_catalogs(catalog_directory)
+        extract_text()
+        index()
+        # The last path is the round's change feed, uploaded even when nothing changed
+        changed = archive(changed_since=started)
+        if 'blob' not in clients:
+            clients['blob'] = create_blob_service_client(ACCOUNT_KEY, ACCOUNT_NAME, ACCOUNT_URL)
+        upload(files=changed, blob_service_client=clients['blob'])
+        print(f"Refresh round done: {len(changed) - 1} archives updated")
+
+    refresh_daemon = RefreshDaemon(runner, scripts_file_path, schedules, on_refreshed)
+    signal.signal(signal.SIGTERM, lambda signum, frame: refresh_daemon.stop())
+    try:
+        refresh_daemon.run()
+    except KeyboardInterrupt:
+        refresh_daemon.stop()
+
+
+def extract_text(source_dir=source_directory, cache_dir=pdf_text_cache_directory):
+    from src.utils.pdfText import extract_pdf_texts
+
+    stats = extract_pdf_texts(source_dir, cache_dir)
+    print(f"PDF text extraction: {stats}")
+
+
+def index(source_dir=source_directory, index_path=search_index_path):
+    from src.utils.searchIndex import update_index
+
+    stats = update_index(source_dir, index_path)
+    print(f"Search index update: {stats}")
+
+
+def archive(source_dir=source_directory, dest_dir=destination_directory, changed_since=None, sites=None,
+            manifest_path=None):
+    """
+    Zips every document; with changed_since (a timestamp), only the documents whose content
+    hash changed since they were last archived, and with sites, only the documents of those
+    sites. In the bundle layout, new and changed documents are appended to their bundles
+    instead. Also writes the run's change feed, see src/utils/changeFeed.py. Returns the
+    paths of the archives of new and changed documents (or of the bundles written) and of
+    the feed, to be uploaded over their blobs.
+    """
+    from src.utils.bundleArchive import bundle_documents, default_bundle_index_path
+    from src.utils.changeFeed import changed_documents, default_manifest_path, write_change_feed
+    from src.utils.zipFiles import compress, zip_files_with_same_names, copy_raw_data
+
+    copy_raw_data(source_dir, dest_dir, sites=sites)
+
+    files_, destination = zip_files_with_same_names(source_dir, dest_dir, sites=sites)
+
+    catalog_dir = os.path.join(os.path.dirname(os.path.abspath(source_dir)), 'catalog')
+    manifest_path = manifest_path or default_manifest_path(source_dir)
+    written = []
+    bundles = snapshot = None
+    if ARCHIVE_LAYOUT == 'bundles':
+        written, bundles = bundle_documents(files_, destination, dest_dir, default_bundle_index_path(source_dir),
+                                            changed_since)
+    else:
+        # The bots rewrite the files of every document they see, so a recent mtime alone
+        # does not mean the document changed
+        changed, snapshot = changed_documents(files_, destination, dest_dir, catalog_dir, manifest_path, sites=sites)
+        index = 0
+        for item, values in files_.items():
+            if changed_since is None or item in changed:
+                compress(values, destination[index], os.path.basename(item) + '.zip')
+            if item in changed:
+                written.append(item + '.zip')
+            index += 1
+    written.append(write_change_feed(files_, destination, dest_dir, catalog_dir, manifest_path, sites=sites,
+                                     bundles=bundles, snapshot=snapshot))
+    return written
+
+
+def upload(root_dir=ROOT_DIR, container_name='sisecam-zipped', blob_service_client=None, files=None, sites=None,
+           replace=None):
+    """
+    Uploads the archives under root_dir that are not in the container yet, of the given
+    sites only when sites is set; with files, only those archives, replacing the blobs of
+    earlier versions. The archives in replace (what archive() returns) are uploaded over
+    their blobs first. In the bundle layout, bundles that grew since their upload are
+    replaced as well.
+    """
+    from src.utils.changeFeed import CHANGE_FEED_FOLDER
+    from src.utils.uploadFiles import create_blob_service_client, upload_all, upload_files
+
+    cwd = os.getcwd()
+    os.chdir(root_dir)
+    try:
+        if files is not None or replace:
+            if blob_service_client is None:
+                blob_service_client = create_blob_service_client(ACCOUNT_KEY, ACCOUNT_NAME, ACCOUNT_URL)
+            # Blob names are relative to root_dir, like in upload_all
+            upload_files([os.path.relpath(os.path.join(cwd, file), root_dir) for file in (files or replace)],
+                         container_name, blob_service_client)
+        if files is not None:
+            return
+        for site_dir in os.listdir():
+            # The change feeds go up with the archives of any site
+            if sites and site_dir not in sites and site_dir != CHANGE_FEED_FOLDER:
+                continue
+            upload_all(ACCOUNT_KEY, ACCOUNT_NAME, ACCOUNT_URL, site_dir, container_name,
+                       blob_service_client=blob_service_client, replace_resized=ARCHIVE_LAYOUT == 'bundles')
+    finally:
+        os.chdir(cwd)
+
+
+def with_fixtures(run):
+    # Runs run(fixtures) with the record/replay hook of the environment, if any
+    from src.utils.recordReplay import create_fixtures
+
+    fixtures = create_fixtures(FIXTURES_MODE, FIXTURES_DIR, REPLAY_LATENCY, REPLAY_JITTER)
+    try:
+        run(fixtures)
+    finally:
+        if fixtures is not None:
+            fixtures.close()
+
+
+def run_scrape(args):
+    def run(fixtures):
+        script_keywords_file = 'executed_scripts.txt'
+        if fixtures is not None:
+            # Keep the executed keywords of recorded/replayed runs apart from the live ones;
+            # a replay always runs every keyword again
+            script_keywords_file = os.path.join(FIXTURES_DIR, f'executed_scripts_{FIXTURES_MODE}.txt')
+            if fixtures.replaying and os.path.exists(script_keywords_file):
+                os.remove(script_keywords_file)
+        scrape(args.scripts, script_keywords_file, fixtures=fixtures, sites=args.site)
+
+    with_fixtures(run)
+
+
+def run_all(args):
+    run_scrape(args)
+    extract_text()
+    index()
+    upload(sites=args.site, replace=archive(sites=args.site))
+
+
+STAGES = {
+    'all': (run_all, "scrape, extract-text, index, archive and upload (default)"),
+    'scrape': (run_scrape, "run the bots of the scripts file"),
+    'extract-text': (lambda args: extract_text(), "extract the text of the downloaded PDFs"),
+    'index': (lambda args: index(), "update the full-text search index"),
+    'archive': (lambda args: archive(sites=args.site), "zip every document into data/processed"),
+    'upload': (lambda args: upload(sites=args.site), "upload the archives to blob storage"),
+    'worker': (lambda args: with_fixtures(lambda fixtures: work(fixtures=fixtures, scripts_file_path=args.scripts)),
+               "scrape work items of a sharded crawl until the queue is drained"),
+    'coordinate': (lambda args: coordinate(args.scripts, sites=args.site),
+                   "queue a sharded crawl, wait for the workers, then run the later stages"),
+    'daemon': (lambda args: with_fixtures(lambda fixtures: daemon(args.scripts, fixtures=fixtures)),
+               "keep refreshing the sites on their schedules"),
+}
+
+# Stages that can be limited to some sites
+SITE_STAGES = {'all', 'scrape', 'archive', 'upload', 'coordinate'}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Scrapes the regulation sites and archives the documents.")
+    subparsers = parser.add_subparsers(dest='stage')
+    for stage, (run, help_text) in STAGES.items():
+        subparser = subparsers.add_parser(stage, help=help_text)
+        subparser.add_argument('--scripts', default='scripts.txt', help="scripts file (default: scripts.txt)")
+        if stage in SITE_STAGES:
+            subparser.add_argument('--site', nargs='+', choices=list(SITE_SCRIPTS),
+                                   help="only these sites (default: every site)")
+        subparser.set_defaults(run=run)
+    # No stage runs the whole pipeline, as before
+    return parser.parse_args(argv or ['all'])
+
+
+if __name__ == '__main__':
+    from src.utils.structuredLogging import configure_logging, parse_levels
 
-    os.chdir(ROOT_DIR)
-    for root_dir in os.listdir():
-        upload_all(ACCOUNT_KEY, ACCOUNT_NAME, ACCOUNT_URL, root_dir, 'sisecam-zipped')
\ No newline at end of file
+    args = parse_args(sys.argv[1:])
+    configure_logging(level=LOG_LEVEL, levels=parse_levels(LOG_LEVELS))
+    args.run(args)
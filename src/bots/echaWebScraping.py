@@ -6,72 +6,111 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+from queue import Empty, Queue
 from typing import List, Tuple
-from bs4 import BeautifulSoup
-import json
-import logging
+
+from src.utils.fetchPolicy import DeadLetterQueue, FetchPolicy, install_policy
+from src.utils.hostScheduler import HostScheduler, install_scheduler
+from src.utils.metadataCatalog import MetadataCatalog
+from src.utils.outputWriter import OutputWriter
+from src.utils.rangeDownload import PARTIAL_DIR, download
+from src.utils.dateWindows import DateWindow, date_windows, dedupe_urls, window_page_key
+from src.utils.recordReplay import key_in_page_range, results_page_key
+from src.utils.searchPlan import SearchPlan, wait_for_hits
+from src.utils.structuredLogging import bot_logger
+from src.utils.tableExtractor import extract_tables, document_table_paths, save_document_tables
+
+
+# Searches start at the first update date of ECHA documents
+SEARCH_START = date(2012, 8, 9)
+
+RESULT_LINKS_XPATH = "//div[contains(@class, 'search-result-title')]//a[@href]"
+# The hit counter ('Showing 1 - 10 of 1,234 results.') of the results page iterator; the page
+# body would also match numbers of the search form and the results themselves
+HITS_LOCATOR = (By.CSS_SELECTOR, '.taglib-page-iterator .search-results, .search-total-label')
+# Date windows are not split below this many days, however many results they hold
+MIN_WINDOW_DAYS = 1
 
 
 class EchaWebScraper:
-    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver):
+    # Date windows by default; 'pages' pages through a single search like the sharded runs
+    DISCOVERY_BACKENDS = ('windows', 'pages')
+
+    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver, fixtures=None,
+                 table_formats=('json',), writer=None, scheduler=None,
+                 policy=None, first_page: int = 1, session=None, quit_driver: bool = True,
+                 page_weights=None, search_plans=None, driver_factory=None, window_workers: int = 1,
+                 window_days: int = 365, discovery: str = 'windows', wait_timeout: float = 20.0,
+                 delay_scale: float = 1.0, checkpoint=None):
         """
         WebScraper initializes with keywords, base URL, and site name for logging.
         Args:
             key_words (List[str]): List of keywords to search.
             base_url (str): Base URL for the web scraping.
             site_name (str): Name of the site for organizing logs.
+            fixtures (Recorder | Replayer, optional): Record/replay hook, None for live scraping.
+            table_formats (tuple): Output formats for extracted tables, any of 'json', 'parquet', 'feather'.
+            writer (OutputWriter, optional): Shared background writer; by default the scraper runs its own.
+            scheduler (HostScheduler, optional): Shared per-host politeness scheduler for every fetch.
+            policy (FetchPolicy, optional): Shared timeouts, retries and circuit breakers for every fetch.
+            first_page (int): First result page to scrape; earlier pages are only paged through.
+            session (requests.Session, optional): Shared HTTP session, unused when fixtures bring their own.
+            quit_driver (bool): Whether start() quits the driver; False keeps a warm browser open.
+            page_weights (PageWeightLog, optional): Log of the bytes each results page transferred.
+            search_plans (SearchPlanLog, optional): Log of the hit count and pages of each search.
+            driver_factory (callable, optional): Launches another browser for parallel date windows.
+            window_workers (int): Date windows searched at once; more than one needs driver_factory.
+            window_days (int): Initial date window length; windows with more results than
+                limited_page pages hold are split further.
+            discovery (str): 'windows' searches the date windows, 'pages' pages through one search.
+            wait_timeout (float): Seconds to wait for an element of a page.
+            delay_scale (float): Factor on the fixed pauses between page actions.
+            checkpoint (TaskWatch, optional): Watchdog checkpoint told about every results page
+                collected, see src/utils/watchdog.py.
         """
         self.base_url = base_url
         self.key_words = key_words
         self.driver = driver
-        self.driver.get(self.base_url)
+        self.fixtures = fixtures
+        self.table_formats = table_formats
+        # Outputs are written off the scraping thread; a writer created here is closed by start()
+        self.owns_writer = writer is None
+        self.writer = writer if writer is not None else OutputWriter()
+        if fixtures is not None:
+            self.session = fixtures.session
+        else:
+            self.session = session if session is not None else requests.Session()
+        self.quit_driver = quit_driver
+        self.page_weights = page_weights
+        self.search_plans = search_plans
+        self.discovery = discovery
+        self.wait_timeout = wait_timeout
+        self.delay_scale = delay_scale
+        self.checkpoint = checkpoint
+        self.driver_factory = driver_factory
+        self.window_workers = window_workers if driver_factory is not None else 1
+        self.window_days = window_days
+        self.scheduler = scheduler if scheduler is not None else HostScheduler()
+        install_scheduler(self.session, self.scheduler)
+        self.policy = policy if policy is not None else FetchPolicy()
+        install_policy(self.session, self.policy)
+        if not self.replaying:
+            with self.scheduler.slot(self.base_url):
+                self.driver.get(self.base_url)
         self.limited_page = limited_page
+        self.first_page = first_page
         self.site_name = "ECHA"
+        self.catalog = MetadataCatalog(self.site_name, writer=self.writer)
+        self.dead_letters = DeadLetterQueue(self.site_name)
 
         # Set up the logger
-        self.logger = self.setup_logger(self.site_name, key_words)
-
-    def setup_logger(self, site_name: str, key_words: List[str]) -> logging.Logger:
-        """
-        Sets up a logger for the scraper, creating directories for each site and keyword set.
-        Args:
-            site_name (str): The name of the site (e.g., 'ECHA', 'Eurlex').
-            key_words (List[str]): The list of keywords for the current scraper.
-
-        Returns:
-            logging.Logger: Configured logger instance.
-        """
-        # Define the log directory structure
-        log_dir = os.path.join("logs", site_name)
-        os.makedirs(log_dir, exist_ok=True)
-
-        # Create a log file name based on the keywords
-        log_file_name = f"{'_'.join(key_words)}.log"
-        log_file_path = os.path.join(log_dir, log_file_name)
-
-        # Create a logger for this scraper
-        logger = logging.getLogger(f"{site_name}_{'_'.join(key_words)}")
-        logger.setLevel(logging.INFO)
-
-        # Create a file handler that logs to a specific file
-        file_handler = logging.FileHandler(log_file_path)
-        file_handler.setLevel(logging.INFO)
-
-        # Create a stream handler to output logs to the console
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.INFO)
-
-        # Create a logging format
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        stream_handler.setFormatter(formatter)
-
-        # Add the handlers to the logger
-        if not logger.handlers:
-            logger.addHandler(file_handler)
-            logger.addHandler(stream_handler)
+        self.logger = bot_logger(self.site_name, key_words)
 
-        return logger
+    def pause(self, seconds: float):
+        # Fixed waits for the page to settle, scaled per site from scripts.txt
+        time.sleep(seconds * self.delay_scale)
 
     def start(self):
         """
@@ -81,142 +120,411 @@ class EchaWebScraper:
         for keyword in self.key_words:
             self.logger.info(f"Processing keyword: {keyword}")
             self.create_folder_structure(keyword)
+            self.retry_dead_letters(keyword)
             pdf_urls, non_pdf_urls = self.get_urls(keyword, self.limited_page)
+            if self.checkpoint is not None:
+                self.checkpoint.search_done()
             pdf_data = self.download_pdf_files(pdf_urls, keyword)
             self.save_pdf_data(keyword, pdf_data)
             self.process_non_pdf_urls(non_pdf_urls, keyword)
-        self.driver.quit()
+        if self.quit_driver:
+            self.driver.quit()
+        if self.owns_writer:
+            self.writer.close()
         self.logger.info("Scraping process completed.")
 
-    def search_for_keyword(self, keyword: str):
+    def search_for_keyword(self, keyword: str, driver=None):
+        driver = driver or self.driver
         self.logger.info(f"Searching for keyword: {keyword}")
-        search_box = WebDriverWait(self.driver, 20).until(
+        search_box = WebDriverWait(driver, self.wait_timeout).until(
             EC.presence_of_element_located((By.CLASS_NAME, "SimpleSearchText"))
         )
         search_box.clear()
         search_box.send_keys(keyword)
         search_box.send_keys(Keys.RETURN)
-        time.sleep(10)
 
-    def select_date(self, year, month, day):
-        self.logger.info(f"Selecting date: {year}-{month}-{day}")
-        from_date_picker = WebDriverWait(self.driver, 20).until(
+    def select_date(self, year, month, day, field: str = 'updatedFrom', driver=None):
+        driver = driver or self.driver
+        self.logger.info(f"Selecting {field} date: {year}-{month}-{day}")
+        date_picker = WebDriverWait(driver, self.wait_timeout).until(
             EC.element_to_be_clickable(
-                (By.XPATH, "//input[contains(@id, '_echasearch_WAR_echaportlet_updatedFrom')]"))
+                (By.XPATH, f"//input[contains(@id, '_echasearch_WAR_echaportlet_{field}')]"))
         )
-        from_date_picker.click()
-        time.sleep(2)
+        date_picker.click()
+        self.pause(2)
 
-        year_select_element = WebDriverWait(self.driver, 20).until(
+        year_select_element = WebDriverWait(driver, self.wait_timeout).until(
             EC.presence_of_element_located((By.XPATH, "//select[contains(@class, 'ui-datepicker-year')]"))
         )
 
         year_select = Select(year_select_element)
         year_select.select_by_value(str(year))
-        time.sleep(2)
+        self.pause(2)
 
-        month_select_element = WebDriverWait(self.driver, 20).until(
+        month_select_element = WebDriverWait(driver, self.wait_timeout).until(
             EC.presence_of_element_located((By.XPATH, "//select[contains(@class, 'ui-datepicker-month')]"))
         )
         month_select = Select(month_select_element)
         month_select.select_by_value(str(month - 1))
-        time.sleep(2)
+        self.pause(2)
 
-        day_element = WebDriverWait(self.driver, 20).until(
+        day_element = WebDriverWait(driver, self.wait_timeout).until(
             EC.element_to_be_clickable((By.XPATH,
                                         f"//td[@data-handler='selectDay' and @data-month='{month - 1}' and @data-year='{year}']/a[text()='{day}']"))
         )
         day_element.click()
-        time.sleep(2)
+        self.pause(2)
 
-    def sort_by_last_modified(self):
+    def sort_by_last_modified(self, driver=None):
+        driver = driver or self.driver
         self.logger.info("Sorting by last modified date.")
-        sort_by_select = WebDriverWait(self.driver, 20).until(
+        sort_by_select = WebDriverWait(driver, self.wait_timeout).until(
             EC.presence_of_element_located(
                 (By.XPATH, "//select[contains(@id, '_echasearch_WAR_echaportlet_sortingType')]"))
         )
         sort_by_select.click()
-        last_modified_option = WebDriverWait(self.driver, 20).until(
+        last_modified_option = WebDriverWait(driver, self.wait_timeout).until(
             EC.presence_of_element_located((By.XPATH, "//option[@value='modified']"))
         )
         last_modified_option.click()
-        time.sleep(5)
+        self.pause(5)
 
     def get_urls(self, keyword: str, limited_page: int) -> Tuple[
         List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
         """
         Extracts PDF and non-PDF URLs from search results.
+
+        The keyword's date range is searched in date windows, so that broad keywords are not
+        cut off by limited_page; sharded runs (first_page > 1) and the 'pages' discovery page
+        through a single search.
+        Keywords without hits end right after the search.
         Args:
             keyword (str): Keyword to search for.
 
         Returns:
             Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]: Lists of PDF and non-PDF URLs with metadata.
         """
-        pdf_urls = []
-        non_pdf_urls = []
-
-        self.driver.get(self.base_url)
-        time.sleep(5)
+        if self.replaying:
+            return self.replay_urls(keyword)
 
+        started = time.monotonic()
+        with self.scheduler.slot(self.base_url):
+            self.driver.get(self.base_url)
         try:
             self.logger.info(f"Retrieving URLs for keyword: {keyword}")
             self.search_for_keyword(keyword)
-            self.select_date(2012, 8, 9)
+            plan = self.plan_search(keyword, limited_page, started)
+        except Exception as e:
+            self.log_error(e, self.current_url())
+            return [], []
+        if plan.empty:
+            self.logger.info(f"No results for keyword: {keyword}")
+            return [], []
+        if self.first_page > 1 or self.discovery == 'pages':
+            return self.get_search_urls(keyword, limited_page)
+        return self.get_window_urls(keyword, limited_page, plan)
+
+    def plan_search(self, keyword: str, limited_page: int, started: float, driver=None) -> SearchPlan:
+        """
+        Reads the hit count of the search just submitted and logs what it will take.
+        Args:
+            keyword (str): Keyword searched.
+            limited_page (int): Page cap of the run, 0 for none.
+            started (float): time.monotonic() when the search started.
+            driver (webdriver.Chrome, optional): Browser showing the results, the bot's own by default.
+
+        Returns:
+            SearchPlan: Hits and pages of the search; hits is None when the page shows no count.
+        """
+        driver = driver or self.driver
+        hits = wait_for_hits(driver, HITS_LOCATOR, timeout=self.wait_timeout)
+        page_size = len(driver.find_elements(By.XPATH, RESULT_LINKS_XPATH)) if hits else 0
+        plan = SearchPlan(self.site_name, keyword, hits, page_size, limited_page, time.monotonic() - started)
+        self.logger.info(f"Search plan for {keyword}: {plan.hits} hits, {plan.pages} pages")
+        if self.search_plans is not None:
+            self.search_plans.add(plan)
+        return plan
+
+    def get_search_urls(self, keyword: str, limited_page: int) -> Tuple[
+        List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
+        """
+        Extracts PDF and non-PDF URLs from the search loaded in the driver, over the whole date range.
+        Args:
+            keyword (str): Keyword searched.
+            limited_page (int): Last results page, 0 for all of them.
+
+        Returns:
+            Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]: Lists of PDF and non-PDF URLs with metadata.
+        """
+        pdf_urls = []
+        non_pdf_urls = []
+
+        try:
+            self.select_date(SEARCH_START.year, SEARCH_START.month, SEARCH_START.day)
             self.sort_by_last_modified()
-            page_number = 1
-            while True:
+            self.collect_pages(self.driver, keyword, limited_page, pdf_urls, non_pdf_urls)
+        except Exception as e:
+            self.log_error(e, self.current_url())
+
+        return pdf_urls, non_pdf_urls
+
+    def get_window_urls(self, keyword: str, limited_page: int, plan: SearchPlan = None) -> Tuple[
+        List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
+        """
+        Extracts PDF and non-PDF URLs by searching the keyword in date windows, up to
+        window_workers windows at once, each on its own browser. A window with more results
+        than limited_page pages hold is split in two and searched again.
+        Args:
+            keyword (str): Keyword to search for.
+            limited_page (int): Results pages per window, 0 for all of them.
+            plan (SearchPlan, optional): Plan of the keyword's whole search; its hit count
+                sizes the first windows.
+
+        Returns:
+            Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]: Lists of PDF and non-PDF URLs with metadata.
+        """
+        self.logger.info(f"Retrieving URLs for keyword: {keyword} in date windows")
+        pdf_urls = []
+        non_pdf_urls = []
+        # Browsers are handed from window to window; the bot's own one is used first
+        drivers = Queue()
+        drivers.put(self.driver)
+        launched = []
+
+        def search(window):
+            try:
+                driver = drivers.get_nowait()
+            except Empty:
+                driver = self.driver_factory()
+                if self.checkpoint is not None:
+                    self.checkpoint.track(driver)
+                launched.append(driver)
+            try:
+                return self.search_window(driver, keyword, window, limited_page)
+            finally:
+                drivers.put(driver)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.window_workers) as executor:
+                pending = {executor.submit(search, window)
+                           for window in date_windows(SEARCH_START, date.today(), self.initial_window_days(plan))}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        window_pdf_urls, window_non_pdf_urls, split_windows = future.result()
+                        pdf_urls.extend(window_pdf_urls)
+                        non_pdf_urls.extend(window_non_pdf_urls)
+                        pending |= {executor.submit(search, window) for window in split_windows}
+        finally:
+            for driver in launched:
+                driver.quit()
+
+        pdf_urls, non_pdf_urls = dedupe_urls(pdf_urls), dedupe_urls(non_pdf_urls)
+        self.logger.info(f"Found {len(pdf_urls)} PDF URLs and {len(non_pdf_urls)} non-PDF URLs.")
+        return pdf_urls, non_pdf_urls
+
+    def initial_window_days(self, plan: SearchPlan = None) -> int:
+        """
+        Window length that spreads the plan's pages over enough windows to fit limited_page
+        each, assuming evenly spread hits; window_days at most.
+        """
+        if plan is None or not plan.total_pages or not self.limited_page:
+            return self.window_days
+        windows = -(-plan.total_pages // self.limited_page)
+        return max(1, min(self.window_days, (date.today() - SEARCH_START).days // windows))
+
+    def search_window(self, driver, keyword: str, window: DateWindow, limited_page: int):
+        """
+        Searches the keyword within one date window and extracts its results pages.
+        Args:
+            driver (webdriver.Chrome): Browser the search runs on.
+            keyword (str): Keyword to search for.
+            window (DateWindow): Update dates the search is limited to.
+            limited_page (int): Results pages the window may take, 0 for all of them.
+
+        Returns:
+            tuple: (pdf urls, non-pdf urls, windows to search instead); the URLs are empty
+            when the window has too many results and is split.
+        """
+        pdf_urls = []
+        non_pdf_urls = []
+        try:
+            with self.scheduler.slot(self.base_url):
+                driver.get(self.base_url)
+            self.search_for_keyword(keyword, driver)
+            self.select_date(window.start.year, window.start.month, window.start.day, 'updatedFrom', driver)
+            self.select_date(window.end.year, window.end.month, window.end.day, 'updatedTo', driver)
+            self.sort_by_last_modified(driver)
+
+            count = wait_for_hits(driver, HITS_LOCATOR, timeout=self.wait_timeout)
+            self.logger.info(f"{window}: {count if count is not None else 'unknown number of'} results")
+            if count == 0:
+                return pdf_urls, non_pdf_urls, []
+            page_size = len(driver.find_elements(By.XPATH, RESULT_LINKS_XPATH))
+            # Without results on the page its size is unknown, and every count would look too large
+            if (limited_page and count is not None and page_size and count > limited_page * page_size
+                    and window.days > MIN_WINDOW_DAYS):
+                self.logger.info(f"{window} holds more than {limited_page} pages, splitting it")
+                return pdf_urls, non_pdf_urls, window.split()
+
+            self.collect_pages(driver, keyword, limited_page, pdf_urls, non_pdf_urls, window)
+        except Exception as e:
+            self.log_error(e, f"{self.current_url(driver)} {window}")
+        return pdf_urls, non_pdf_urls, []
+
+    def collect_pages(self, driver, keyword: str, limited_page: int, pdf_urls: List[Tuple[str, str, str, str]],
+                      non_pdf_urls: List[Tuple[str, str, str, str]], window: DateWindow = None):
+        """
+        Extracts the results pages of the search loaded in the driver, following 'Next'.
+        Args:
+            driver (webdriver.Chrome): Browser showing the search results.
+            keyword (str): Keyword of the search.
+            limited_page (int): Last results page, 0 for all of them.
+            pdf_urls (List[Tuple[str, str, str, str]]): List the PDF URLs are appended to.
+            non_pdf_urls (List[Tuple[str, str, str, str]]): List the non-PDF URLs are appended to.
+            window (DateWindow, optional): Date window of the search, part of the fixture keys.
+        """
+        if limited_page == 0:
+            limited_page = float('inf')
+        page_number = 1
+        while True:
+            # Pages before first_page belong to another shard, they are only paged through
+            if page_number >= self.first_page:
                 self.logger.info(f"Processing page number: {page_number}")
-                results = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH, "//div[contains(@class, 'search-result-title')]//a[@href]"))
-                )
-                dates = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH,
-                         "//div[contains(@class, 'search-result-title')]//a[@href]/../../following-sibling::td"))
-                )
-                descriptions = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH, "//div[contains(@class, 'search-result-content')]"))
-                )
-
-                for result, date, description in zip(results, dates, descriptions):
-                    link = result.get_attribute("href")
-                    name = result.text.strip()
-                    description_text = description.text.strip()
-
-                    if link.startswith('/'):
-                        link = 'https://echa.europa.eu' + link
-                    formatted_date = date.text.strip().replace('/', '-')
-                    day, month, year = formatted_date.split('-')
-                    year = '20' + year
-                    formatted_date = f"{year}-{month}-{day}"
-
-                    if link.split('/')[-2].endswith('.pdf'):
-                        pdf_urls.append((link, formatted_date, name, description_text))
-                    else:
-                        non_pdf_urls.append((link, formatted_date, name, description_text))
+                self.extract_page_urls(pdf_urls, non_pdf_urls, driver)
+                key = window_page_key(window, page_number) if window is not None else results_page_key(page_number)
+                self.record_page(keyword, key, driver)
+                # Pages of date windows are searched in parallel and cannot be resumed after
+                if window is None and self.checkpoint is not None:
+                    self.checkpoint.page_done(page_number)
 
                 self.logger.info(f"Found {len(pdf_urls)} PDF URLs and {len(non_pdf_urls)} non-PDF URLs.")
 
-                if limited_page == 0:
-                    limited_page = float('inf')
-
-                if page_number < limited_page:
-                    page_number += 1
-                    next_button = self.driver.find_elements(By.XPATH, "//a[contains(text(), 'Next')]")
-                    if next_button and 'disabled' not in next_button[0].get_attribute('class') and next_button[
-                        0].get_attribute('href') != "javascript:;":
-                        next_button[0].click()
-                        time.sleep(5)
-                    else:
-                        break
-                else:
-                    break
-        except Exception as e:
-            self.log_error(e, self.driver.current_url)
+            if page_number >= limited_page:
+                break
+            next_button = driver.find_elements(By.XPATH, "//a[contains(text(), 'Next')]")
+            if next_button and 'disabled' not in next_button[0].get_attribute('class') and next_button[
+                0].get_attribute('href') != "javascript:;":
+                page_number += 1
+                next_button[0].click()
+                self.pause(5)
+            else:
+                break
+
+    def extract_page_urls(self, pdf_urls: List[Tuple[str, str, str, str]],
+                          non_pdf_urls: List[Tuple[str, str, str, str]], driver=None):
+        """
+        Extracts PDF and non-PDF URLs from the results page currently loaded in the driver.
+        Args:
+            pdf_urls (List[Tuple[str, str, str, str]]): List the PDF URLs are appended to.
+            non_pdf_urls (List[Tuple[str, str, str, str]]): List the non-PDF URLs are appended to.
+            driver (webdriver.Chrome, optional): Browser showing the page, the bot's own by default.
+        """
+        driver = driver or self.driver
+        results = WebDriverWait(driver, self.wait_timeout).until(
+            EC.presence_of_all_elements_located((By.XPATH, RESULT_LINKS_XPATH))
+        )
+        dates = WebDriverWait(driver, self.wait_timeout).until(
+            EC.presence_of_all_elements_located(
+                (By.XPATH,
+                 "//div[contains(@class, 'search-result-title')]//a[@href]/../../following-sibling::td"))
+        )
+        descriptions = WebDriverWait(driver, self.wait_timeout).until(
+            EC.presence_of_all_elements_located(
+                (By.XPATH, "//div[contains(@class, 'search-result-content')]"))
+        )
 
-        return pdf_urls, non_pdf_urls
+        for result, date, description in zip(results, dates, descriptions):
+            link = result.get_attribute("href")
+            name = result.text.strip()
+            description_text = description.text.strip()
+
+            if link.startswith('/'):
+                link = 'https://echa.europa.eu' + link
+            formatted_date = date.text.strip().replace('/', '-')
+            day, month, year = formatted_date.split('-')
+            year = '20' + year
+            formatted_date = f"{year}-{month}-{day}"
+
+            if link.split('/')[-2].endswith('.pdf'):
+                pdf_urls.append((link, formatted_date, name, description_text))
+            else:
+                non_pdf_urls.append((link, formatted_date, name, description_text))
+
+    def replay_urls(self, keyword: str) -> Tuple[
+        List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
+        """
+        Extracts PDF and non-PDF URLs from the recorded result pages instead of the live site.
+        Args:
+            keyword (str): Keyword the result pages were recorded for.
+
+        Returns:
+            Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]: Lists of PDF and non-PDF URLs with metadata.
+        """
+        pdf_urls = []
+        non_pdf_urls = []
+        for key in self.fixtures.page_keys(self.site_name, keyword, 'results-'):
+            if not key_in_page_range(key, self.first_page, self.limited_page):
+                continue
+            self.logger.info(f"Replaying page: {key}")
+            try:
+                self.driver.get(self.fixtures.page_url(self.site_name, keyword, key))
+                self.extract_page_urls(pdf_urls, non_pdf_urls)
+            except Exception as e:
+                self.log_error(e, key)
+        return dedupe_urls(pdf_urls), dedupe_urls(non_pdf_urls)
+
+    @property
+    def replaying(self) -> bool:
+        return self.fixtures is not None and self.fixtures.replaying
+
+    def record_page(self, keyword: str, key: str, driver=None):
+        """
+        Hands the page currently loaded in the driver to the fixture recorder and the page
+        weight log, if any.
+        Args:
+            keyword (str): Keyword the page belongs to.
+            key (str): Fixture key of the page.
+            driver (webdriver.Chrome, optional): Browser showing the page, the bot's own by default.
+        """
+        driver = driver or self.driver
+        if self.fixtures is not None:
+            self.fixtures.record_page(self.site_name, keyword, key, driver)
+        if self.page_weights is not None:
+            self.page_weights.record(self.site_name, keyword, key, driver)
+        if self.checkpoint is not None:
+            self.checkpoint.heartbeat()
+
+    def retry_dead_letters(self, keyword: str):
+        """
+        Fetches the keyword's documents that failed in earlier runs, before the new ones.
+        Args:
+            keyword (str): Keyword whose failed documents are retried.
+        """
+        pdf_urls, non_pdf_urls = self.dead_letters.take(keyword)
+        if not pdf_urls and not non_pdf_urls:
+            return
+        self.logger.info(f"Retrying {len(pdf_urls) + len(non_pdf_urls)} failed documents for keyword: {keyword}")
+        pdf_data = self.download_pdf_files(pdf_urls, keyword)
+        self.save_pdf_data(keyword, pdf_data)
+        self.process_non_pdf_urls(non_pdf_urls, keyword)
+
+    def fetch_pdf(self, url: str) -> bytes:
+        """
+        Fetches a PDF. Live runs go through a part file that resumes broken downloads, see
+        src/utils/rangeDownload.py; recorded and replayed runs fetch it whole, as fixtures
+        hold whole responses.
+        Args:
+            url (str): URL of the PDF.
+
+        Returns:
+            bytes: Content of the PDF.
+        """
+        if self.fixtures is not None:
+            response = self.session.get(url)
+            response.raise_for_status()
+            return response.content
+        return download(self.session, url, os.path.join(PARTIAL_DIR, self.site_name))
 
     def download_pdf_files(self, urls: List[Tuple[str, str, str, str]], keyword: str) -> List[dict]:
         """
@@ -232,23 +540,24 @@ class EchaWebScraper:
         data = []
         for url, date, name, description in urls:
             try:
-                pdf_response = requests.get(url)
+                content = self.fetch_pdf(url)
                 data.append({
                     'url': url,
                     'date': date,
                     'file_name': name,
-                    'content': pdf_response.content
+                    'content': content
                 })
-                self.logger.info(f"Downloaded: {name}")
+                self.logger.info(f"Downloaded: {name}", extra={'document': name, 'url': url})
                 self.save_metadata(keyword, {
                     "name": name,
                     "notified_date": date,
                     "notified_country": None,
                     "URL": url,
                     "keyword": keyword
-                })
+                }, content=content, outputs=[self.pdf_file_name(keyword, date, name)])
             except Exception as e:
                 self.log_error(e, url)
+                self.dead_letters.add(keyword, 'pdf', url, date, name, description, e)
         return data
 
     def process_non_pdf_urls(self, urls: List[Tuple[str, str, str, str]], keyword: str):
@@ -261,11 +570,11 @@ class EchaWebScraper:
         self.logger.info(f"Processing non-PDF URLs for keyword: {keyword}")
         for url, date, name, description in urls:
             try:
-                response = requests.get(url)
-                soup = BeautifulSoup(response.content, 'html.parser')
+                response = self.session.get(url)
+                response.raise_for_status()
 
-                self.save_summary(keyword, url, date, name, description)
-                self.extract_and_save_tables(soup, keyword, name, date)
+                summary_file_name = self.save_summary(keyword, url, date, name, description)
+                table_files = self.extract_and_save_tables(response.content, keyword, name, date)
                 self.logger.info(f"Extracted summary and checked for tables from: {url}")
                 self.save_metadata(keyword, {
                     "name": name,
@@ -273,45 +582,32 @@ class EchaWebScraper:
                     "notified_country": None,
                     "URL": url,
                     "keyword": keyword
-                })
+                }, content=response.content, outputs=[summary_file_name] + table_files)
             except Exception as e:
                 self.log_error(e, url)
+                self.dead_letters.add(keyword, 'page', url, date, name, description, e)
 
-    def extract_and_save_tables(self, soup: BeautifulSoup, keyword: str, name: str, date: str):
+    def extract_and_save_tables(self, page_content: bytes, keyword: str, name: str, date: str):
         """
-        Extracts and saves tables from the provided page soup into a single JSON file.
+        Extracts and saves tables from the provided page HTML in the configured formats.
         Args:
-            soup (BeautifulSoup): BeautifulSoup object of the page.
+            page_content (bytes): Raw HTML of the page.
             keyword (str): Keyword for creating folder structure.
             name (str): Name for the file.
             date (str): Date of the page.
+        Returns:
+            List[str]: Written table files/folders, empty when the page has no tables.
         """
         self.logger.info(f"Extracting tables from page: {name}")
-        tables_data = []
-
-        tables = soup.find_all('table')
-        for i, table in enumerate(tables):
-            headers = [th.get_text().strip() for th in table.find_all('th')]
-            rows = [
-                [cell.get_text().strip() for cell in row.find_all('td')]
-                for row in table.find_all('tr') if row.find_all('td')
-            ]
-
-            if rows and headers:
-                table_data = {
-                    'headers': headers,
-                    'rows': rows
-                }
-                tables_data.append(table_data)
+        tables_data = extract_tables(page_content)
 
         if tables_data:
-            keyword_folder = os.path.join('data/raw/ECHA', keyword.replace(':', '').replace(' ', '_'), 'json')
-            os.makedirs(keyword_folder, exist_ok=True)
-            table_file_name = os.path.join(keyword_folder, f"{date}-{name}.json")
-
-            with open(table_file_name, 'w', encoding='utf-8') as table_file:
-                json.dump(tables_data, table_file, ensure_ascii=False, indent=4)
-            self.logger.info(f"Saved tables to {table_file_name}")
+            keyword_folder = os.path.join('data/raw/ECHA', keyword.replace(':', '').replace(' ', '_'))
+            table_files = document_table_paths(keyword_folder, f"{date}-{name}", self.table_formats)
+            self.writer.submit(save_document_tables, tables_data, keyword_folder, f"{date}-{name}", self.table_formats)
+            self.logger.info(f"Saved tables to {', '.join(table_files)}")
+            return table_files
+        return []
 
     def save_summary(self, keyword: str, url: str, date: str, name: str, description: str):
         """
@@ -324,15 +620,16 @@ class EchaWebScraper:
         """
         self.logger.info(f"Saving summary for: {name}")
         keyword_folder = os.path.join('data/raw/ECHA', keyword.replace(':', '').replace(' ', '_'), 'text')
-        os.makedirs(keyword_folder, exist_ok=True)
         summary_file_name = os.path.join(keyword_folder, f"{date}-{name}.txt")
 
-        with open(summary_file_name, 'w', encoding='utf-8') as summary_file:
-            summary_file.write(f"Title: {name}\n")
-            summary_file.write(f"Distribution date: {date}\n")
-            summary_file.write(f"Keywords:: {keyword}\n")
-            summary_file.write(f"Summary: {description}\n")
+        self.writer.write_text(summary_file_name, (
+            f"Title: {name}\n"
+            f"Distribution date: {date}\n"
+            f"Keywords:: {keyword}\n"
+            f"Summary: {description}\n"
+        ))
         self.logger.info(f"Summary saved to {summary_file_name}")
+        return summary_file_name
 
     def save_pdf_data(self, keyword: str, data: List[dict]):
         """
@@ -342,32 +639,46 @@ class EchaWebScraper:
             data (List[dict]): List of PDF data to save.
         """
         self.logger.info(f"Saving PDF data for keyword: {keyword}")
-        keyword_folder = os.path.join('data/raw/ECHA', keyword.replace(':', '').replace(' ', '_'), 'pdf')
-        os.makedirs(keyword_folder, exist_ok=True)
-
         for item in data:
-            pdf_name = os.path.join(keyword_folder, f"{item['date']}-{item['file_name']}")
-            with open(pdf_name, 'wb') as pdf_file:
-                pdf_file.write(item['content'])
+            pdf_name = self.pdf_file_name(keyword, item['date'], item['file_name'])
+            self.writer.write_bytes(pdf_name, item['content'])
             self.logger.info(f"PDF saved to {pdf_name}")
 
-    def save_metadata(self, keyword: str, metadata: dict):
+    def pdf_file_name(self, keyword: str, date: str, name: str) -> str:
+        """
+        Builds the path a downloaded PDF is saved to.
+        Args:
+            keyword (str): Keyword for creating folder structure.
+            date (str): Date of the document.
+            name (str): Name of the document.
+
+        Returns:
+            str: Path of the PDF file.
+        """
+        keyword_folder = os.path.join('data/raw/ECHA', keyword.replace(':', '').replace(' ', '_'), 'pdf')
+        return os.path.join(keyword_folder, f"{date}-{name}")
+
+    def save_metadata(self, keyword: str, metadata: dict, content: bytes = None, outputs: List[str] = None):
         """
-        Saves metadata to a JSON file.
+        Records metadata in the site's metadata catalog.
         Args:
             keyword (str): Keyword for creating folder structure.
             metadata (dict): Metadata to save.
+            content (bytes, optional): Downloaded content, hashed for change detection.
+            outputs (List[str], optional): Paths of the files written for the document.
         """
         self.logger.info(f"Saving metadata for: {metadata['name']}")
-        metadata_folder = os.path.join('data/raw/ECHA', keyword.replace(':', '').replace(' ', '_'), 'metadata')
-        os.makedirs(metadata_folder, exist_ok=True)
-        metadata_file_name = os.path.join(metadata_folder,
-                                          f"metadata_{metadata['notified_date']}-{metadata['name']}.json")
-
-        with open(metadata_file_name, 'w', encoding='utf-8') as metadata_file:
-            json.dump(metadata, metadata_file, ensure_ascii=False, indent=4)
-        self.logger.info(f"Metadata saved to {metadata_file_name}")
+        self.catalog.append(stem=f"{metadata['notified_date']}-{metadata['name']}", name=metadata['name'],
+                            date=metadata['notified_date'], url=metadata['URL'], keyword=keyword,
+                            content=content, outputs=outputs,
+                            notified_country=metadata['notified_country'])
 
+    def current_url(self, driver=None) -> str:
+        # The browser may be gone, e.g. killed by the watchdog
+        try:
+            return (driver or self.driver).current_url
+        except Exception:
+            return self.base_url
 
     def log_error(self, error: Exception, url: str):
         """
@@ -376,7 +687,7 @@ class EchaWebScraper:
             error (Exception): The caught exception.
             url (str): URL where the error occurred.
         """
-        self.logger.error(f"An error occurred while processing {url}: {str(error)}")
+        self.logger.error(f"An error occurred while processing {url}: {str(error)}", extra={'url': url})
 
     def create_folder_structure(self, keyword: str):
         """
@@ -389,5 +700,4 @@ class EchaWebScraper:
         os.makedirs(keyword_folder, exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'pdf'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'text'), exist_ok=True)
-        os.makedirs(os.path.join(keyword_folder, 'metadata'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'json'), exist_ok=True)
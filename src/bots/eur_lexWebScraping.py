@@ -7,85 +7,195 @@ from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 import time
 from typing import List, Tuple
-from bs4 import BeautifulSoup
-import json
-import logging
+
+from src.utils.fetchPolicy import DeadLetterQueue, FetchPolicy, install_policy
+from src.utils.hostScheduler import HostScheduler, install_scheduler
+from src.utils.keywordMatch import UNCLASSIFIED_KEYWORD, classify, html_text, or_query
+from src.utils.metadataCatalog import MetadataCatalog
+from src.utils.outputWriter import OutputWriter
+from src.utils.rangeDownload import PARTIAL_DIR, download
+from src.utils.recordReplay import key_in_page_range, results_page_key
+from src.utils.searchPlan import SearchPlan, wait_for_hits
+from src.utils.structuredLogging import bot_logger
+from src.utils.tableExtractor import extract_tables, document_table_paths, save_document_tables
+
+# Holds the hit counter, or the 'No results found' message of an empty search
+HITS_LOCATOR = (By.ID, 'EurlexContent')
+SEARCH_RESULTS_XPATH = "//div[@id='EurlexContent']//div[@class='SearchResult']"
 
 
 class EurWebScraper:
-    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver):
+    # Its quick search takes OR queries, so keywords can share one search
+    DISCOVERY_BACKENDS = ('pages', 'batch')
+
+    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver, fixtures=None,
+                 table_formats=('json',), writer=None, scheduler=None,
+                 policy=None, first_page: int = 1, session=None, quit_driver: bool = True,
+                 page_weights=None, search_plans=None, batch_search: bool = False,
+                 wait_timeout: float = 20.0, delay_scale: float = 1.0, checkpoint=None):
         """
         Initializes the WebScrapereur class with keywords for searching.
 
         Args:
             key_words (List[str]): List of keywords to be used in the search.
+            fixtures (Recorder | Replayer, optional): Record/replay hook, None for live scraping.
+            table_formats (tuple): Output formats for extracted tables, any of 'json', 'parquet', 'feather'.
+            writer (OutputWriter, optional): Shared background writer; by default the scraper runs its own.
+            scheduler (HostScheduler, optional): Shared per-host politeness scheduler for every fetch.
+            policy (FetchPolicy, optional): Shared timeouts, retries and circuit breakers for every fetch.
+            first_page (int): First result page to scrape; earlier pages are only paged through.
+            session (requests.Session, optional): Shared HTTP session, unused when fixtures bring their own.
+            quit_driver (bool): Whether start() quits the driver; False keeps a warm browser open.
+            page_weights (PageWeightLog, optional): Log of the bytes each results page transferred.
+            search_plans (SearchPlanLog, optional): Log of the hit count and pages of each search.
+            batch_search (bool): Search all keywords with one OR query and sort the hits into
+                the keyword folders locally, see start_batched.
+            wait_timeout (float): Seconds to wait for an element of a page.
+            delay_scale (float): Factor on the fixed pauses between page actions.
+            checkpoint (TaskWatch, optional): Watchdog checkpoint told about every results page
+                collected, see src/utils/watchdog.py.
         """
         self.base_url = base_url
         self.key_words = key_words
         self.driver = driver
+        self.fixtures = fixtures
+        self.table_formats = table_formats
+        # Outputs are written off the scraping thread; a writer created here is closed by start()
+        self.owns_writer = writer is None
+        self.writer = writer if writer is not None else OutputWriter()
+        if fixtures is not None:
+            self.session = fixtures.session
+        else:
+            self.session = session if session is not None else requests.Session()
+        self.quit_driver = quit_driver
+        self.page_weights = page_weights
+        self.search_plans = search_plans
+        self.wait_timeout = wait_timeout
+        self.delay_scale = delay_scale
+        self.checkpoint = checkpoint
+        self.batch_search = batch_search
+        self.scheduler = scheduler if scheduler is not None else HostScheduler()
+        install_scheduler(self.session, self.scheduler)
+        self.policy = policy if policy is not None else FetchPolicy()
+        install_policy(self.session, self.policy)
         self.driver.maximize_window()
-        self.driver.get(self.base_url)
+        if not self.replaying:
+            with self.scheduler.slot(self.base_url):
+                self.driver.get(self.base_url)
         self.limited_page = limited_page
+        self.first_page = first_page
+        self.site_name = "eur_lex"
+        self.catalog = MetadataCatalog(self.site_name, writer=self.writer)
+        self.dead_letters = DeadLetterQueue(self.site_name)
 
         # Set up the logger
-        self.logger = self.setup_logger("eur_lex", key_words)
+        self.logger = bot_logger(self.site_name, key_words)
 
-    def setup_logger(self, site_name: str, key_words: List[str]) -> logging.Logger:
-        """
-        Sets up a logger for the scraper, creating directories for each site and keyword set.
-        Args:
-            site_name (str): The name of the site (e.g., 'ECHA', 'Eurlex').
-            key_words (List[str]): The list of keywords for the current scraper.
+    def pause(self, seconds: float):
+        # Fixed waits for the page to settle, scaled per site from scripts.txt
+        time.sleep(seconds * self.delay_scale)
 
-        Returns:
-            logging.Logger: Configured logger instance.
+    def start(self):
         """
-        # Define the log directory structure
-        log_dir = os.path.join("logs", site_name)
-        os.makedirs(log_dir, exist_ok=True)
-
-        # Create a log file name based on the keywords
-        log_file_name = f"{'_'.join(key_words)}.log"
-        log_file_path = os.path.join(log_dir, log_file_name)
-
-        # Create a logger for this scraper
-        logger = logging.getLogger(f"{site_name}_{'_'.join(key_words)}")
-        logger.setLevel(logging.INFO)
-
-        # Create a file handler that logs to a specific file
-        file_handler = logging.FileHandler(log_file_path)
-        file_handler.setLevel(logging.INFO)
-
-        # Create a stream handler to output logs to the console
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.INFO)
+        Initiates the web scraping process for each keyword.
+        """
+        self.logger.info("Starting the scraping process.")
+        if self.batch_search and len(self.key_words) > 1:
+            self.start_batched()
+        else:
+            for keyword in self.key_words:
+                self.logger.info(f"Processing keyword: {keyword}")
+                self.create_folder_structure(keyword)
+                self.retry_dead_letters(keyword)
+                pdf_urls, non_pdf_urls = self.get_urls(keyword, self.limited_page)
+                if self.checkpoint is not None:
+                    self.checkpoint.search_done()
+                pdf_data = self.download_pdf_files(pdf_urls, keyword)
+                self.save_pdf_data(keyword, pdf_data)
+                self.process_non_pdf_urls(non_pdf_urls, keyword)
+        if self.quit_driver:
+            self.driver.quit()
+        if self.owns_writer:
+            self.writer.close()
+        self.logger.info("Scraping process completed.")
 
-        # Create a logging format
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        stream_handler.setFormatter(formatter)
+    def start_batched(self):
+        """
+        Searches every keyword at once with an OR query, then writes each hit into the folder
+        of every keyword it matches locally (title and description for PDFs, the page text
+        for other documents). Hits matching none go to the _unclassified folder.
+        """
+        query = or_query(self.key_words)
+        self.logger.info(f"Processing keywords {', '.join(self.key_words)} with one search: {query}")
+        for keyword in self.key_words + [UNCLASSIFIED_KEYWORD]:
+            self.create_folder_structure(keyword)
+        for keyword in self.key_words:
+            self.retry_dead_letters(keyword)
+        # Failed hits of earlier batched runs are not classified yet, they go through the batch again
+        retry_pdf_urls, retry_non_pdf_urls = self.dead_letters.take(UNCLASSIFIED_KEYWORD)
+        pdf_urls, non_pdf_urls = self.get_urls(query, self.limited_page)
+        if self.checkpoint is not None:
+            self.checkpoint.search_done()
+        self.process_batched_pdf_urls(retry_pdf_urls + pdf_urls)
+        self.process_batched_non_pdf_urls(retry_non_pdf_urls + non_pdf_urls)
 
-        # Add the handlers to the logger
-        if not logger.handlers:
-            logger.addHandler(file_handler)
-            logger.addHandler(stream_handler)
+    def process_batched_pdf_urls(self, urls: List[Tuple[str, str, str, str]]):
+        """
+        Downloads each PDF of a batched search once and saves it for every matching keyword.
 
-        return logger
+        Args:
+            urls (List[Tuple[str, str, str, str]]): List of URLs to download.
+        """
+        self.logger.info(f"Downloading PDF files of the batched search.")
+        for url, date, name, description in urls:
+            keywords = classify(f"{name} {description}", self.key_words) or [UNCLASSIFIED_KEYWORD]
+            try:
+                content = self.fetch_pdf(url)
+            except Exception as e:
+                self.log_error(e, url)
+                self.dead_letters.add(UNCLASSIFIED_KEYWORD, 'pdf', url, date, name, description, e)
+                continue
+            self.logger.info(f"Downloaded: {name} for {', '.join(keywords)}", extra={'document': name, 'url': url})
+            for keyword in keywords:
+                self.save_pdf_data(keyword, [{'url': url, 'date': date, 'file_name': name,
+                                              'content': content}])
+                self.save_metadata(keyword, {
+                    "name": name,
+                    "notified_date": date,
+                    "notified_country": None,
+                    "URL": url,
+                    "keyword": keyword
+                }, content=content, outputs=[self.pdf_file_name(keyword, date, name)])
 
-    def start(self):
+    def process_batched_non_pdf_urls(self, urls: List[Tuple[str, str, str, str]]):
         """
-        Initiates the web scraping process for each keyword.
+        Fetches each page of a batched search once and saves its summary and tables for
+        every matching keyword.
+
+        Args:
+            urls (List[Tuple[str, str, str, str]]): List of URLs to process.
         """
-        self.logger.info("Starting the scraping process.")
-        for keyword in self.key_words:
-            self.logger.info(f"Processing keyword: {keyword}")
-            self.create_folder_structure(keyword)
-            pdf_urls, non_pdf_urls = self.get_urls(keyword, self.limited_page)
-            pdf_data = self.download_pdf_files(pdf_urls)
-            self.save_pdf_data(keyword, pdf_data)
-            self.process_non_pdf_urls(non_pdf_urls, keyword)
-        self.driver.quit()
-        self.logger.info("Scraping process completed.")
+        self.logger.info(f"Processing non-PDF URLs of the batched search.")
+        for url, date, name, description in urls:
+            try:
+                response = self.session.get(url)
+                response.raise_for_status()
+            except Exception as e:
+                self.log_error(e, url)
+                self.dead_letters.add(UNCLASSIFIED_KEYWORD, 'page', url, date, name, description, e)
+                continue
+            keywords = classify(f"{name} {description} {html_text(response.content)}", self.key_words)
+            for keyword in keywords or [UNCLASSIFIED_KEYWORD]:
+                summary_file_name = self.save_summary(keyword, url, date, name, description)
+                table_files = self.extract_and_save_tables(response.content, keyword, name, date)
+                self.save_metadata(keyword, {
+                    "name": name,
+                    "notified_date": date,
+                    "notified_country": None,
+                    "URL": url,
+                    "keyword": keyword
+                }, content=response.content, outputs=[summary_file_name] + table_files)
+            self.logger.info(f"Extracted summary and checked for tables from: {url} for {', '.join(keywords)}")
 
     def search_for_keyword(self, keyword: str):
         """
@@ -95,13 +205,12 @@ class EurWebScraper:
             keyword (str): The keyword to search for.
         """
         self.logger.info(f"Searching for keyword: {keyword}")
-        search_box = WebDriverWait(self.driver, 20).until(
+        search_box = WebDriverWait(self.driver, self.wait_timeout).until(
             EC.presence_of_element_located((By.ID, "QuickSearchField"))
         )
         search_box.clear()
         search_box.send_keys(keyword)
         search_box.send_keys(Keys.RETURN)
-        time.sleep(10)
 
     def sort_by_last_modified(self):
         """
@@ -109,17 +218,17 @@ class EurWebScraper:
         """
         self.logger.info("Sorting results by last modified date.")
         try:
-            sort_by_select = WebDriverWait(self.driver, 20).until(
+            sort_by_select = WebDriverWait(self.driver, self.wait_timeout).until(
                 EC.presence_of_element_located(
                     (By.XPATH, "//select[contains(@id, 'sortOne_top')]")
                 )
             )
             sort_by_select.click()
-            last_modified_option = WebDriverWait(self.driver, 20).until(
+            last_modified_option = WebDriverWait(self.driver, self.wait_timeout).until(
                 EC.presence_of_element_located((By.XPATH, "//option[@value='DD']"))
             )
             last_modified_option.click()
-            time.sleep(5)
+            self.pause(5)
         except Exception as e:
             error_message = "No results found for this keyword."
             self.logger.error(f"{error_message} Error: {str(e).splitlines()[0]}")
@@ -140,32 +249,121 @@ class EurWebScraper:
         pdf_urls = []
         non_pdf_urls = []
 
-        self.driver.get(self.base_url)
-        time.sleep(5)
+        if self.replaying:
+            return self.replay_urls(keyword)
+
+        started = time.monotonic()
+        with self.scheduler.slot(self.base_url):
+            self.driver.get(self.base_url)
 
         try:
             self.search_for_keyword(keyword)
+            plan = self.plan_search(keyword, limited_page, started)
+            if plan.empty:
+                self.logger.info(f"No results for keyword: {keyword}")
+                return pdf_urls, non_pdf_urls
+            # The plan knows the last page, no need to look for a 'Next' button there
+            limited_page = plan.pages or limited_page
             self.sort_by_last_modified()
             self.current_page = 1
             while True:
-                self.logger.info(f"Processing page {self.current_page}")
-                search_results = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH, "//div[@id='EurlexContent']//div[@class='SearchResult']")
-                    )
-                )
+                # Pages before first_page belong to another shard, they are only paged through
+                if self.current_page >= self.first_page:
+                    self.logger.info(f"Processing page {self.current_page}")
+                    search_results = self.wait_for_search_results()
+                    self.record_page(keyword, results_page_key(self.current_page))
 
-                pdf_urls.extend(self.extract_links(search_results, 'pdf'))
-                non_pdf_urls.extend(self.extract_links(search_results, 'html'))
+                    pdf_urls.extend(self.extract_links(search_results, 'pdf'))
+                    non_pdf_urls.extend(self.extract_links(search_results, 'html'))
+                    if self.checkpoint is not None:
+                        self.checkpoint.page_done(self.current_page)
 
                 if not self.click_next_button(limited_page):
                     break
 
         except Exception as e:
-            self.log_error(e, self.driver.current_url)
+            self.log_error(e, self.current_url())
+
+        return pdf_urls, non_pdf_urls
+
+    def plan_search(self, keyword: str, limited_page: int, started: float) -> SearchPlan:
+        """
+        Reads the hit count of the search just submitted and logs what it will take.
+
+        Args:
+            keyword (str): The keyword searched.
+            limited_page (int): The page cap of the run, 0 for none.
+            started (float): time.monotonic() when the search started.
+
+        Returns:
+            SearchPlan: Hits and pages of the search; hits is None when the page shows no count.
+        """
+        hits = wait_for_hits(self.driver, HITS_LOCATOR, timeout=self.wait_timeout)
+        page_size = len(self.driver.find_elements(By.XPATH, SEARCH_RESULTS_XPATH)) if hits else 0
+        plan = SearchPlan(self.site_name, keyword, hits, page_size, limited_page, time.monotonic() - started)
+        self.logger.info(f"Search plan for {keyword}: {plan.hits} hits, {plan.pages} pages")
+        if self.search_plans is not None:
+            self.search_plans.add(plan)
+        return plan
+
+    def wait_for_search_results(self):
+        """
+        Waits for the search results of the current page to be present.
+
+        Returns:
+            List[WebElement]: The search result elements of the current page.
+        """
+        return WebDriverWait(self.driver, self.wait_timeout).until(
+            EC.presence_of_all_elements_located((By.XPATH, SEARCH_RESULTS_XPATH))
+        )
 
+    def replay_urls(self, keyword: str) -> Tuple[
+        List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
+        """
+        Extracts PDF and non-PDF URLs from the recorded result pages instead of the live site.
+
+        Args:
+            keyword (str): The keyword the result pages were recorded for.
+
+        Returns:
+            Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
+            Lists containing PDF URLs and non-PDF URLs with their metadata.
+        """
+        pdf_urls = []
+        non_pdf_urls = []
+        for key in self.fixtures.page_keys(self.site_name, keyword, 'results-'):
+            if not key_in_page_range(key, self.first_page, self.limited_page):
+                continue
+            self.logger.info(f"Replaying page {key}")
+            try:
+                self.driver.get(self.fixtures.page_url(self.site_name, keyword, key))
+                search_results = self.wait_for_search_results()
+                pdf_urls.extend(self.extract_links(search_results, 'pdf'))
+                non_pdf_urls.extend(self.extract_links(search_results, 'html'))
+            except Exception as e:
+                self.log_error(e, key)
         return pdf_urls, non_pdf_urls
 
+    @property
+    def replaying(self) -> bool:
+        return self.fixtures is not None and self.fixtures.replaying
+
+    def record_page(self, keyword: str, key: str):
+        """
+        Hands the page currently loaded in the driver to the fixture recorder and the page
+        weight log, if any.
+
+        Args:
+            keyword (str): The keyword the page belongs to.
+            key (str): The fixture key of the page.
+        """
+        if self.fixtures is not None:
+            self.fixtures.record_page(self.site_name, keyword, key, self.driver)
+        if self.page_weights is not None:
+            self.page_weights.record(self.site_name, keyword, key, self.driver)
+        if self.checkpoint is not None:
+            self.checkpoint.heartbeat()
+
     def extract_links(self, search_results, link_type: str) -> List[Tuple[str, str, str, str]]:
         """
         Extracts links of a specified type (PDF or HTML) from the search results.
@@ -240,18 +438,51 @@ class EurWebScraper:
                 if 'disabled' not in next_button.get_attribute('class') and next_button.get_attribute(
                         'href') != "javascript:;":
                     next_button.click()
-                    time.sleep(5)
+                    self.pause(5)
                     return True
         except Exception as e:
             self.logger.error(f"Error clicking next button: {e}")
         return False
 
-    def download_pdf_files(self, urls: List[Tuple[str, str, str, str]]) -> List[dict]:
+    def retry_dead_letters(self, keyword: str):
+        """
+        Fetches the keyword's documents that failed in earlier runs, before the new ones.
+        Args:
+            keyword (str): Keyword whose failed documents are retried.
+        """
+        pdf_urls, non_pdf_urls = self.dead_letters.take(keyword)
+        if not pdf_urls and not non_pdf_urls:
+            return
+        self.logger.info(f"Retrying {len(pdf_urls) + len(non_pdf_urls)} failed documents for keyword: {keyword}")
+        pdf_data = self.download_pdf_files(pdf_urls, keyword)
+        self.save_pdf_data(keyword, pdf_data)
+        self.process_non_pdf_urls(non_pdf_urls, keyword)
+
+    def fetch_pdf(self, url: str) -> bytes:
+        """
+        Fetches a PDF. Live runs go through a part file that resumes broken downloads, see
+        src/utils/rangeDownload.py; recorded and replayed runs fetch it whole, as fixtures
+        hold whole responses.
+
+        Args:
+            url (str): URL of the PDF.
+
+        Returns:
+            bytes: Content of the PDF.
+        """
+        if self.fixtures is not None:
+            response = self.session.get(url)
+            response.raise_for_status()
+            return response.content
+        return download(self.session, url, os.path.join(PARTIAL_DIR, self.site_name))
+
+    def download_pdf_files(self, urls: List[Tuple[str, str, str, str]], keyword: str) -> List[dict]:
         """
         Downloads PDF files from the provided URLs.
 
         Args:
             urls (List[Tuple[str, str, str, str]]): List of URLs to download.
+            keyword (str): The keyword used to organize the saved files.
 
         Returns:
             List[dict]: List of dictionaries containing downloaded PDF data.
@@ -260,16 +491,24 @@ class EurWebScraper:
         data = []
         for url, date, name, description in urls:
             try:
-                pdf_response = requests.get(url)
+                content = self.fetch_pdf(url)
                 data.append({
                     'url': url,
                     'date': date,
                     'file_name': name,
-                    'content': pdf_response.content
+                    'content': content
                 })
-                self.logger.info(f"Downloaded: {name}")
+                self.logger.info(f"Downloaded: {name}", extra={'document': name, 'url': url})
+                self.save_metadata(keyword, {
+                    "name": name,
+                    "notified_date": date,
+                    "notified_country": None,
+                    "URL": url,
+                    "keyword": keyword
+                }, content=content, outputs=[self.pdf_file_name(keyword, date, name)])
             except Exception as e:
                 self.log_error(e, url)
+                self.dead_letters.add(keyword, 'pdf', url, date, name, description, e)
         return data
 
 
@@ -284,11 +523,11 @@ class EurWebScraper:
         self.logger.info(f"Processing non-PDF URLs for keyword: {keyword}")
         for url, date, name, description in urls:
             try:
-                response = requests.get(url)
-                soup = BeautifulSoup(response.content, 'html.parser')
+                response = self.session.get(url)
+                response.raise_for_status()
 
-                self.save_summary(keyword, url, date, name, description)
-                self.extract_and_save_tables(soup, keyword, name, date)
+                summary_file_name = self.save_summary(keyword, url, date, name, description)
+                table_files = self.extract_and_save_tables(response.content, keyword, name, date)
                 self.logger.info(f"Extracted summary and checked for tables from: {url}")
                 self.save_metadata(keyword, {
                     "name": name,
@@ -296,28 +535,25 @@ class EurWebScraper:
                     "notified_country": None,
                     "URL": url,
                     "keyword": keyword
-                })
+                }, content=response.content, outputs=[summary_file_name] + table_files)
             except Exception as e:
                 self.log_error(e, url)
+                self.dead_letters.add(keyword, 'page', url, date, name, description, e)
 
-    def save_metadata(self, keyword: str, metadata: dict):
+    def save_metadata(self, keyword: str, metadata: dict, content: bytes = None, outputs: List[str] = None):
         """
-        Saves the metadata of the page content to a JSON file.
+        Records the metadata of the page content in the site's metadata catalog.
 
         Args:
             keyword (str): The keyword used to organize the saved files.
             metadata (dict): The metadata to be saved.
+            content (bytes, optional): Downloaded content, hashed for change detection.
+            outputs (List[str], optional): Paths of the files written for the document.
         """
         self.logger.info(f"Saving metadata for: {metadata['name']}")
-        metadata_folder = os.path.join('data/raw/eur_lex', keyword.replace(':', '').replace(' ', '_'), 'metadata')
-        os.makedirs(metadata_folder, exist_ok=True)
-
-        metadata_file_name = os.path.join(metadata_folder,
-                                          f"metadata_{metadata['name']}.json")
-
-        with open(metadata_file_name, 'w', encoding='utf-8') as metadata_file:
-            json.dump(metadata, metadata_file, ensure_ascii=False, indent=4)
-        self.logger.info(f"Metadata saved to {metadata_file_name}")
+        self.catalog.append(stem=metadata['name'], name=metadata['name'], date=metadata['notified_date'],
+                            url=metadata['URL'], keyword=keyword, content=content, outputs=outputs,
+                            notified_country=metadata['notified_country'])
 
     def save_summary(self, keyword: str, url: str, date: str, name: str, description: str):
         """
@@ -332,17 +568,17 @@ class EurWebScraper:
         """
         self.logger.info(f"Saving summary for: {name}")
         keyword_folder = os.path.join('data/raw/eur_lex', keyword.replace(':', '').replace(' ', '_'), 'text')
-        os.makedirs(keyword_folder, exist_ok=True)
-
         # Dosya ismini oluştururken tarih iki defa yazılmamasını sağla
         summary_file_name = os.path.join(keyword_folder, f"{name}.txt")
 
-        with open(summary_file_name, 'w', encoding='utf-8') as summary_file:
-            summary_file.write(f"Title: {name}\n")
-            summary_file.write(f"Distribution date: {date}\n")
-            summary_file.write(f"Keywords: {keyword}\n")
-            summary_file.write(f"Summary: {description}\n")
+        self.writer.write_text(summary_file_name, (
+            f"Title: {name}\n"
+            f"Distribution date: {date}\n"
+            f"Keywords: {keyword}\n"
+            f"Summary: {description}\n"
+        ))
         self.logger.info(f"Summary saved to {summary_file_name}")
+        return summary_file_name
 
     def save_pdf_data(self, keyword: str, data: List[dict]):
         """
@@ -353,54 +589,50 @@ class EurWebScraper:
             data (List[dict]): The data to be saved.
         """
         self.logger.info(f"Saving PDF data for keyword: {keyword}")
-        keyword_folder = os.path.join('data/raw/eur_lex', keyword.replace(':', '').replace(' ', '_'), 'pdf')
-        os.makedirs(keyword_folder, exist_ok=True)
-
         for item in data:
-            # Dosya ismini oluştururken tarih iki defa yazılmamasını sağla
-            pdf_name = os.path.join(keyword_folder, f"{item['file_name']}.pdf")
-            with open(pdf_name, 'wb') as pdf_file:
-                pdf_file.write(item['content'])
+            pdf_name = self.pdf_file_name(keyword, item['date'], item['file_name'])
+            self.writer.write_bytes(pdf_name, item['content'])
             self.logger.info(f"PDF saved to {pdf_name}")
 
-    def extract_and_save_tables(self, soup: BeautifulSoup, keyword: str, name: str, date: str):
+    def pdf_file_name(self, keyword: str, date: str, name: str) -> str:
+        """
+        Builds the path a downloaded PDF is saved to.
+
+        Args:
+            keyword (str): The keyword used to organize the saved files.
+            date (str): The date associated with the content.
+            name (str): The name of the file.
+
+        Returns:
+            str: Path of the PDF file.
         """
-        Extracts tables from the HTML content and saves them in a JSON file.
+        keyword_folder = os.path.join('data/raw/eur_lex', keyword.replace(':', '').replace(' ', '_'), 'pdf')
+        # Dosya ismini oluştururken tarih iki defa yazılmamasını sağla
+        return os.path.join(keyword_folder, f"{name}.pdf")
+
+    def extract_and_save_tables(self, page_content: bytes, keyword: str, name: str, date: str):
+        """
+        Extracts tables from the HTML content and saves them in the configured formats.
 
         Args:
-            soup (BeautifulSoup): The BeautifulSoup object containing the HTML content.
+            page_content (bytes): The raw HTML content of the page.
             keyword (str): The keyword used to organize the saved files.
             name (str): The name of the file.
             date (str): The date associated with the content.
+
+        Returns:
+            List[str]: Written table files/folders, empty when the page has no tables.
         """
         self.logger.info(f"Extracting tables from page: {name}")
-        tables_data = []
-
-        tables = soup.find_all('table')
-        for i, table in enumerate(tables):
-            headers = [th.get_text().strip() for th in table.find_all('th')]
-            rows = [
-                [cell.get_text().strip() for cell in row.find_all('td')]
-                for row in table.find_all('tr') if row.find_all('td')
-            ]
-
-            if rows and headers:
-                table_data = {
-                    'headers': headers,
-                    'rows': rows
-                }
-                tables_data.append(table_data)
+        tables_data = extract_tables(page_content)
 
         if tables_data:
-            keyword_folder = os.path.join('data/raw/eur_lex', keyword.replace(':', '').replace(' ', '_'), 'json')
-            os.makedirs(keyword_folder, exist_ok=True)
-
-            # Dosya ismini oluştururken tarih iki defa yazılmamasını sağla
-            table_file_name = os.path.join(keyword_folder, f"{name}.json")
-
-            with open(table_file_name, 'w', encoding='utf-8') as table_file:
-                json.dump(tables_data, table_file, ensure_ascii=False, indent=4)
-            self.logger.info(f"Saved tables to {table_file_name}")
+            keyword_folder = os.path.join('data/raw/eur_lex', keyword.replace(':', '').replace(' ', '_'))
+            table_files = document_table_paths(keyword_folder, name, self.table_formats)
+            self.writer.submit(save_document_tables, tables_data, keyword_folder, name, self.table_formats)
+            self.logger.info(f"Saved tables to {', '.join(table_files)}")
+            return table_files
+        return []
 
     def create_folder_structure(self, keyword: str):
         """
@@ -414,9 +646,15 @@ class EurWebScraper:
         os.makedirs(keyword_folder, exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'pdf'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'text'), exist_ok=True)
-        os.makedirs(os.path.join(keyword_folder, 'metadata'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'json'), exist_ok=True)
 
+    def current_url(self, driver=None) -> str:
+        # The browser may be gone, e.g. killed by the watchdog
+        try:
+            return (driver or self.driver).current_url
+        except Exception:
+            return self.base_url
+
     def log_error(self, error: Exception, url: str):
         """
         Logs an error encountered during the scraping process.
@@ -0,0 +1,42 @@
+import importlib
+
+from .echaWebScraping import EchaWebScraper
+from .eur_lexWebScraping import EurWebScraper
+from .resmigazeteWebScraper1 import ResmiWebScraper
+
+# scripts.txt names -> bot classes
+SCRAPERS = {
+    'echaWebScraping.py': EchaWebScraper,
+    'eur_lexWebScraping.py': EurWebScraper,
+    'resmiWebScraping.py': ResmiWebScraper,
+}
+
+
+def register(name: str, scraper_class):
+    """
+    Makes a bot class available under a scripts.txt name.
+    """
+    SCRAPERS[name] = scraper_class
+
+
+def scraper_class(name: str):
+    """
+    The bot class registered under `name`, or the class at a 'package.module:Class' path, so
+    that a new site only needs a Bot line in scripts.txt.
+
+    Returns:
+        type | None: None for unknown names.
+    """
+    if ':' in name:
+        module_name, class_name = name.split(':', 1)
+        try:
+            return getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as e:
+            print(f'Cannot load bot {name}: {e}')
+            return None
+    return SCRAPERS.get(name)
+
+
+def discovery_backends(scraper) -> tuple:
+    # The first backend of a bot is its default; bots that do not say page through searches
+    return getattr(scraper, 'DISCOVERY_BACKENDS', ('pages',))
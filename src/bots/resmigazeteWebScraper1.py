@@ -8,70 +8,86 @@ from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 import time
 from typing import List, Tuple
-from bs4 import BeautifulSoup
-import json
-import logging
+
+from src.utils.fetchPolicy import DeadLetterQueue, FetchPolicy, install_policy
+from src.utils.hostScheduler import HostScheduler, install_scheduler
+from src.utils.metadataCatalog import MetadataCatalog
+from src.utils.outputWriter import OutputWriter
+from src.utils.rangeDownload import PARTIAL_DIR, download
+from src.utils.recordReplay import detail_page_key, key_in_page_range, results_page_key
+from src.utils.searchPlan import SearchPlan, wait_for_hits
+from src.utils.structuredLogging import bot_logger
+from src.utils.tableExtractor import extract_tables, document_table_paths, save_document_tables
+
+# The result table's info line ('Toplam 57 kayıttan ...') or its empty row
+HITS_LOCATOR = (By.ID, 'filterTable_wrapper')
+RESULT_LINKS_XPATH = "//table[@id='filterTable']//a[@href]"
 
 
 class ResmiWebScraper:
-    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver):
+    DISCOVERY_BACKENDS = ('pages',)
+
+    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver, fixtures=None,
+                 table_formats=('json',), writer=None, scheduler=None,
+                 policy=None, first_page: int = 1, session=None, quit_driver: bool = True,
+                 page_weights=None, search_plans=None, wait_timeout: float = 20.0, delay_scale: float = 1.0, checkpoint=None):
         """
         WebScraper initializes with keywords and base URL.
         Args:
             key_words (List[str]): List of keywords to search.
             base_url (str): Base URL for the web scraping.
             site_name (str): Name of the site for organizing logs.
+            fixtures (Recorder | Replayer, optional): Record/replay hook, None for live scraping.
+            table_formats (tuple): Output formats for extracted tables, any of 'json', 'parquet', 'feather'.
+            writer (OutputWriter, optional): Shared background writer; by default the scraper runs its own.
+            scheduler (HostScheduler, optional): Shared per-host politeness scheduler for every fetch.
+            policy (FetchPolicy, optional): Shared timeouts, retries and circuit breakers for every fetch.
+            first_page (int): First result page to scrape; earlier pages are only paged through.
+            session (requests.Session, optional): Shared HTTP session, unused when fixtures bring their own.
+            quit_driver (bool): Whether start() quits the driver; False keeps a warm browser open.
+            page_weights (PageWeightLog, optional): Log of the bytes each results page transferred.
+            search_plans (SearchPlanLog, optional): Log of the hit count and pages of each search.
+            wait_timeout (float): Seconds to wait for an element of a page.
+            delay_scale (float): Factor on the fixed pauses between page actions.
+            checkpoint (TaskWatch, optional): Watchdog checkpoint told about every results page
+                collected, see src/utils/watchdog.py.
         """
         self.base_url = base_url
         self.key_words = key_words
         self.driver = driver
-        self.driver.get(self.base_url)
+        self.fixtures = fixtures
+        self.table_formats = table_formats
+        # Outputs are written off the scraping thread; a writer created here is closed by start()
+        self.owns_writer = writer is None
+        self.writer = writer if writer is not None else OutputWriter()
+        if fixtures is not None:
+            self.session = fixtures.session
+        else:
+            self.session = session if session is not None else requests.Session()
+        self.quit_driver = quit_driver
+        self.page_weights = page_weights
+        self.search_plans = search_plans
+        self.wait_timeout = wait_timeout
+        self.delay_scale = delay_scale
+        self.checkpoint = checkpoint
+        self.scheduler = scheduler if scheduler is not None else HostScheduler()
+        install_scheduler(self.session, self.scheduler)
+        self.policy = policy if policy is not None else FetchPolicy()
+        install_policy(self.session, self.policy)
+        if not self.replaying:
+            with self.scheduler.slot(self.base_url):
+                self.driver.get(self.base_url)
         self.limited_pages = limited_page
+        self.first_page = first_page
         self.site_name = "resmigazete"
+        self.catalog = MetadataCatalog(self.site_name, writer=self.writer)
+        self.dead_letters = DeadLetterQueue(self.site_name)
 
-        self.logger = self.setup_logger(self.site_name, key_words)
-
-    def setup_logger(self, site_name: str, key_words: List[str]) -> logging.Logger:
-        """
-        Sets up a logger for the scraper, creating directories for each site and keyword set.
-        Args:
-            site_name (str): The name of the site (e.g., 'ECHA', 'Eurlex').
-            key_words (List[str]): The list of keywords for the current scraper.
-
-        Returns:
-            logging.Logger: Configured logger instance.
-        """
-        # Define the log directory structure
-        log_dir = os.path.join("logs", site_name)
-        os.makedirs(log_dir, exist_ok=True)
-
-        # Create a log file name based on the keywords
-        log_file_name = f"{'_'.join(key_words)}.log"
-        log_file_path = os.path.join(log_dir, log_file_name)
-
-        # Create a logger for this scraper
-        logger = logging.getLogger(f"{site_name}_{'_'.join(key_words)}")
-        logger.setLevel(logging.INFO)
+        self.logger = bot_logger(self.site_name, key_words)
 
-        # Create a file handler that logs to a specific file
-        file_handler = logging.FileHandler(log_file_path)
-        file_handler.setLevel(logging.INFO)
-
-        # Create a stream handler to output logs to the console
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.INFO)
-
-        # Create a logging format
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        stream_handler.setFormatter(formatter)
-
-        # Add the handlers to the logger
-        if not logger.handlers:
-            logger.addHandler(file_handler)
-            logger.addHandler(stream_handler)
-
-        return logger
+    def pause(self, seconds: float):
+        # Fixed waits for the page to settle, scaled per site from scripts.txt
+        time.sleep(seconds * self.delay_scale)
 
     def start(self):
         """
@@ -81,31 +97,36 @@ class ResmiWebScraper:
         for keyword in self.key_words:
             self.logger.info(f"Processing keyword: {keyword}")
             self.create_folder_structure(keyword)
+            self.retry_dead_letters(keyword)
             pdf_urls, non_pdf_urls = self.get_urls(keyword, self.limited_pages)
+            if self.checkpoint is not None:
+                self.checkpoint.search_done()
             pdf_data = self.download_pdf_files(pdf_urls, keyword)
             self.save_pdf_data(keyword, pdf_data)
             self.process_non_pdf_urls(non_pdf_urls, keyword)
-        self.driver.quit()
+        if self.quit_driver:
+            self.driver.quit()
+        if self.owns_writer:
+            self.writer.close()
         self.logger.info("Scraping process completed.")
 
     def search_for_keywords(self, keyword: str):
         self.logger.info(f"Searching for keyword: {keyword}")
-        search_button = WebDriverWait(self.driver, 20).until(
+        search_button = WebDriverWait(self.driver, self.wait_timeout).until(
             EC.presence_of_element_located((By.CSS_SELECTOR,
                                             "body > div.container-fluid.mb-3 > div > div > div > div > div.col-12.col-md-8 > div > button"))
         )
         search_button.click()
-        time.sleep(5)
+        self.pause(5)
 
-        search_bar = WebDriverWait(self.driver, 20).until(
+        search_bar = WebDriverWait(self.driver, self.wait_timeout).until(
             EC.element_to_be_clickable((By.ID, "genelaranacakkelime"))
         )
         search_bar.click()
         search_bar.clear()
         search_bar.send_keys(keyword)
-        time.sleep(3)
+        self.pause(3)
         search_bar.send_keys(Keys.RETURN)
-        time.sleep(10)
 
     def get_urls(self, keyword: str, limited_pages: int) -> Tuple[
         List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
@@ -113,61 +134,44 @@ class ResmiWebScraper:
         pdf_urls = []
         non_pdf_urls = []
 
-        self.search_for_keywords(keyword)
+        if self.replaying:
+            return self.replay_urls(keyword)
+
+        started = time.monotonic()
+        try:
+            self.search_for_keywords(keyword)
+            plan = self.plan_search(keyword, limited_pages, started)
+        except Exception as e:
+            self.logger.error(f"Search for {keyword} failed: {e}")
+            return pdf_urls, non_pdf_urls
+        if plan.empty:
+            self.logger.info(f"No results for keyword: {keyword}")
+            return pdf_urls, non_pdf_urls
+        # The plan knows the last page, no need to look for a 'Next' button there
+        limited_pages = plan.pages or limited_pages
         current_page = 1
         while True:
-            self.logger.info(f"Processing page {current_page}")
+            # Pages before first_page belong to another shard, they are only paged through
             try:
-                result_links = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_all_elements_located((By.XPATH, "//table[@id='filterTable']//a[@href]"))
-                )
-
-                dates = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH,
-                         "//table[@id='filterTable']//a[@href]/../../following-sibling::td"))
-                )
-                dates = [td.text for td in dates if len(td.text.strip()) == 10]
-
-                for result, date in zip(result_links, dates):
-                    result.click()
-                    time.sleep(3)
-
-                    self.driver.switch_to.window(self.driver.window_handles[-1])
-                    links = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_all_elements_located((By.XPATH, "//a[@href]")))
-
-                    for link in links:
-                        link_url = link.get_attribute("href")
-                        description_text = link.text.strip()
-
-                        if re.search(r'\b' + re.escape(keyword) + r'\b', description_text):
-                            name_text = link.text.strip()[:20]
-                            date_text = self.format_date(date)
-                            day, month, year = date_text.split('-')
-                            date_text = f"{year}-{month}-{day}"
-
-                            description_text = link.text.strip()
-
-                            # Create a unique file name
-                            unique_name = f"{date_text}-{name_text}"
-                            unique_name = unique_name.replace('/', '_').replace(':', '').replace(' ', '_')
-
-                            # Ensure the name is unique
-                            counter = 1
-                            base_name = unique_name
-                            while any(unique_name in item for item in matching_links):
-                                unique_name = f"{base_name}-{counter}"
-                                counter += 1
-
-                            if link_url.endswith('.pdf'):
-                                pdf_urls.append((link_url, date_text, unique_name, description_text))
-                            else:
-                                non_pdf_urls.append((link_url, date_text, unique_name, description_text))
-
-                    self.driver.close()
-                    self.driver.switch_to.window(self.driver.window_handles[0])
-                    time.sleep(3)
+                if current_page >= self.first_page:
+                    self.logger.info(f"Processing page {current_page}")
+                    result_links, dates = self.wait_for_results()
+                    self.record_page(keyword, results_page_key(current_page))
+
+                    for index, (result, date) in enumerate(zip(result_links, dates)):
+                        result.click()
+                        self.pause(3)
+
+                        self.driver.switch_to.window(self.driver.window_handles[-1])
+                        self.extract_detail_links(keyword, date, pdf_urls, non_pdf_urls, matching_links)
+                        self.record_page(keyword, detail_page_key(current_page, index))
+
+                        self.driver.close()
+                        self.driver.switch_to.window(self.driver.window_handles[0])
+                        self.pause(3)
+
+                    if self.checkpoint is not None:
+                        self.checkpoint.page_done(current_page)
 
             except Exception as e:
                 self.logger.error(f"An error occurred: {e}. Continuing with the next iteration.")
@@ -182,7 +186,7 @@ class ResmiWebScraper:
                     if next_button and 'paginate_button page-item next disabled' not in next_button[0].get_attribute(
                             'class') and next_button[0].get_attribute('href') != "javascript:;":
                         next_button[0].click()
-                        time.sleep(5)
+                        self.pause(5)
                     else:
                         break
                 else:
@@ -193,6 +197,132 @@ class ResmiWebScraper:
 
         return pdf_urls, non_pdf_urls
 
+    def plan_search(self, keyword: str, limited_pages: int, started: float) -> SearchPlan:
+        """
+        Reads the hit count of the search just submitted and logs what it will take.
+        Args:
+            keyword (str): Keyword searched.
+            limited_pages (int): Page cap of the run, 0 for none.
+            started (float): time.monotonic() when the search started.
+
+        Returns:
+            SearchPlan: Hits and pages of the search; hits is None when the page shows no count.
+        """
+        hits = wait_for_hits(self.driver, HITS_LOCATOR, timeout=self.wait_timeout)
+        page_size = len(self.driver.find_elements(By.XPATH, RESULT_LINKS_XPATH)) if hits else 0
+        plan = SearchPlan(self.site_name, keyword, hits, page_size, limited_pages, time.monotonic() - started)
+        self.logger.info(f"Search plan for {keyword}: {plan.hits} hits, {plan.pages} pages")
+        if self.search_plans is not None:
+            self.search_plans.add(plan)
+        return plan
+
+    def wait_for_results(self) -> Tuple[list, List[str]]:
+        """
+        Waits for the result table of the current page and reads its links and dates.
+        Returns:
+            Tuple[list, List[str]]: Result link elements and their publication dates.
+        """
+        result_links = WebDriverWait(self.driver, self.wait_timeout / 2).until(
+            EC.presence_of_all_elements_located((By.XPATH, RESULT_LINKS_XPATH))
+        )
+
+        dates = WebDriverWait(self.driver, self.wait_timeout).until(
+            EC.presence_of_all_elements_located(
+                (By.XPATH,
+                 "//table[@id='filterTable']//a[@href]/../../following-sibling::td"))
+        )
+        dates = [td.text for td in dates if len(td.text.strip()) == 10]
+        return result_links, dates
+
+    def extract_detail_links(self, keyword: str, date: str, pdf_urls: List[Tuple[str, str, str, str]],
+                             non_pdf_urls: List[Tuple[str, str, str, str]], matching_links: list):
+        """
+        Extracts the links matching the keyword from the gazette page currently loaded in the driver.
+        Args:
+            keyword (str): Keyword the links must mention.
+            date (str): Publication date of the gazette page.
+            pdf_urls (List[Tuple[str, str, str, str]]): List the PDF URLs are appended to.
+            non_pdf_urls (List[Tuple[str, str, str, str]]): List the non-PDF URLs are appended to.
+            matching_links (list): Names already in use on this run.
+        """
+        links = WebDriverWait(self.driver, self.wait_timeout / 2).until(
+            EC.presence_of_all_elements_located((By.XPATH, "//a[@href]")))
+
+        for link in links:
+            link_url = link.get_attribute("href")
+            description_text = link.text.strip()
+
+            if re.search(r'\b' + re.escape(keyword) + r'\b', description_text):
+                name_text = link.text.strip()[:20]
+                date_text = self.format_date(date)
+                day, month, year = date_text.split('-')
+                date_text = f"{year}-{month}-{day}"
+
+                description_text = link.text.strip()
+
+                # Create a unique file name
+                unique_name = f"{date_text}-{name_text}"
+                unique_name = unique_name.replace('/', '_').replace(':', '').replace(' ', '_')
+
+                # Ensure the name is unique
+                counter = 1
+                base_name = unique_name
+                while any(unique_name in item for item in matching_links):
+                    unique_name = f"{base_name}-{counter}"
+                    counter += 1
+
+                if link_url.endswith('.pdf'):
+                    pdf_urls.append((link_url, date_text, unique_name, description_text))
+                else:
+                    non_pdf_urls.append((link_url, date_text, unique_name, description_text))
+
+    def replay_urls(self, keyword: str) -> Tuple[
+        List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
+        """
+        Extracts PDF and non-PDF URLs from the recorded result and gazette pages instead of the live site.
+        Args:
+            keyword (str): Keyword the pages were recorded for.
+        Returns:
+            Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]: Lists of PDF and non-PDF URLs with metadata.
+        """
+        matching_links = []
+        pdf_urls = []
+        non_pdf_urls = []
+        for key in self.fixtures.page_keys(self.site_name, keyword, 'results-'):
+            if not key_in_page_range(key, self.first_page, self.limited_pages):
+                continue
+            self.logger.info(f"Replaying page {key}")
+            page_number = int(key.split('-')[1])
+            try:
+                self.driver.get(self.fixtures.page_url(self.site_name, keyword, key))
+                result_links, dates = self.wait_for_results()
+                for index, date in enumerate(dates[:len(result_links)]):
+                    detail_key = detail_page_key(page_number, index)
+                    self.driver.get(self.fixtures.page_url(self.site_name, keyword, detail_key))
+                    self.extract_detail_links(keyword, date, pdf_urls, non_pdf_urls, matching_links)
+            except Exception as e:
+                self.log_error(e, key)
+        return pdf_urls, non_pdf_urls
+
+    @property
+    def replaying(self) -> bool:
+        return self.fixtures is not None and self.fixtures.replaying
+
+    def record_page(self, keyword: str, key: str):
+        """
+        Hands the page currently loaded in the driver to the fixture recorder and the page
+        weight log, if any.
+        Args:
+            keyword (str): Keyword the page belongs to.
+            key (str): Fixture key of the page.
+        """
+        if self.fixtures is not None:
+            self.fixtures.record_page(self.site_name, keyword, key, self.driver)
+        if self.page_weights is not None:
+            self.page_weights.record(self.site_name, keyword, key, self.driver)
+        if self.checkpoint is not None:
+            self.checkpoint.heartbeat()
+
     def format_date(self, date_text: str) -> str:
         """
         Formats the date text by removing unwanted characters.
@@ -205,6 +335,37 @@ class ResmiWebScraper:
             return date_text.split(';')[0].strip().replace('.', '-')
         return date_text.replace('.', '-')
 
+    def retry_dead_letters(self, keyword: str):
+        """
+        Fetches the keyword's documents that failed in earlier runs, before the new ones.
+        Args:
+            keyword (str): Keyword whose failed documents are retried.
+        """
+        pdf_urls, non_pdf_urls = self.dead_letters.take(keyword)
+        if not pdf_urls and not non_pdf_urls:
+            return
+        self.logger.info(f"Retrying {len(pdf_urls) + len(non_pdf_urls)} failed documents for keyword: {keyword}")
+        pdf_data = self.download_pdf_files(pdf_urls, keyword)
+        self.save_pdf_data(keyword, pdf_data)
+        self.process_non_pdf_urls(non_pdf_urls, keyword)
+
+    def fetch_pdf(self, url: str) -> bytes:
+        """
+        Fetches a PDF. Live runs go through a part file that resumes broken downloads, see
+        src/utils/rangeDownload.py; recorded and replayed runs fetch it whole, as fixtures
+        hold whole responses.
+        Args:
+            url (str): URL of the PDF.
+
+        Returns:
+            bytes: Content of the PDF.
+        """
+        if self.fixtures is not None:
+            response = self.session.get(url)
+            response.raise_for_status()
+            return response.content
+        return download(self.session, url, os.path.join(PARTIAL_DIR, self.site_name))
+
     def download_pdf_files(self, urls: List[Tuple[str, str, str, str]], keyword: str) -> List[dict]:
         """
         Downloads PDF files from the provided URLs.
@@ -218,23 +379,24 @@ class ResmiWebScraper:
         data = []
         for url, date, name, description in urls:
             try:
-                pdf_response = requests.get(url)
+                content = self.fetch_pdf(url)
                 data.append({
                     'url': url,
                     'date': date,
                     'file_name': name,
-                    'content': pdf_response.content
+                    'content': content
                 })
-                self.logger.info(f"Downloaded: {name}")
+                self.logger.info(f"Downloaded: {name}", extra={'document': name, 'url': url})
                 self.save_metadata(keyword, {
                     "name": name,
                     "notified_date": date,
                     "notified_country": None,
                     "URL": url,
                     "keyword": keyword
-                })
+                }, content=content, outputs=[self.pdf_file_name(keyword, date, name)])
             except Exception as e:
-                self.logger.error(f"Error downloading {url}: {str(e)}")
+                self.logger.error(f"Error downloading {url}: {str(e)}", extra={'url': url})
+                self.dead_letters.add(keyword, 'pdf', url, date, name, description, e)
         return data
 
     def process_non_pdf_urls(self, urls: List[Tuple[str, str, str, str]], keyword: str):
@@ -247,11 +409,11 @@ class ResmiWebScraper:
         self.logger.info(f"Processing non-PDF URLs for keyword: {keyword}")
         for url, date, name, description in urls:
             try:
-                response = requests.get(url)
-                soup = BeautifulSoup(response.content, 'html.parser')
+                response = self.session.get(url)
+                response.raise_for_status()
 
-                self.save_summary(keyword, url, date, name, description)
-                self.extract_and_save_tables(soup, keyword, name, date)
+                summary_file_name = self.save_summary(keyword, url, date, name, description)
+                table_files = self.extract_and_save_tables(response.content, keyword, name, date)
                 self.logger.info(f"Extracted summary and checked for tables from: {url}")
                 self.save_metadata(keyword, {
                     "name": name,
@@ -259,27 +421,24 @@ class ResmiWebScraper:
                     "notified_country": None,
                     "URL": url,
                     "keyword": keyword
-                })
+                }, content=response.content, outputs=[summary_file_name] + table_files)
             except Exception as e:
-                self.logger.error(f"Error processing {url}: {str(e)}")
+                self.logger.error(f"Error processing {url}: {str(e)}", extra={'url': url})
+                self.dead_letters.add(keyword, 'page', url, date, name, description, e)
 
-    def save_metadata(self, keyword: str, metadata: dict):
+    def save_metadata(self, keyword: str, metadata: dict, content: bytes = None, outputs: List[str] = None):
         """
-        Saves metadata to a JSON file.
+        Records metadata in the site's metadata catalog.
         Args:
             keyword (str): Keyword for creating folder structure.
             metadata (dict): Metadata to save.
+            content (bytes, optional): Downloaded content, hashed for change detection.
+            outputs (List[str], optional): Paths of the files written for the document.
         """
         self.logger.info(f"Saving metadata for: {metadata['name']}")
-        metadata_folder = os.path.join('data/raw/resmigazete', keyword.replace(':', '').replace(' ', '_'), 'metadata')
-        os.makedirs(metadata_folder, exist_ok=True)
-
-        metadata_file_name = os.path.join(metadata_folder,
-                                          f"metadata_{metadata['name']}.json")
-
-        with open(metadata_file_name, 'w', encoding='utf-8') as metadata_file:
-            json.dump(metadata, metadata_file, ensure_ascii=False, indent=4)
-        self.logger.info(f"Metadata saved to {metadata_file_name}")
+        self.catalog.append(stem=metadata['name'], name=metadata['name'], date=metadata['notified_date'],
+                            url=metadata['URL'], keyword=keyword, content=content, outputs=outputs,
+                            notified_country=metadata['notified_country'])
 
     def save_summary(self, keyword: str, url: str, date: str, name: str, description: str):
         """
@@ -292,17 +451,17 @@ class ResmiWebScraper:
         """
         self.logger.info(f"Saving summary for: {name}")
         keyword_folder = os.path.join('data/raw/resmigazete', keyword.replace(':', '').replace(' ', '_'), 'text')
-        os.makedirs(keyword_folder, exist_ok=True)
-
         # Dosya ismini oluştururken tarih iki defa yazılmamasını sağla
         summary_file_name = os.path.join(keyword_folder, f"{name}.txt")
 
-        with open(summary_file_name, 'w', encoding='utf-8') as summary_file:
-            summary_file.write(f"Title: {name}\n")
-            summary_file.write(f"Distribution date: {date}\n")
-            summary_file.write(f"Keywords: {keyword}\n")
-            summary_file.write(f"Summary: {description}\n")
+        self.writer.write_text(summary_file_name, (
+            f"Title: {name}\n"
+            f"Distribution date: {date}\n"
+            f"Keywords: {keyword}\n"
+            f"Summary: {description}\n"
+        ))
         self.logger.info(f"Summary saved to {summary_file_name}")
+        return summary_file_name
 
     def save_pdf_data(self, keyword: str, data: List[dict]):
         """
@@ -312,53 +471,46 @@ class ResmiWebScraper:
             data (List[dict]): List of PDF data to save.
         """
         self.logger.info(f"Saving PDF data for keyword: {keyword}")
-        keyword_folder = os.path.join('data/raw/resmigazete', keyword.replace(':', '').replace(' ', '_'), 'pdf')
-        os.makedirs(keyword_folder, exist_ok=True)
-
         for item in data:
-            # Dosya ismini oluştururken tarih iki defa yazılmamasını sağla
-            pdf_name = os.path.join(keyword_folder, f"{item['file_name']}.pdf")
-            with open(pdf_name, 'wb') as pdf_file:
-                pdf_file.write(item['content'])
+            pdf_name = self.pdf_file_name(keyword, item['date'], item['file_name'])
+            self.writer.write_bytes(pdf_name, item['content'])
             self.logger.info(f"PDF saved to {pdf_name}")
 
-    def extract_and_save_tables(self, soup: BeautifulSoup, keyword: str, name: str, date: str):
+    def pdf_file_name(self, keyword: str, date: str, name: str) -> str:
+        """
+        Builds the path a downloaded PDF is saved to.
+        Args:
+            keyword (str): Keyword for creating folder structure.
+            date (str): Date of the document.
+            name (str): Name of the document.
+        Returns:
+            str: Path of the PDF file.
+        """
+        keyword_folder = os.path.join('data/raw/resmigazete', keyword.replace(':', '').replace(' ', '_'), 'pdf')
+        # Dosya ismini oluştururken tarih iki defa yazılmamasını sağla
+        return os.path.join(keyword_folder, f"{name}.pdf")
+
+    def extract_and_save_tables(self, page_content: bytes, keyword: str, name: str, date: str):
         """
-        Extracts and saves tables from the provided page soup into a single JSON file.
+        Extracts and saves tables from the provided page HTML in the configured formats.
         Args:
-            soup (BeautifulSoup): BeautifulSoup object of the page.
+            page_content (bytes): Raw HTML of the page.
             keyword (str): Keyword for creating folder structure.
             name (str): Name for the file.
             date (str): Date of the page.
+        Returns:
+            List[str]: Written table files/folders, empty when the page has no tables.
         """
         self.logger.info(f"Extracting tables from page: {name}")
-        tables_data = []
-
-        tables = soup.find_all('table')
-        for i, table in enumerate(tables):
-            headers = [th.get_text().strip() for th in table.find_all('th')]
-            rows = [
-                [cell.get_text().strip() for cell in row.find_all('td')]
-                for row in table.find_all('tr') if row.find_all('td')
-            ]
-
-            if rows and headers:
-                table_data = {
-                    'headers': headers,
-                    'rows': rows
-                }
-                tables_data.append(table_data)
+        tables_data = extract_tables(page_content)
 
         if tables_data:
-            keyword_folder = os.path.join('data/raw/resmigazete', keyword.replace(':', '').replace(' ', '_'), 'json')
-            os.makedirs(keyword_folder, exist_ok=True)
-
-            # Dosya ismini oluştururken tarih iki defa yazılmamasını sağla
-            table_file_name = os.path.join(keyword_folder, f"{name}.json")
-
-            with open(table_file_name, 'w', encoding='utf-8') as table_file:
-                json.dump(tables_data, table_file, ensure_ascii=False, indent=4)
-            self.logger.info(f"Saved tables to {table_file_name}")
+            keyword_folder = os.path.join('data/raw/resmigazete', keyword.replace(':', '').replace(' ', '_'))
+            table_files = document_table_paths(keyword_folder, name, self.table_formats)
+            self.writer.submit(save_document_tables, tables_data, keyword_folder, name, self.table_formats)
+            self.logger.info(f"Saved tables to {', '.join(table_files)}")
+            return table_files
+        return []
 
     def log_error(self, error: Exception, url: str):
         """
@@ -380,5 +532,4 @@ class ResmiWebScraper:
         os.makedirs(keyword_folder, exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'pdf'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'text'), exist_ok=True)
-        os.makedirs(os.path.join(keyword_folder, 'metadata'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'json'), exist_ok=True)
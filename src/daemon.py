@@ -0,0 +1,115 @@
+import threading
+import time
+
+from src.utils.watchdog import driver_alive
+
+
+def parse_schedules(value: str, default_interval: float) -> dict:
+    """
+    Parses per-script refresh intervals such as 'echaWebScraping.py=3600,resmiWebScraping.py=900'.
+
+    Returns:
+    dict: script name -> interval in seconds; scripts left out use default_interval.
+    """
+    schedules = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            script, interval = item.split('=', 1)
+            schedules[script.strip()] = float(interval)
+    schedules.setdefault('*', default_interval)
+    return schedules
+
+
+class RefreshDaemon:
+    """
+    Long-running scraper that keeps its resources warm between refreshes.
+
+    One browser, the runner's HTTP session, output writer, scheduler and fetch policy live
+    as long as the daemon. Every script of scripts.txt is refreshed on its own interval,
+    re-reading scripts.txt each time so edits apply without a restart, and regardless of
+    executed_scripts.txt. After a round of refreshes, on_refreshed(started) runs with the
+    round's start time so that only what changed is archived and uploaded.
+
+    Parameters:
+    runner (ScriptRunner): Runner whose shared resources the refreshes use.
+    scripts_file_path (str): Path to scripts.txt.
+    schedules (dict): Output of parse_schedules.
+    on_refreshed (callable): Called with the start timestamp of each refresh round.
+    """
+
+    def __init__(self, runner, scripts_file_path, schedules, on_refreshed):
+        self.runner = runner
+        self.scripts_file_path = scripts_file_path
+        self.schedules = schedules
+        self.on_refreshed = on_refreshed
+        self.next_runs = {}
+        self.driver = None
+        self.stopped = threading.Event()
+
+    def interval(self, script):
+        return self.schedules.get(script, self.schedules['*'])
+
+    def warm_driver(self, script=None):
+        # A browser the watchdog killed or that crashed is replaced
+        if self.driver is not None and not driver_alive(self.driver):
+            self.discard_driver()
+        if self.driver is None:
+            # Its own cache slot: it outlives the refresh of the script it was launched for
+            self.driver = self.runner.create_driver(script, cache_site='shared')
+        return self.driver
+
+    def discard_driver(self):
+        # A browser that failed mid-scrape is in an unknown state, the next job gets a new one
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def due_scripts(self, now):
+        scripts = self.runner.read_scripts_from_file(self.scripts_file_path)
+        return [entry for entry in scripts if self.next_runs.get((entry[0], entry[1]), 0) <= now]
+
+    def refresh(self, script, link, keywords, limited_page):
+        print(f'Refreshing {script} with link {link}')
+        try:
+            self.runner.run_script(script, link, keywords, limited_page, driver=self.warm_driver(script))
+        except Exception as e:
+            print(f'Refresh of {script} failed: {e}')
+            self.discard_driver()
+        self.next_runs[(script, link)] = time.time() + self.interval(script)
+
+    def run_once(self):
+        """
+        Refreshes every due script, then hands the changes on. Returns the number refreshed.
+        """
+        started = time.time()
+        due = self.due_scripts(started)
+        for script, link, keywords, limited_page in due:
+            if self.stopped.is_set():
+                break
+            self.refresh(script, link, keywords, limited_page)
+        if due:
+            self.runner.writer.flush()
+            self.on_refreshed(started)
+        return len(due)
+
+    def run(self):
+        """
+        Runs refresh rounds until stop() is called.
+        """
+        try:
+            while not self.stopped.is_set():
+                self.run_once()
+                next_run = min(self.next_runs.values(), default=time.time() + self.schedules['*'])
+                self.stopped.wait(max(next_run - time.time(), 1))
+        finally:
+            self.close()
+
+    def stop(self):
+        self.stopped.set()
+
+    def close(self):
+        self.discard_driver()
+        self.runner.close()
@@ -1,5 +1,15 @@
 import os
-from src.bots import EchaWebScraper, EurWebScraper, ResmiWebScraper
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+import requests
+from src.bots.registry import discovery_backends, scraper_class
+from src.utils.browserProfiles import PageWeightLog, apply_blocking, apply_launch_options, profile_for
+from src.utils.fetchPolicy import FetchPolicy
+from src.utils.hostScheduler import HostScheduler
+from src.utils.outputWriter import OutputWriter
+from src.utils.searchPlan import SearchPlanLog
+from src.utils.siteProfiles import SiteProfile
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -7,18 +17,59 @@ from selenium.webdriver.chrome.options import Options
 
 class ScriptRunner:
 
-    def __init__(self, script_keywords_file):
+    def __init__(self, script_keywords_file, fixtures=None, table_formats=('json',), browser_profile=None,
+                 window_workers=1, batch_searches=False, watchdog=None, browser_cache=None):
         """
         Initialize the ScriptRunner.
 
         Parameters:
         script_keywords_file (str): Path to the text file containing script names,
                                     links, and associated keywords.
+        fixtures (Recorder | Replayer, optional): Record/replay hook handed to every bot.
+        table_formats (tuple): Output formats for extracted tables, see src/utils/tableExtractor.py.
+        browser_profile (str, optional): Browser profile for every site, e.g. 'full' to measure
+                                         the baseline; by default each site gets its own, see
+                                         src/utils/browserProfiles.py.
+        window_workers (int): Browsers ECHA searches its date windows on at once.
+        batch_searches (bool): Search the keywords of scripts whose bot supports it with one
+                               combined query instead of one search each.
+        watchdog (Watchdog, optional): Supervisor stopping and retrying hung or bloated
+                                       tasks, see src/utils/watchdog.py.
+        browser_cache (BrowserCache, optional): Persistent per-site browser profiles with
+                                                their disk cache and cookies, see
+                                                src/utils/browserCache.py; by default every
+                                                browser starts from a throwaway profile.
+        Site profiles in scripts.txt override these per script, see src/utils/siteProfiles.py.
         """
         self.script_keywords_file = script_keywords_file
+        self.fixtures = fixtures
+        self.table_formats = table_formats
+        self.browser_profile = browser_profile
+        self.window_workers = window_workers
+        self.batch_searches = batch_searches
+        self.watchdog = watchdog
+        self.browser_cache = browser_cache
+        # One background writer shared by every bot run, closed by close()
+        self.writer = OutputWriter()
+        # Hit counts of every search, read back when a sharded run is planned
+        self.search_plans = SearchPlanLog(writer=self.writer)
+        # Politeness limits are per host, so every bot run shares the same scheduler
+        self.scheduler = HostScheduler()
+        # Circuit breakers are per host as well
+        self.policy = FetchPolicy()
+        # Connection pools are kept across bot runs
+        self.session = requests.Session()
+        # script name -> SiteProfile, filled by read_scripts_from_file
+        self.profiles = {}
         self.executed_entries = self.load_executed_entries()
 
 
+    def close(self):
+        """
+        Waits for the queued outputs to reach the disk and stops the writer.
+        """
+        self.writer.close()
+
     def load_executed_entries(self):
         """
         Load the executed entries from the file into a dictionary.
@@ -55,6 +106,12 @@ class ScriptRunner:
         """
         Read scripts information from a text file with the specified format.
 
+        'Key: value' lines between a block's Link and Keywords lines (e.g. 'Rate: 1.5',
+        'Wait timeout: 30', 'Discovery: batch') make up the site's profile, kept in
+        self.profiles; see PROFILE_KEYS in src/utils/siteProfiles.py for the keys. Lines
+        with unknown keys there, and lines before the first Name line, are ignored with a
+        warning.
+
         Parameters:
         filepath (str): Path to the text file containing scripts information.
 
@@ -65,6 +122,8 @@ class ScriptRunner:
         scripts = []
         current_script = None
         keywords = []
+        profile = None
+        in_keywords = False
 
         with open(filepath, 'r', encoding='utf-8') as file:
             lines = file.readlines()
@@ -74,24 +133,101 @@ class ScriptRunner:
             if line.startswith("Name:"):
                 if current_script:  # Önceki script bilgilerini ekle
                     scripts.append((current_script[0], current_script[1], keywords, current_script[2]))
+                    self.set_profile(current_script[0], current_script[1], profile)
                 script_name = line.split("Name:")[1].strip()
                 current_script = [script_name, None, None]
                 keywords = []
+                profile = SiteProfile()
+                in_keywords = False
+            elif current_script is None:
+                # Nothing to apply it to yet, e.g. a setting above the first Name line
+                if line:
+                    print(f'Ignoring "{line}" before the first Name line of {filepath}')
             elif line.startswith("Link:"):
                 current_script[1] = line.split("Link:")[1].strip()
             elif line.startswith("Limited page number:"):
                 current_script[2] = int(line.split("Limited page number:")[1].strip())
             elif line.startswith("Keywords:"):
+                in_keywords = True
                 continue  # Anahtar kelimeler bu satırdan sonra gelecek
+            elif line and not in_keywords and ':' in line:
+                if not profile.set(*line.split(':', 1)):
+                    # A misspelt setting would otherwise be searched for as a keyword
+                    print(f'Ignoring unknown setting "{line}" of {current_script[0]}, '
+                          f'see PROFILE_KEYS in src/utils/siteProfiles.py')
+                continue
             elif line:  # Anahtar kelimeler bu durumda eklenir
                 keywords.append(line)
 
         # Son script'i ekle
         if current_script:
             scripts.append((current_script[0], current_script[1], keywords, current_script[2]))
+            self.set_profile(current_script[0], current_script[1], profile)
 
         return scripts
 
+    def set_profile(self, script, link, profile):
+        """
+        Keep a script's site profile and apply its limits to the host of its link. Limits
+        that did not change are left alone, so re-reading scripts.txt keeps adapted rates.
+
+        Parameters:
+        script (str): The name of the script.
+        link (str): The base URL of the script.
+        profile (SiteProfile): The profile read for the script.
+        """
+        self.profiles[script] = profile
+        if scraper_class(profile.bot or script) is None:
+            print(f'Unknown script {profile.bot or script}')
+        elif profile.discovery and profile.discovery not in self.discovery_backends(script):
+            print(f'{script} does not support discovery {profile.discovery}, '
+                  f'expected one of {", ".join(self.discovery_backends(script))}')
+        host = urlsplit(link or '').hostname
+        if not host:
+            return
+        settings = profile.host_settings()
+        current = self.scheduler.host_settings.get(host, {})
+        if any(current.get(name) != value for name, value in settings.items()):
+            self.scheduler.configure(host, **settings)
+        if profile.fetch_timeout is not None:
+            self.policy.configure(host, profile.fetch_timeout)
+
+    def profile(self, script):
+        # Scripts without a profile in scripts.txt keep every default
+        return self.profiles.get(script) or SiteProfile()
+
+    def discovery_backends(self, script):
+        return discovery_backends(scraper_class(self.profile(script).bot or script))
+
+    def discovery(self, script):
+        """
+        The discovery backend a script runs with: its profile's, else a batched search when
+        batch_searches is on and the bot supports it, else the bot's default.
+
+        Parameters:
+        script (str): The name of the script.
+
+        Returns:
+        str: One of DISCOVERY_BACKENDS in src/utils/siteProfiles.py.
+        """
+        backends = self.discovery_backends(script)
+        discovery = self.profile(script).discovery
+        if discovery in backends:
+            return discovery
+        if self.batch_searches and 'batch' in backends:
+            return 'batch'
+        return backends[0]
+
+    def browser_profile_for(self, script):
+        # The runner-wide profile (e.g. 'full' for a baseline) wins over the site's own
+        return profile_for(script, self.browser_profile or self.profile(script).browser_profile)
+
+    def uses_browser_cache(self, script):
+        # Recorded and replayed runs keep throwaway profiles, so that they stay reproducible
+        if self.browser_cache is None or self.fixtures is not None:
+            return False
+        return self.profile(script).browser_cache is not False
+
     def run_scripts(self, scripts):
         """
         Run the given scripts with their respective links and keywords.
@@ -114,7 +250,92 @@ class ScriptRunner:
             else:
                 print(f'Skipping {script} with link {link} (all keywords already executed)')
 
-    def run_script(self, script, link, keywords, limited_page):
+    def create_driver(self, script=None, cache_site=None):
+        """
+        Launch the headless Chrome the bots drive.
+
+        Parameters:
+        script (str, optional): Script the browser is for; its profile sets the page load
+                                strategy and window size, and its persistent profile is
+                                used if there is a browser cache.
+        cache_site (str, optional): Site whose browser cache slots the browser takes, the
+                                    script's by default; 'shared' for a warm browser that
+                                    several scripts use, so it keeps none of theirs taken.
+
+        Returns:
+        webdriver.Chrome: A new browser session.
+        """
+        chrome_options = webdriver.ChromeOptions()
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--disable-gpu")
+        # Any free port, several browsers may run at once
+        chrome_options.add_argument("--remote-debugging-port=0")
+        for flag in self.profile(script).chrome_flags:
+            chrome_options.add_argument(flag)
+        apply_launch_options(chrome_options, self.browser_profile_for(script))
+
+        slot = None
+        if self.uses_browser_cache(script):
+            slot = self.browser_cache.acquire(cache_site or (os.path.splitext(script)[0] if script else 'shared'))
+            for argument in self.browser_cache.launch_arguments(slot):
+                chrome_options.add_argument(argument)
+        try:
+            driver = webdriver.Chrome(options=chrome_options)
+        except Exception:
+            if slot is not None:
+                self.browser_cache.release(slot)
+            raise
+        if slot is not None:
+            self.browser_cache.attach(slot, driver)
+        return driver
+
+    def create_scraper(self, script, link, keywords, limited_page, driver, first_page=1, quit_driver=True,
+                       checkpoint=None):
+        """
+        Build the bot of a script for its keywords, wired to the runner's shared resources.
+
+        Parameters:
+        script (str): The name of the script to run.
+        link (str): The base URL or link to be used in the script.
+        keywords (list): The keywords to scrape; several only for a batched search.
+        limited_page (int): The page limit for scraping (if applicable).
+        driver (webdriver.Chrome): Browser the bot drives.
+        first_page (int): First result page to scrape, for sharded runs.
+        quit_driver (bool): Whether the bot quits the browser when it is done.
+        checkpoint (TaskWatch, optional): Watchdog checkpoint of the task.
+
+        Returns:
+        object | None: The bot registered for the script, see src/bots/registry.py; None for
+                       unknown scripts.
+        """
+        site = self.profile(script)
+        scraper = scraper_class(site.bot or script)
+        if scraper is None:
+            print(f'Unknown script {script}')
+            return None
+        # Blocking is set on every run, so a warm browser follows the profile of each script
+        profile = self.browser_profile_for(script)
+        apply_blocking(driver, profile)
+        # Pages of warm-cache browsers are logged apart, so that their savings show
+        profile_name = profile.name + '+cache' if self.uses_browser_cache(script) else profile.name
+        options = dict(fixtures=self.fixtures, table_formats=self.table_formats, writer=self.writer,
+                       scheduler=self.scheduler, policy=self.policy, session=self.session,
+                       first_page=first_page, quit_driver=quit_driver,
+                       page_weights=PageWeightLog(profile_name, writer=self.writer),
+                       search_plans=self.search_plans, checkpoint=checkpoint, **site.bot_options())
+        backends = discovery_backends(scraper)
+        discovery = self.discovery(script)
+        if 'windows' in backends:
+            # Date windows beyond the first run on browsers of their own
+            options.update(discovery=discovery, driver_factory=lambda: self.create_driver(script),
+                           window_workers=site.browsers or self.window_workers)
+        if 'batch' in backends:
+            options.update(batch_search=discovery == 'batch' and len(keywords) > 1)
+        return scraper(key_words=keywords, base_url=link, limited_page=limited_page, driver=driver, **options)
+
+    def run_script(self, script, link, keywords, limited_page, first_page=1, driver=None):
         """
         Run the specified script with the provided link and keywords.
 
@@ -123,36 +344,71 @@ class ScriptRunner:
         link (str): The base URL or link to be used in the script.
         keywords (list): A list of keywords to process with the script.
         limited_page (int): The page limit for scraping (if applicable).
+        first_page (int): First result page to scrape, for sharded runs.
+        driver (webdriver.Chrome, optional): Warm browser to reuse and keep open; by default
+                                             every keyword gets its own browser.
         """
 
+        # A batched search covers all keywords of the script at once
+        if self.discovery(script) == 'batch' and len(keywords) > 1:
+            keyword_groups = [list(keywords)]
+        else:
+            keyword_groups = [[keyword] for keyword in keywords]
 
-        for keyword in keywords:
+        for keyword_group in keyword_groups:
+            self.run_task(script, link, keyword_group, limited_page, first_page, driver)
 
-            chrome_options = webdriver.ChromeOptions()
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--remote-debugging-port=9222")
-            chrome_options.add_argument("--window-size=1920,1080")
+            # Update the executed keywords
+            if (script, link) not in self.executed_entries:
+                self.executed_entries[(script, link)] = set()
 
-            driver = webdriver.Chrome(options=chrome_options)
+            self.executed_entries[(script, link)].update(keyword_group)
+            self.save_executed_entries()
 
-            print(f'Running {script} with link {link} and keyword: {keyword}')
+    def run_task(self, script, link, keywords, limited_page, first_page=1, driver=None):
+        """
+        Run one bot for a keyword, or for a batched group of keywords. A task the watchdog
+        stops is retried on a new browser from the results page after its checkpoint.
 
-            if script == 'echaWebScraping.py':
-                scraper = EchaWebScraper(key_words=[keyword], base_url=link, limited_page=limited_page, driver=driver)
-                scraper.start()
-            elif script == 'eur_lexWebScraping.py':
-                scraper = EurWebScraper(key_words=[keyword], base_url=link, limited_page=limited_page, driver=driver)
-                scraper.start()
-            elif script == 'resmiWebScraping.py':
-                scraper = ResmiWebScraper(key_words=[keyword], base_url=link, limited_page=limited_page, driver=driver)
-                scraper.start()
+        Parameters:
+        script (str): The name of the script to run.
+        link (str): The base URL or link to be used in the script.
+        keywords (list): The keywords of the task.
+        limited_page (int): The page limit for scraping (if applicable).
+        first_page (int): First result page to scrape.
+        driver (webdriver.Chrome, optional): Warm browser to reuse and keep open.
+        """
+        restarts = self.watchdog.restarts if self.watchdog is not None else 0
+        for attempt in range(restarts + 1):
+            task_driver = driver if driver is not None else self.create_driver(script)
+            resumed = f' from page {first_page}' if attempt else ''
+            print(f'Running {script} with link {link} and keyword: {", ".join(keywords)}{resumed}')
 
-            # Update the executed keywords
-            if (script, link) not in self.executed_entries:
-                self.executed_entries[(script, link)] = set()
+            watch_context = nullcontext()
+            if self.watchdog is not None:
+                watch_context = self.watchdog.watch(f'{script} {", ".join(keywords)}', first_page,
+                                                    self.profile(script).task_budget)
+            with watch_context as watch:
+                if watch is not None:
+                    watch.track(task_driver)
+                try:
+                    scraper = self.create_scraper(script, link, keywords, limited_page, task_driver,
+                                                  first_page=first_page, quit_driver=driver is None,
+                                                  checkpoint=watch)
+                    if scraper is not None:
+                        scraper.start()
+                    elif driver is None:
+                        task_driver.quit()
+                except Exception:
+                    # A bot whose browser was killed under it may fail anywhere
+                    if watch is None or not watch.stopped:
+                        raise
 
-            self.executed_entries[(script, link)].add(keyword)
-            self.save_executed_entries()
\ No newline at end of file
+            if watch is None or not watch.stopped:
+                return
+            # The warm browser was killed as well, the retries get browsers of their own
+            driver = None
+            first_page = watch.next_page
+            if limited_page and first_page > limited_page:
+                return
+        print(f'Giving up on {script} with keyword: {", ".join(keywords)} after {restarts + 1} attempts')
@@ -0,0 +1,219 @@
+"""
+Persistent Chrome user-data directories, so that site bundles stay in the HTTP disk cache and
+cookie consent is remembered from one run to the next.
+
+    data/cache/browser/<site>/<slot>/     one Chrome user-data directory
+    data/cache/browser/<site>/<slot>.lock held while a browser uses the slot
+
+Chrome refuses to share a user-data directory between running browsers, so each browser
+takes a slot of its own: concurrent browsers of one process (ECHA date windows) and
+workers of a sharded crawl on the same host (the lock is an flock) get different slots.
+A slot is free again once its browser's chromedriver has exited.
+
+    python -m src.utils.browserCache      size of every slot, then prunes them
+
+Whether warm caches pay off shows in the page weight log: pages of browsers with a
+persistent profile are logged under '<profile>+cache', see src/utils/browserProfiles.py.
+"""
+import fcntl
+import os
+import shutil
+import threading
+import time
+
+from src.utils.watchdog import driver_alive
+
+BROWSER_CACHE_DIR = os.path.join('data', 'cache', 'browser')
+
+MB = 1024 * 1024
+
+# Parts of a user-data directory that are only cache; pruning empties them and keeps the
+# cookies and local storage
+CACHE_DIRS = (
+    os.path.join('Default', 'Cache'),
+    os.path.join('Default', 'Code Cache'),
+    os.path.join('Default', 'GPUCache'),
+    os.path.join('Default', 'Service Worker', 'CacheStorage'),
+    os.path.join('Default', 'Service Worker', 'ScriptCache'),
+    'GrShaderCache',
+    'ShaderCache',
+)
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for directory, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                total += os.lstat(os.path.join(directory, file_name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _lock_unused(lock_path: str):
+    """
+    The open lock file of a slot no browser uses, holding its flock until closed; None if
+    another worker has the slot.
+    """
+    try:
+        lock_file = open(lock_path, 'a')
+    except OSError:
+        return None
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class BrowserCache:
+    """
+    Hands out persistent user-data directories per site, one per running browser.
+
+    Args:
+        root (str): Directory of the per-site slots.
+        disk_cache_mb (int): HTTP disk cache size Chrome is launched with, per slot.
+        max_slot_mb (int): Slots growing beyond this have their caches emptied when pruned.
+        max_age (float): Seconds a slot may go unused before it is deleted by pruning.
+        prune_interval (float): Seconds between automatic prunes, done when a slot is taken.
+    """
+
+    def __init__(self, root: str = BROWSER_CACHE_DIR, disk_cache_mb: int = 256, max_slot_mb: int = 512,
+                 max_age: float = 7 * 86400, prune_interval: float = 3600):
+        self.root = root
+        self.disk_cache_mb = disk_cache_mb
+        self.max_slot_mb = max_slot_mb
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        # slot path -> (open lock file, driver or None while it is launched)
+        self.slots = {}
+        self.lock = threading.Lock()
+        self.last_prune = 0.0
+
+    def launch_arguments(self, slot: str) -> list:
+        return [f"--user-data-dir={os.path.abspath(slot)}", f"--disk-cache-size={self.disk_cache_mb * MB}"]
+
+    def acquire(self, site: str) -> str:
+        """
+        Takes the first free slot of a site, creating one if all are in use.
+
+        Args:
+            site (str): Site the browser is for, e.g. the script name; slots are never
+                shared across sites.
+
+        Returns:
+            str: The user-data directory; hand it to attach() once the browser runs, or to
+                release() if it failed to start.
+        """
+        if time.monotonic() - self.last_prune > self.prune_interval:
+            self.prune()
+        site_dir = os.path.join(self.root, site)
+        os.makedirs(site_dir, exist_ok=True)
+        with self.lock:
+            self._reclaim()
+            number = 0
+            while True:
+                slot = os.path.join(site_dir, str(number))
+                number += 1
+                if slot in self.slots:
+                    continue
+                lock_file = open(slot + '.lock', 'a')
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Another worker on this host has it
+                    lock_file.close()
+                    continue
+                # The lock file's mtime tells pruning when the slot was last used
+                os.utime(slot + '.lock')
+                self.slots[slot] = (lock_file, None)
+                return slot
+
+    def attach(self, slot: str, driver):
+        # The slot stays taken until the browser's chromedriver has exited
+        with self.lock:
+            lock_file, _ = self.slots[slot]
+            self.slots[slot] = (lock_file, driver)
+
+    def release(self, slot: str):
+        with self.lock:
+            self._release(slot)
+
+    def _release(self, slot: str):
+        lock_file, _ = self.slots.pop(slot, (None, None))
+        if lock_file is not None:
+            try:
+                os.utime(slot + '.lock')
+            except OSError:
+                pass
+            # Closing the file drops the flock
+            lock_file.close()
+
+    def _reclaim(self):
+        # Slots of browsers that quit or were killed
+        for slot, (_, driver) in list(self.slots.items()):
+            if driver is not None and not driver_alive(driver):
+                self._release(slot)
+
+    def prune(self):
+        """
+        Deletes slots unused for max_age and empties the caches of slots over max_slot_mb.
+        Slots in use here or by another worker are left alone.
+        """
+        self.last_prune = time.monotonic()
+        if not os.path.isdir(self.root):
+            return
+        with self.lock:
+            self._reclaim()
+            for site in sorted(os.listdir(self.root)):
+                site_dir = os.path.join(self.root, site)
+                if not os.path.isdir(site_dir):
+                    continue
+                for name in sorted(os.listdir(site_dir)):
+                    slot = os.path.join(site_dir, name)
+                    if not os.path.isdir(slot) or slot in self.slots:
+                        continue
+                    # Held while the slot is deleted or emptied, so no worker launches a browser on it
+                    lock_file = _lock_unused(slot + '.lock')
+                    if lock_file is None:
+                        continue
+                    with lock_file:
+                        self._prune_slot(slot)
+
+    def _prune_slot(self, slot: str):
+        try:
+            last_used = os.path.getmtime(slot + '.lock')
+        except OSError:
+            last_used = os.path.getmtime(slot)
+        if self.max_age and time.time() - last_used > self.max_age:
+            shutil.rmtree(slot, ignore_errors=True)
+            try:
+                os.remove(slot + '.lock')
+            except OSError:
+                pass
+            print(f"Removed unused browser profile {slot}")
+        elif self.max_slot_mb and directory_size(slot) > self.max_slot_mb * MB:
+            for cache_dir in CACHE_DIRS:
+                shutil.rmtree(os.path.join(slot, cache_dir), ignore_errors=True)
+            print(f"Emptied the caches of browser profile {slot}")
+
+    def sizes(self) -> dict:
+        # slot path -> bytes on disk
+        sizes = {}
+        if os.path.isdir(self.root):
+            for site in sorted(os.listdir(self.root)):
+                site_dir = os.path.join(self.root, site)
+                if os.path.isdir(site_dir):
+                    for name in sorted(os.listdir(site_dir)):
+                        if os.path.isdir(os.path.join(site_dir, name)):
+                            sizes[os.path.join(site_dir, name)] = directory_size(os.path.join(site_dir, name))
+        return sizes
+
+
+if __name__ == '__main__':
+    cache = BrowserCache()
+    for slot, size in cache.sizes().items():
+        print(f"{slot}: {size / MB:.1f} MB")
+    cache.prune()
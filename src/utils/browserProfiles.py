@@ -0,0 +1,219 @@
+"""
+Per-site browser profiles: which resources the headless Chrome skips, how long a navigation
+waits, and a log of the bytes each results page still transfers.
+
+    python -m src.utils.browserProfiles      average bytes per page and savings, per site
+
+The bots only read result tables and links, so images, fonts, media and third-party
+scripts are blocked through CDP (Network.setBlockedURLs). Blocking is applied per bot run,
+so a warm browser shared by several sites switches profiles without a restart. Savings
+are measured against runs with the 'full' profile (browser_profile=full), which blocks
+nothing.
+"""
+import json
+import os
+import threading
+import time
+
+PAGE_WEIGHT_DIR = os.path.join('data', 'state', 'page_weight')
+
+# URL patterns per resource type; Chrome matches '*' wildcards against the whole URL
+RESOURCE_PATTERNS = {
+    'image': ['png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'ico', 'bmp'],
+    'font': ['woff', 'woff2', 'ttf', 'otf', 'eot'],
+    'media': ['mp4', 'webm', 'mp3', 'ogg', 'wav'],
+    'stylesheet': ['css'],
+}
+
+# Analytics, ads, social widgets and video embeds seen on the scraped sites
+THIRD_PARTY_DOMAINS = [
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'facebook.net', 'facebook.com', 'twitter.com', 'youtube.com', 'ytimg.com',
+    'hotjar.com', 'addthis.com', 'matomo.cloud', 'yandex.ru',
+]
+
+
+class BrowserProfile:
+    """
+    Resources a site's pages are loaded without, and how the browser is launched for it.
+
+    Args:
+        name (str): Profile name, logged with every page weight.
+        blocked_resources (tuple): Keys of RESOURCE_PATTERNS to block.
+        blocked_domains (tuple): Domains whose requests are blocked, sub domains included.
+        page_load_strategy (str): 'normal', 'eager' (DOM ready, subresources still loading) or 'none'.
+        window_size (tuple): Viewport width and height.
+    """
+
+    def __init__(self, name: str, blocked_resources=(), blocked_domains=(), page_load_strategy: str = 'normal',
+                 window_size=(1920, 1080)):
+        self.name = name
+        self.blocked_resources = tuple(blocked_resources)
+        self.blocked_domains = tuple(blocked_domains)
+        self.page_load_strategy = page_load_strategy
+        self.window_size = window_size
+
+    def blocked_urls(self) -> list:
+        urls = []
+        for resource in self.blocked_resources:
+            for extension in RESOURCE_PATTERNS[resource]:
+                urls += [f'*.{extension}', f'*.{extension}?*']
+        for domain in self.blocked_domains:
+            urls += [f'*://{domain}/*', f'*.{domain}/*']
+        return urls
+
+
+# Baseline: everything loads, as before the profiles existed
+FULL_PROFILE = BrowserProfile('full')
+
+# Stylesheets stay on ECHA and Resmi Gazete: their date pickers and result lists are only
+# clickable with the page laid out; EUR-Lex results are plain links and forms.
+PROFILES = {
+    'full': FULL_PROFILE,
+    'ECHA': BrowserProfile('ECHA', ('image', 'font', 'media'), THIRD_PARTY_DOMAINS, 'eager'),
+    'eur_lex': BrowserProfile('eur_lex', ('image', 'font', 'media', 'stylesheet'), THIRD_PARTY_DOMAINS, 'eager'),
+    'resmigazete': BrowserProfile('resmigazete', ('image', 'font', 'media'), THIRD_PARTY_DOMAINS, 'eager'),
+}
+
+SCRIPT_PROFILES = {
+    'echaWebScraping.py': 'ECHA',
+    'eur_lexWebScraping.py': 'eur_lex',
+    'resmiWebScraping.py': 'resmigazete',
+}
+
+
+def profile_for(script: str = None, name: str = None) -> BrowserProfile:
+    """
+    The profile named `name` if given (e.g. 'full' for a baseline run), otherwise the
+    script's own profile; unknown scripts load everything.
+    """
+    if name:
+        return PROFILES[name]
+    return PROFILES.get(SCRIPT_PROFILES.get(script), FULL_PROFILE)
+
+
+def apply_launch_options(chrome_options, profile: BrowserProfile):
+    # Launch-time part of a profile; the blocking itself is set per bot run by apply_blocking
+    chrome_options.page_load_strategy = profile.page_load_strategy
+    chrome_options.add_argument(f"--window-size={profile.window_size[0]},{profile.window_size[1]}")
+    return chrome_options
+
+
+def apply_blocking(driver, profile: BrowserProfile):
+    """
+    Replaces the URLs the browser blocks with those of `profile`. Browsers without CDP
+    (anything but Chrome/Edge) load everything.
+    """
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': profile.blocked_urls()})
+    except Exception as e:
+        print(f"Could not apply browser profile {profile.name}: {e}")
+
+
+# Bytes transferred since the last measurement: the document if it was not measured yet,
+# plus every resource timing entry, which is then cleared for the next page
+PAGE_WEIGHT_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+const sum = (entries, field) => entries.reduce((total, entry) => total + (entry[field] || 0), 0);
+const firstMeasure = window.__pageWeightOrigin !== performance.timeOrigin;
+window.__pageWeightOrigin = performance.timeOrigin;
+const documentBytes = firstMeasure && navigation ? navigation.transferSize : 0;
+const weight = {
+    transferred: documentBytes + sum(resources, 'transferSize'),
+    decoded: (firstMeasure && navigation ? navigation.decodedBodySize : 0) + sum(resources, 'decodedBodySize'),
+    resources: resources.length
+};
+performance.clearResourceTimings();
+return weight;
+"""
+
+
+def page_weight(driver) -> dict:
+    """
+    Bytes the page loaded in the driver transferred since it was last measured.
+
+    Returns:
+        dict: 'transferred' and 'decoded' bytes and the number of 'resources'.
+    """
+    return driver.execute_script(PAGE_WEIGHT_SCRIPT)
+
+
+class PageWeightLog:
+    """
+    Appends the weight of each results page to data/state/page_weight/<site>.jsonl.
+
+    Args:
+        profile_name (str): Profile the pages were loaded with.
+        root (str): Directory of the per-site logs.
+        writer (OutputWriter, optional): Background writer the lines are handed to.
+    """
+
+    def __init__(self, profile_name: str, root: str = PAGE_WEIGHT_DIR, writer=None):
+        self.profile_name = profile_name
+        self.root = root
+        self.writer = writer
+        self.lock = threading.Lock()
+
+    def record(self, site_name: str, keyword: str, key: str, driver):
+        try:
+            weight = page_weight(driver)
+        except Exception as e:
+            print(f"Could not measure page {key}: {e}")
+            return
+        entry = {'site': site_name, 'profile': self.profile_name, 'keyword': keyword, 'page': key,
+                 'measured_at': time.strftime('%Y-%m-%dT%H:%M:%S'), **weight}
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        path = os.path.join(self.root, f"{site_name}.jsonl")
+        if self.writer is not None:
+            self.writer.append_text(path, line)
+            return
+        with self.lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+def summarize_page_weights(root: str = PAGE_WEIGHT_DIR) -> dict:
+    """
+    Average transferred bytes per page for each site and profile, with the bytes saved per
+    page against the site's 'full' profile pages when there are any.
+
+    Returns:
+        dict: site -> profile -> {'pages', 'bytes_per_page', 'saved_per_page'}.
+    """
+    totals = {}
+    if os.path.isdir(root):
+        for file_name in sorted(os.listdir(root)):
+            if not file_name.endswith('.jsonl'):
+                continue
+            with open(os.path.join(root, file_name), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    pages, transferred = totals.setdefault(entry['site'], {}).get(entry['profile'], (0, 0))
+                    totals[entry['site']][entry['profile']] = (pages + 1, transferred + entry['transferred'])
+
+    summary = {}
+    for site, profiles in totals.items():
+        averages = {profile: transferred / pages for profile, (pages, transferred) in profiles.items()}
+        baseline = averages.get(FULL_PROFILE.name)
+        summary[site] = {
+            profile: {
+                'pages': profiles[profile][0],
+                'bytes_per_page': round(average),
+                'saved_per_page': round(baseline - average) if baseline is not None else None,
+            }
+            for profile, average in averages.items()
+        }
+    return summary
+
+
+if __name__ == '__main__':
+    for site, profiles in summarize_page_weights().items():
+        for profile, stats in profiles.items():
+            saved = f", {stats['saved_per_page']} bytes saved" if stats['saved_per_page'] is not None else ''
+            print(f"{site} [{profile}]: {stats['pages']} pages, {stats['bytes_per_page']} bytes per page{saved}")
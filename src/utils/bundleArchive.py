@@ -0,0 +1,293 @@
+"""
+Bundle archive layout: all documents of a (site, keyword, crawl date) in one zip instead
+of one zip per document, so an upload is a few hundred blobs rather than tens of
+thousands.
+
+    data/processed/<site>/<keyword>/bundles/<crawl date>.zip
+        <stem>/<file>               the files of a document, as in its per-document zip
+        <stem>@2/<file>             a later version of a document bundled the same day
+        _manifest/000001.json       manifest written by the first run, ...
+        _manifest/000002.json       ... and the one of each run that appended
+
+Runs append the documents that are new or changed since they were last bundled (see the
+bundle index in data/state) and write a new manifest; the last one describes the whole
+bundle. For each document it holds the content hash and, per file, the member name and
+where its compressed bytes are in the zip, so a consumer can fetch a single document
+with HTTP Range requests (see decode_member) or read it locally with BundleReader.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import shutil
+import struct
+import time
+import zipfile
+import zlib
+
+from src.utils.zipFiles import newest_mtime
+
+BUNDLE_FOLDER = 'bundles'
+MANIFEST_FOLDER = '_manifest'
+MANIFEST_FORMAT = 1
+
+LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+
+def default_bundle_index_path(source_dir: str) -> str:
+    # data/state next to data/raw, like the change manifest
+    return os.path.join(os.path.dirname(os.path.abspath(source_dir)), 'state', 'bundle_index.json')
+
+
+def crawl_date(file_names) -> str:
+    # Day the newest file of the document was written, in local time
+    return time.strftime('%Y-%m-%d', time.localtime(newest_mtime(file_names) or time.time()))
+
+
+def bundle_path(keyword_dir: str, date: str) -> str:
+    return os.path.join(keyword_dir, BUNDLE_FOLDER, date + '.zip')
+
+
+def document_files(file_names):
+    """
+    (name in the document, path or content) of each file of a document, from the listing
+    of zip_files_with_same_names.
+    """
+    for file_name in file_names:
+        if isinstance(file_name, tuple):
+            yield file_name
+        else:
+            yield os.path.basename(file_name), file_name
+
+
+def documents_hash(file_names) -> str:
+    # Digest of every file of a document, generated (name, bytes) entries included
+    digest = hashlib.sha256()
+    for name, source in document_files(file_names):
+        digest.update(name.encode('utf-8') + b'\0')
+        if isinstance(source, bytes):
+            digest.update(source)
+            continue
+        try:
+            with open(source, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        except OSError:
+            continue
+    return digest.hexdigest()
+
+
+def _manifest_names(zf: zipfile.ZipFile) -> list:
+    return sorted(name for name in zf.namelist() if name.startswith(MANIFEST_FOLDER + '/'))
+
+
+def read_manifest(path: str) -> dict:
+    """
+    The latest manifest of a bundle; an empty one for a bundle that does not exist yet.
+    """
+    if not os.path.exists(path):
+        return {'format': MANIFEST_FORMAT, 'documents': {}}
+    with zipfile.ZipFile(path) as zf:
+        names = _manifest_names(zf)
+        if not names:
+            return {'format': MANIFEST_FORMAT, 'documents': {}}
+        return json.loads(zf.read(names[-1]).decode('utf-8'))
+
+
+def _data_offset(f, info: zipfile.ZipInfo) -> int:
+    # The compressed bytes start after the local header, whose extra field may differ from
+    # the central directory's
+    f.seek(info.header_offset)
+    header = LOCAL_HEADER.unpack(f.read(LOCAL_HEADER.size))
+    return info.header_offset + LOCAL_HEADER.size + header[9] + header[10]
+
+
+def append_documents(path: str, documents, site: str, keyword: str, date: str) -> dict:
+    """
+    Adds documents to a bundle, creating it if needed, and writes its new manifest. The
+    bundle is written to a copy that then replaces it, so a run killed halfway leaves the
+    previous bundle intact.
+
+    Args:
+        path (str): Bundle path, see bundle_path.
+        documents (list): (stem, content hash, file names) of each document.
+        site (str): Site folder, e.g. 'ECHA'.
+        keyword (str): Keyword folder.
+        date (str): Crawl date of the bundle, YYYY-MM-DD.
+
+    Returns:
+        dict: The new manifest.
+    """
+    manifest = read_manifest(path)
+    manifest.update(format=MANIFEST_FORMAT, site=site, keyword=keyword, crawl_date=date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    if os.path.exists(path):
+        shutil.copyfile(path, temp_path)
+
+    added = {}
+    with zipfile.ZipFile(temp_path, mode='a' if os.path.exists(path) else 'w') as zf:
+        for stem, digest, file_names in documents:
+            version = manifest['documents'].get(stem, {}).get('version', 0) + 1
+            prefix = stem if version == 1 else f'{stem}@{version}'
+            members = []
+            for name, source in document_files(file_names):
+                member = posixpath.join(prefix, name.replace(os.sep, '/'))
+                try:
+                    if isinstance(source, bytes):
+                        zf.writestr(member, source, compress_type=zipfile.ZIP_DEFLATED)
+                    else:
+                        zf.write(source, member, compress_type=zipfile.ZIP_DEFLATED)
+                except FileNotFoundError:
+                    print(f"Missing file {source} of {stem}")
+                    continue
+                members.append((name, member))
+            added[stem] = (digest, version, members)
+        manifest_name = f"{MANIFEST_FOLDER}/{len(_manifest_names(zf)) + 1:06d}.json"
+
+        # Offsets of the new members, read back from the local headers
+        zf.fp.flush()
+        with open(temp_path, 'rb') as f:
+            for stem, (digest, version, members) in added.items():
+                entries = []
+                for name, member in members:
+                    info = zf.getinfo(member)
+                    entries.append({'file': name, 'name': member, 'data_offset': _data_offset(f, info),
+                                    'compressed_size': info.compress_size, 'size': info.file_size,
+                                    'compression': info.compress_type, 'crc32': info.CRC})
+                manifest['documents'][stem] = {'hash': digest, 'version': version,
+                                               'added': time.strftime('%Y-%m-%dT%H:%M:%S'), 'members': entries}
+        manifest['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        zf.writestr(manifest_name, json.dumps(manifest, ensure_ascii=False, indent=1),
+                    compress_type=zipfile.ZIP_DEFLATED)
+    os.replace(temp_path, path)
+    return manifest
+
+
+def decode_member(data: bytes, entry: dict) -> bytes:
+    """
+    Content of a member from its compressed bytes, e.g. fetched from the blob with a Range
+    request for data_offset .. data_offset + compressed_size - 1 of its manifest entry.
+    """
+    if entry['compression'] == zipfile.ZIP_DEFLATED:
+        data = zlib.decompress(data, -zlib.MAX_WBITS)
+    elif entry['compression'] != zipfile.ZIP_STORED:
+        raise ValueError(f"Unsupported compression {entry['compression']} of {entry['name']}")
+    if zlib.crc32(data) != entry['crc32']:
+        raise ValueError(f"CRC mismatch in {entry['name']}")
+    return data
+
+
+class BundleReader:
+    """
+    Reads single documents of a local bundle through its manifest, without unpacking the
+    rest.
+
+    Args:
+        path (str): Bundle path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.manifest = read_manifest(path)
+        self.file = open(path, 'rb')
+
+    def documents(self) -> list:
+        return list(self.manifest['documents'])
+
+    def files(self, stem: str) -> list:
+        return [entry['file'] for entry in self.manifest['documents'][stem]['members']]
+
+    def read(self, stem: str, file_name: str) -> bytes:
+        """
+        Content of one file of a document, the latest version bundled.
+        """
+        for entry in self.manifest['documents'][stem]['members']:
+            if entry['file'] == file_name:
+                self.file.seek(entry['data_offset'])
+                return decode_member(self.file.read(entry['compressed_size']), entry)
+        raise KeyError(f"{file_name} is not a file of {stem}")
+
+    def read_document(self, stem: str) -> dict:
+        return {file_name: self.read(stem, file_name) for file_name in self.files(stem)}
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_bundle_index(path: str) -> dict:
+    # site -> '<keyword>/<stem>' -> {'hash', 'mtime', 'bundle', 'members'}: where each document
+    # was last bundled
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        print(f'Unreadable bundle index {path}, every document is bundled again')
+        return {}
+
+
+def save_bundle_index(path: str, index: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def bundle_documents(files: dict, destinations: list, dest_dir: str, index_path: str, changed_since=None):
+    """
+    Appends the documents that are new or changed since they were last bundled to the
+    bundle of their (site, keyword, crawl date).
+
+    Args:
+        files (dict): Archive path without '.zip' -> files of the document, from
+            zip_files_with_same_names.
+        destinations (list): Archive folder of each stem, in the order of files.
+        dest_dir (str): Root of the archives.
+        index_path (str): Bundle index, see default_bundle_index_path.
+        changed_since (float, optional): Only look at documents with a file modified after
+            this timestamp.
+
+    Returns:
+        tuple: Paths of the bundles written, and the bundle index.
+    """
+    index = load_bundle_index(index_path)
+    groups = {}
+    for (document, file_names), destination in zip(files.items(), destinations):
+        stem = os.path.basename(document)
+        mtime = newest_mtime(file_names)
+        if changed_since is not None and mtime < changed_since:
+            continue
+        site, keyword = os.path.relpath(destination, dest_dir).split(os.sep)[:2]
+        known = index.get(site, {}).get(posixpath.join(keyword, stem))
+        # Files untouched since they were bundled are not hashed again
+        if known is not None and mtime <= known['mtime']:
+            continue
+        digest = documents_hash(file_names)
+        if known is not None and known['hash'] == digest:
+            known['mtime'] = mtime
+            continue
+        date = crawl_date(file_names)
+        group = groups.setdefault(bundle_path(destination, date), (site, keyword, date, []))
+        group[3].append((stem, digest, file_names, mtime))
+
+    written = []
+    for path, (site, keyword, date, documents) in groups.items():
+        manifest = append_documents(path, [document[:3] for document in documents], site, keyword, date)
+        relative_path = os.path.relpath(path, dest_dir).replace(os.sep, '/')
+        for stem, digest, _, mtime in documents:
+            index.setdefault(site, {})[posixpath.join(keyword, stem)] = {
+                'hash': digest, 'mtime': mtime, 'bundle': relative_path,
+                'members': [entry['name'] for entry in manifest['documents'][stem]['members']]
+            }
+        written.append(path)
+    save_bundle_index(index_path, index)
+    return written, index
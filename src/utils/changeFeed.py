@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import posixpath
+import time
+
+from src.utils.metadataCatalog import MetadataCatalog, keyword_folder_name
+
+# Folder of the change feeds under data/processed, uploaded next to the site folders
+CHANGE_FEED_FOLDER = 'changes'
+
+NEW = 'new'
+MODIFIED = 'modified'
+REMOVED = 'removed'
+
+
+def default_manifest_path(source_dir: str) -> str:
+    # data/state next to data/raw, like the metadata catalog
+    return os.path.join(os.path.dirname(os.path.abspath(source_dir)), 'state', 'change_manifest.json')
+
+
+def files_hash(file_names) -> str:
+    """
+    Digest of a document's files, for documents the catalog has no content hash of.
+    Generated (name, bytes) entries are left out, they are rebuilt from the catalog.
+    """
+    digest = hashlib.sha256()
+    for file_name in file_names:
+        if isinstance(file_name, tuple):
+            file_name = file_name[1]
+            if isinstance(file_name, bytes):
+                continue
+        try:
+            with open(file_name, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        except OSError:
+            continue
+    return digest.hexdigest()
+
+
+def document_snapshot(files: dict, destinations: list, dest_dir: str, catalog_dir: str, bundles=None) -> dict:
+    """
+    Current state of every archived document, from the listing of zip_files_with_same_names.
+
+    Args:
+        files (dict): Archive path without '.zip' -> files of the document.
+        destinations (list): Archive folder of each stem, in the order of files.
+        dest_dir (str): Root of the archives.
+        catalog_dir (str): Root of the metadata catalogs.
+        bundles (dict, optional): Bundle index of the bundle layout, see
+            src/utils/bundleArchive.py; documents in it point to their bundle and members.
+
+    Returns:
+        dict: site -> stem -> {'hash', 'keywords', 'archive'}, plus 'members' for bundled
+            documents.
+    """
+    snapshot = {}
+    catalogs = {}
+    for (document, file_names), destination in zip(files.items(), destinations):
+        stem = os.path.basename(document)
+        site, keyword_folder = os.path.relpath(destination, dest_dir).split(os.sep)[:2]
+        if site not in catalogs:
+            catalogs[site] = MetadataCatalog(site, catalog_dir).records() \
+                if os.path.isdir(os.path.join(catalog_dir, site)) else {}
+        row = catalogs[site].get(stem) or {}
+        keywords = sorted({keyword_folder_name(keyword) for keyword in row.get('keywords') or []} | {keyword_folder})
+        if stem in snapshot.get(site, {}):
+            # Archived under several keywords: one entry, pointing to the first archive
+            snapshot[site][stem]['keywords'] = sorted(set(snapshot[site][stem]['keywords']) | set(keywords))
+            continue
+        snapshot.setdefault(site, {})[stem] = {
+            'hash': row.get('content_hash') or files_hash(file_names),
+            'keywords': keywords,
+            'archive': posixpath.join(site, keyword_folder, stem + '.zip')
+        }
+        bundled = (bundles or {}).get(site, {}).get(posixpath.join(keyword_folder, stem))
+        if bundled is not None:
+            snapshot[site][stem].update(archive=bundled['bundle'], members=bundled['members'])
+    return snapshot
+
+
+def diff_snapshots(previous: dict, current: dict, sites=None) -> list:
+    """
+    Changes between two snapshots, one entry per document that is new, modified (content
+    hash) or removed. Sites outside `sites` are left out, as their documents were not listed.
+    """
+    changes = []
+    for site in sorted(set(previous) | set(current)):
+        if sites and site not in sites:
+            continue
+        before = previous.get(site, {})
+        after = current.get(site, {})
+        for stem in sorted(set(before) | set(after)):
+            old, new = before.get(stem), after.get(stem)
+            if old is None:
+                change = NEW
+            elif new is None:
+                change = REMOVED
+            elif old['hash'] != new['hash']:
+                change = MODIFIED
+            else:
+                continue
+            document = new or old
+            changes.append({
+                'change': change,
+                'site': site,
+                'stem': stem,
+                'keywords': document['keywords'],
+                'archive': document['archive'],
+                'content_hash': new['hash'] if new else None,
+                'previous_hash': old['hash'] if old else None
+            })
+            if 'members' in document:
+                changes[-1]['members'] = document['members']
+    return changes
+
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        print(f'Unreadable change manifest {path}, every document is reported as new')
+        return {}
+
+
+def save_manifest(path: str, manifest: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def changed_documents(files: dict, destinations: list, dest_dir: str, catalog_dir: str, manifest_path: str,
+                      sites=None):
+    """
+    Documents that are new or whose content hash changed since the last change feed, i.e.
+    since they were last archived. Reads the manifest only, write_change_feed moves it
+    forward.
+
+    Returns:
+        tuple: Archive paths (as keyed in files) of the changed documents, and the snapshot
+            taken, to hand to write_change_feed.
+    """
+    current = document_snapshot(files, destinations, dest_dir, catalog_dir)
+    changed = {(change['site'], change['stem']) for change in diff_snapshots(load_manifest(manifest_path), current, sites)
+               if change['change'] != REMOVED}
+    documents = {document for document, destination in zip(files, destinations)
+                 if (os.path.relpath(destination, dest_dir).split(os.sep)[0], os.path.basename(document)) in changed}
+    return documents, current
+
+
+def write_change_feed(files: dict, destinations: list, dest_dir: str, catalog_dir: str, manifest_path: str,
+                      sites=None, run_id: str = None, bundles=None, snapshot=None) -> str:
+    """
+    Writes data/processed/changes/<run_id>.jsonl with the documents that changed since the
+    previous run and moves the manifest of content hashes forward. A run without changes
+    still writes an empty feed, so consumers can tell it ran. With the bundle index of the
+    bundle layout, entries point to the bundle and members of each document. A snapshot
+    already taken by changed_documents is used instead of a new one.
+
+    Returns:
+        str: Path of the feed.
+    """
+    run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+    previous = load_manifest(manifest_path)
+    current = snapshot or document_snapshot(files, destinations, dest_dir, catalog_dir, bundles)
+    changes = diff_snapshots(previous, current, sites)
+
+    feed_dir = os.path.join(dest_dir, CHANGE_FEED_FOLDER)
+    os.makedirs(feed_dir, exist_ok=True)
+    feed_path = os.path.join(feed_dir, f'{run_id}.jsonl')
+    with open(feed_path, 'w', encoding='utf-8') as f:
+        for change in changes:
+            f.write(json.dumps(dict(change, run=run_id), ensure_ascii=False) + '\n')
+
+    # The feed is written first: a run killed in between reports its changes again
+    manifest = {site: documents for site, documents in previous.items() if sites and site not in sites}
+    manifest.update(current)
+    save_manifest(manifest_path, manifest)
+    return feed_path
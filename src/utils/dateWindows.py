@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+from typing import List, Tuple
+
+
+class DateWindow:
+    """
+    Inclusive range of days one search is limited to.
+    """
+
+    def __init__(self, start: date, end: date):
+        self.start = start
+        self.end = end
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    def split(self) -> List['DateWindow']:
+        """
+        Two halves of the window; a single day cannot be split and is returned as is.
+        """
+        if self.days <= 1:
+            return [self]
+        middle = self.start + timedelta(days=self.days // 2 - 1)
+        return [DateWindow(self.start, middle), DateWindow(middle + timedelta(days=1), self.end)]
+
+    def __repr__(self):
+        return f"DateWindow({self.start.isoformat()}, {self.end.isoformat()})"
+
+
+def date_windows(start: date, end: date, days: int) -> List[DateWindow]:
+    """
+    Consecutive windows of `days` days covering start..end, newest first like the results.
+    """
+    windows = []
+    window_end = end
+    while window_end >= start:
+        window_start = max(start, window_end - timedelta(days=days - 1))
+        windows.append(DateWindow(window_start, window_end))
+        window_end = window_start - timedelta(days=1)
+    return windows
+
+
+def window_page_key(window: DateWindow, page_number: int) -> str:
+    # Same shape as results_page_key, so key_in_page_range and replay work per window
+    return f"results-{page_number:04d}-{window.start:%Y%m%d}-{window.end:%Y%m%d}"
+
+
+def dedupe_urls(urls: List[Tuple[str, str, str, str]]) -> List[Tuple[str, str, str, str]]:
+    # Windows share their boundary days with the results of neighbouring searches
+    seen = set()
+    unique = []
+    for item in urls:
+        if item[0] not in seen:
+            seen.add(item[0])
+            unique.append(item)
+    return unique
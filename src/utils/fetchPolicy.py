@@ -0,0 +1,269 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; the queue is then only safe within one process
+    fcntl = None
+
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError, RequestException, Timeout
+
+from src.utils.hostScheduler import parse_retry_after
+
+DEAD_LETTER_DIR = os.path.join('data', 'state', 'dead_letter')
+
+# Statuses worth another attempt; anything else is returned to the caller as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RequestException):
+    """
+    Raised without contacting the host while its circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects requests for
+    `reset_timeout` seconds; then lets a single trial request through, closing again if it
+    succeeds and re-opening if it fails.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class FetchPolicy:
+    """
+    Timeouts, retries with exponential backoff and full jitter, and per-host circuit
+    breakers for the bots' document fetches.
+
+    Args:
+        timeout (tuple): (connect, read) timeout in seconds, used when a request sets none.
+        retries (int): Extra attempts after the first one.
+        backoff (float): Base delay in seconds, doubled on every attempt.
+        max_backoff (float): Upper bound for one delay.
+        failure_threshold (int): Consecutive failures that open a host's circuit.
+        reset_timeout (float): Seconds an open circuit rejects requests.
+    """
+
+    def __init__(self, timeout=(10, 60), retries: int = 4, backoff: float = 1.0, max_backoff: float = 60.0,
+                 failure_threshold: int = 5, reset_timeout: float = 300.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        # host -> (connect, read) timeout overriding `timeout`, set per site by configure()
+        self.host_timeouts = {}
+        self.lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).hostname or ''
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self.breakers[host] = breaker
+            return breaker
+
+    def configure(self, host: str, read_timeout: float):
+        # Read timeout of one host's fetches; the connect timeout stays
+        with self.lock:
+            connect_timeout = self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+            self.host_timeouts[host] = (connect_timeout, read_timeout)
+
+    def timeout_for(self, url: str):
+        return self.host_timeouts.get(urlsplit(url).hostname or '', self.timeout)
+
+    def delay(self, attempt: int, retry_after: float = 0.0) -> float:
+        return max(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)), retry_after)
+
+
+class PolicyAdapter(BaseAdapter):
+    """
+    Transport adapter applying a FetchPolicy around the wrapped adapter.
+
+    Every attempt sends a fresh copy of the request, as wrapped adapters may rewrite it.
+    A response with a retryable status is returned once the retries are used up, so callers
+    still see the status; connection errors and timeouts are raised.
+    """
+
+    def __init__(self, policy: FetchPolicy, inner):
+        super().__init__()
+        self.policy = policy
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.policy.timeout_for(request.url)
+        breaker = self.policy.breaker(request.url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {urlsplit(request.url).hostname}", request=request)
+
+        for attempt in range(self.policy.retries + 1):
+            response, error = None, None
+            try:
+                response = self.inner.send(request.copy(), **kwargs)
+            except (ConnectionError, Timeout) as e:
+                error = e
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                breaker.success()
+                return response
+
+            breaker.failure()
+            if attempt == self.policy.retries or not breaker.allow():
+                break
+            retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else 0.0
+            if response is not None:
+                response.close()
+            time.sleep(self.policy.delay(attempt, retry_after))
+
+        if response is not None:
+            return response
+        raise error
+
+    def close(self):
+        self.inner.close()
+
+
+def _has_policy(adapter, policy: FetchPolicy) -> bool:
+    # The policy may sit below other wrappers, e.g. the ScheduledAdapter of a later bot
+    while adapter is not None:
+        if isinstance(adapter, PolicyAdapter) and adapter.policy is policy:
+            return True
+        adapter = getattr(adapter, 'inner', None)
+    return False
+
+
+def install_policy(session, policy: FetchPolicy):
+    """
+    Applies the policy to every request of a requests.Session, outside the adapters already
+    mounted (so each retry is scheduled again). Installing the same policy twice is a no-op,
+    also when other wrappers were installed on top of it since.
+    """
+    for prefix, adapter in list(session.adapters.items()):
+        if _has_policy(adapter, policy):
+            continue
+        session.mount(prefix, PolicyAdapter(policy, adapter))
+    return session
+
+
+class DeadLetterQueue:
+    """
+    Per-site JSONL list of documents whose fetch failed, retried first by the next run.
+
+    Each line holds the keyword, the kind ('pdf' or 'page'), the (url, date, name,
+    description) tuple the bot works with and the last error. Changes hold a flock on
+    <site>.jsonl.lock, so worker processes of a sharded crawl can share the file.
+
+    Args:
+        site_name (str): Site folder name, e.g. 'ECHA'.
+        root (str): Directory holding one <site>.jsonl file per site.
+    """
+
+    def __init__(self, site_name: str, root: str = DEAD_LETTER_DIR):
+        self.path = os.path.join(root, f"{site_name}.jsonl")
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        # The lock is a file of its own, as take() replaces the queue file
+        with self.lock, open(self.path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def add(self, keyword: str, kind: str, url: str, date: str, name: str, description: str, error):
+        entry = {
+            'keyword': keyword,
+            'kind': kind,
+            'url': url,
+            'date': date,
+            'name': name,
+            'description': description,
+            'error': str(error),
+            'failed_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        with self._locked():
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def _read(self) -> list:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        return entries
+
+    def take(self, keyword: str):
+        """
+        Removes the keyword's entries from the queue; failing again re-adds them.
+
+        Returns:
+            tuple: (pdf urls, page urls) as lists of (url, date, name, description).
+        """
+        with self._locked():
+            entries = self._read()
+            taken = [entry for entry in entries if entry['keyword'] == keyword]
+            if not taken:
+                return [], []
+            kept = [entry for entry in entries if entry['keyword'] != keyword]
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + '\n' for entry in kept)
+            os.replace(temp_path, self.path)
+
+        pdf_urls, page_urls = [], []
+        seen = set()
+        for entry in taken:
+            if (entry['kind'], entry['url']) in seen:
+                continue
+            seen.add((entry['kind'], entry['url']))
+            item = (entry['url'], entry['date'], entry['name'], entry['description'])
+            (pdf_urls if entry['kind'] == 'pdf' else page_urls).append(item)
+        return pdf_urls, page_urls
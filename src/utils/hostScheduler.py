@@ -0,0 +1,205 @@
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from requests.adapters import BaseAdapter
+
+# Statuses meaning "slow down"
+THROTTLE_STATUSES = {429, 503}
+
+
+def parse_retry_after(value) -> float:
+    """
+    Seconds to wait from a Retry-After header (delta seconds or HTTP date), 0 if absent.
+    """
+    if not value:
+        return 0.0
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class HostLimiter:
+    """
+    Politeness state of one host: a token bucket for the request rate, a cap on requests in
+    flight and a pause set by Retry-After.
+
+    The rate adapts AIMD style: it grows by `increase` requests/s after every fast success and
+    is multiplied by `decrease` on 429/503, connection errors or responses slower than
+    `slow_latency`.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: float = 4.0, concurrency: int = 2,
+                 min_rate: float = 0.2, max_rate: float = 10.0, increase: float = 0.1,
+                 decrease: float = 0.5, slow_latency: float = 5.0):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_latency = slow_latency
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.in_flight < self.concurrency and now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                if self.in_flight >= self.concurrency:
+                    # Woken by release()
+                    self.condition.wait()
+                else:
+                    wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+                    self.condition.wait(max(wait, 0.001))
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def observe(self, status: int = None, latency: float = 0.0, retry_after: float = 0.0):
+        """
+        Adapts the rate from one finished request; status None means the request failed.
+        """
+        with self.condition:
+            if status in THROTTLE_STATUSES or status is None or latency > self.slow_latency:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                # Do not let a full bucket burst right after a throttle response
+                self.tokens = min(self.tokens, 1.0)
+            elif status < 400:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            if retry_after > 0:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self.condition.notify_all()
+
+
+class HostScheduler:
+    """
+    Per-host politeness for every outbound fetch of the bots.
+
+    Args:
+        host_settings (dict, optional): host -> HostLimiter keyword arguments, overriding
+            the defaults for that host.
+        **defaults: HostLimiter keyword arguments for every other host.
+    """
+
+    def __init__(self, host_settings: dict = None, **defaults):
+        self.host_settings = host_settings or {}
+        self.defaults = defaults
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).hostname or ''
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = HostLimiter(**{**self.defaults, **self.host_settings.get(host, {})})
+                self.limiters[host] = limiter
+            return limiter
+
+    def configure(self, host: str, **settings):
+        """
+        Overrides HostLimiter arguments for one host, e.g. from a site profile; the host's
+        limiter starts over with them.
+        """
+        with self.lock:
+            self.host_settings[host] = {**self.host_settings.get(host, {}), **settings}
+            self.limiters.pop(host, None)
+
+    @contextmanager
+    def slot(self, url: str):
+        """
+        Waits until the host of `url` may be fetched and holds one of its slots meanwhile.
+        Used around Selenium navigations; HTTP fetches go through ScheduledAdapter.
+        """
+        limiter = self.limiter(url)
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            yield limiter
+        except Exception:
+            limiter.observe(None, time.monotonic() - started)
+            raise
+        else:
+            limiter.observe(200, time.monotonic() - started)
+        finally:
+            limiter.release()
+
+    def rates(self) -> dict:
+        with self.lock:
+            return {host: round(limiter.rate, 3) for host, limiter in self.limiters.items()}
+
+
+class ScheduledAdapter(BaseAdapter):
+    """
+    Transport adapter that passes each request through the scheduler before handing it to
+    the wrapped adapter (a plain, recording or replay adapter).
+    """
+
+    def __init__(self, scheduler: HostScheduler, inner):
+        super().__init__()
+        self.scheduler = scheduler
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        # The wrapped adapter may rewrite request.url (replay), so pick the limiter first
+        limiter = self.scheduler.limiter(request.url)
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = self.inner.send(request, **kwargs)
+        except Exception:
+            limiter.observe(None, time.monotonic() - started)
+            raise
+        finally:
+            limiter.release()
+        limiter.observe(response.status_code, time.monotonic() - started,
+                        parse_retry_after(response.headers.get('Retry-After')))
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+def _has_scheduler(adapter, scheduler: HostScheduler) -> bool:
+    # The scheduler may sit below other wrappers, e.g. the PolicyAdapter of a fetch policy
+    while adapter is not None:
+        if isinstance(adapter, ScheduledAdapter) and adapter.scheduler is scheduler:
+            return True
+        adapter = getattr(adapter, 'inner', None)
+    return False
+
+
+def install_scheduler(session, scheduler: HostScheduler):
+    """
+    Routes every request of a requests.Session through the scheduler, keeping the adapters
+    already mounted on it. Installing the same scheduler twice is a no-op, also when other
+    wrappers were installed on top of it since.
+    """
+    for prefix, adapter in list(session.adapters.items()):
+        if _has_scheduler(adapter, scheduler):
+            continue
+        session.mount(prefix, ScheduledAdapter(scheduler, adapter))
+    return session
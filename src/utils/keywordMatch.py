@@ -0,0 +1,56 @@
+import re
+import unicodedata
+from typing import List
+
+from lxml import html as lxml_html
+
+# Folder of the documents a combined search found that match none of its keywords locally
+UNCLASSIFIED_KEYWORD = '_unclassified'
+
+# Word endings a match may add to a keyword word, e.g. 'Water' -> 'waters'
+MAX_SUFFIX = 2
+
+
+def normalize_words(text: str) -> List[str]:
+    """
+    Lower-cased words of a text with diacritics removed, so that 'Atık' and 'atik' match.
+    """
+    # The Turkish dotless i has no decomposition, fold it by hand
+    text = unicodedata.normalize('NFKD', (text or '').casefold().replace('ı', 'i'))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r'\w+', text)
+
+
+def or_query(keywords: List[str]) -> str:
+    """
+    One boolean query finding what any of the keywords finds, multi-word keywords quoted.
+    """
+    terms = [f'"{keyword}"' if ' ' in keyword.strip() else keyword.strip() for keyword in keywords]
+    return ' OR '.join(terms)
+
+
+def keyword_matches(keyword: str, words: set) -> bool:
+    # Every word of the keyword has to occur, possibly with a short ending
+    for keyword_word in normalize_words(keyword):
+        if not any(word.startswith(keyword_word) and len(word) - len(keyword_word) <= MAX_SUFFIX for word in words):
+            return False
+    return True
+
+
+def classify(text: str, keywords: List[str]) -> List[str]:
+    """
+    The keywords whose words all occur in the text, in the order given.
+    """
+    words = set(normalize_words(text))
+    return [keyword for keyword in keywords if keyword_matches(keyword, words)]
+
+
+def html_text(content: bytes) -> str:
+    # Visible text of a fetched page, empty if it does not parse
+    try:
+        document = lxml_html.fromstring(content)
+    except Exception:
+        return ''
+    for element in document.xpath('//script|//style'):
+        element.drop_tree()
+    return document.text_content()
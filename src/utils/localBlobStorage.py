@@ -0,0 +1,61 @@
+import os
+import shutil
+
+
+class LocalBlobClient:
+    """
+    Filesystem stand-in for azure.storage.blob.BlobClient, covering what upload_blob needs.
+    """
+
+    def __init__(self, root: str, container: str, blob: str):
+        self.path = os.path.join(root, container, blob)
+
+    def get_blob_properties(self):
+        if not os.path.isfile(self.path):
+            raise FileNotFoundError(self.path)
+        return {'name': self.path, 'size': os.path.getsize(self.path)}
+
+    def upload_blob(self, data, content_settings=None, overwrite=False):
+        if os.path.exists(self.path) and not overwrite:
+            raise FileExistsError(self.path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'wb') as f:
+            if isinstance(data, (bytes, bytearray)):
+                f.write(data)
+            else:
+                shutil.copyfileobj(data, f)
+
+
+class LocalContainerClient:
+    """
+    Filesystem stand-in for azure.storage.blob.ContainerClient.
+    """
+
+    def __init__(self, root: str, container: str):
+        self.path = os.path.join(root, container)
+
+    def get_container_properties(self):
+        if not os.path.isdir(self.path):
+            raise FileNotFoundError(self.path)
+        return {'name': self.path}
+
+    def create_container(self):
+        os.makedirs(self.path, exist_ok=True)
+
+
+class LocalBlobServiceClient:
+    """
+    Filesystem stand-in for azure.storage.blob.BlobServiceClient.
+
+    Blobs are written to <root>/<container>/<blob name>, so uploads can be run and
+    timed without an Azure account or network.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def get_container_client(self, container):
+        return LocalContainerClient(self.root, container)
+
+    def get_blob_client(self, container, blob):
+        return LocalBlobClient(self.root, container, blob)
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import threading
+
+CATALOG_DIR = os.path.join('data', 'catalog')
+
+COLUMNS = ['stem', 'name', 'date', 'url', 'notified_country', 'keywords', 'content_hash', 'outputs']
+
+
+def keyword_folder_name(keyword: str) -> str:
+    return keyword.replace(':', '').replace(' ', '_')
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest() if content is not None else None
+
+
+def _merge(records) -> dict:
+    """
+    Folds journal records into one row per document stem; later records win, keywords and
+    output paths accumulate.
+    """
+    rows = {}
+    for record in records:
+        row = rows.get(record['stem'])
+        if row is None:
+            rows[record['stem']] = {column: record.get(column) for column in COLUMNS}
+            rows[record['stem']]['keywords'] = list(record.get('keywords') or [])
+            rows[record['stem']]['outputs'] = list(record.get('outputs') or [])
+            continue
+        for column in COLUMNS:
+            value = record.get(column)
+            if column in ('keywords', 'outputs'):
+                row[column].extend(item for item in value or [] if item not in row[column])
+            elif value is not None:
+                row[column] = value
+    return rows
+
+
+class MetadataCatalog:
+    """
+    Per-site document catalog: one row per document with name, date, URL, keywords,
+    content hash and output paths.
+
+    Bots append to a JSONL journal (one short line per document, no directory churn);
+    compact() folds the journal into a Parquet file so that loading the whole catalog is a
+    single columnar read.
+
+    Args:
+        site_name (str): Site folder name, e.g. 'ECHA'.
+        root (str): Directory holding one sub folder per site.
+        writer (OutputWriter, optional): Background writer the journal lines are handed to.
+    """
+
+    def __init__(self, site_name: str, root: str = CATALOG_DIR, writer=None):
+        self.site_name = site_name
+        self.folder = os.path.join(root, site_name)
+        self.journal_path = os.path.join(self.folder, 'journal.jsonl')
+        self.parquet_path = os.path.join(self.folder, 'catalog.parquet')
+        self.lock = threading.Lock()
+        self.writer = writer
+        os.makedirs(self.folder, exist_ok=True)
+
+    def append(self, stem: str, name: str, date: str, url: str, keyword: str, content: bytes = None,
+               outputs=None, notified_country=None):
+        """
+        Records one document.
+
+        Args:
+            stem (str): File name stem shared by the document's outputs.
+            name (str): Document name.
+            date (str): Document date, YYYY-MM-DD.
+            url (str): Source URL.
+            keyword (str): Keyword the document was found for.
+            content (bytes, optional): Downloaded content, hashed for change detection.
+            outputs (list, optional): Paths of the files written for the document.
+            notified_country (str, optional): Notifying country, when the site provides it.
+        """
+        record = {
+            'stem': stem,
+            'name': name,
+            'date': date,
+            'url': url,
+            'notified_country': notified_country,
+            'keywords': [keyword],
+            'content_hash': content_hash(content),
+            'outputs': [path for path in outputs or [] if path]
+        }
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        if self.writer is not None:
+            self.writer.append_text(self.journal_path, line)
+            return
+        with self.lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                journal.write(line)
+
+    def _read_journal(self) -> list:
+        if not os.path.exists(self.journal_path):
+            return []
+        records = []
+        with open(self.journal_path, 'r', encoding='utf-8') as journal:
+            for line in journal:
+                line = line.strip()
+                if line:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A run killed mid-write leaves a partial last line
+                        continue
+        return records
+
+    def _read_parquet(self) -> list:
+        if not os.path.exists(self.parquet_path):
+            return []
+        import pandas as pd
+
+        frame = pd.read_parquet(self.parquet_path)
+        records = frame.to_dict('records')
+        for record in records:
+            record['keywords'] = list(record['keywords'])
+            record['outputs'] = list(record['outputs'])
+        return records
+
+    def records(self) -> dict:
+        """
+        Returns:
+            dict: stem -> row, combining the compacted catalog and the pending journal.
+        """
+        return _merge(self._read_parquet() + self._read_journal())
+
+    def load(self):
+        """
+        Returns:
+            pandas.DataFrame: The whole catalog, one row per document.
+        """
+        return self._frame(self.records())
+
+    def compact(self):
+        """
+        Folds the journal into the Parquet file and empties the journal.
+        """
+        with self.lock:
+            journal = self._read_journal()
+            if not journal:
+                return
+            frame = self._frame(_merge(self._read_parquet() + journal))
+            temp_path = self.parquet_path + '.tmp'
+            frame.to_parquet(temp_path, index=False)
+            os.replace(temp_path, self.parquet_path)
+            os.remove(self.journal_path)
+
+    @staticmethod
+    def _frame(rows: dict):
+        import pandas as pd
+
+        return pd.DataFrame(list(rows.values()), columns=COLUMNS)
+
+
+def compact_catalogs(root: str = CATALOG_DIR):
+    if not os.path.isdir(root):
+        return
+    for site_name in os.listdir(root):
+        if os.path.isdir(os.path.join(root, site_name)):
+            MetadataCatalog(site_name, root).compact()
+
+
+def metadata_by_folder(catalog_root: str, site_name: str) -> dict:
+    """
+    Indexes a site's catalog by (keyword folder, stem), in the shape of the former
+    metadata_<stem>.json files, for consumers that still expect one record per folder.
+    """
+    if not os.path.isdir(os.path.join(catalog_root, site_name)):
+        return {}
+    by_folder = {}
+    for stem, row in MetadataCatalog(site_name, catalog_root).records().items():
+        for keyword in row['keywords']:
+            by_folder[(keyword_folder_name(keyword), stem)] = {
+                "name": row['name'],
+                "notified_date": row['date'],
+                "notified_country": row['notified_country'],
+                "URL": row['url'],
+                "keyword": keyword,
+                "content_hash": row['content_hash']
+            }
+    return by_folder
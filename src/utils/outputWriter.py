@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+
+# Item kinds handled by the writer thread
+WRITE = 'write'
+APPEND = 'append'
+CALL = 'call'
+
+
+class OutputWriter:
+    """
+    Background writer for scraper outputs.
+
+    Scraping threads hand records over a queue and return immediately; a single writer
+    thread drains the queue in batches, creates each directory once, writes files atomically
+    (temp file + rename), merges appends to the same file into one open per batch and runs
+    queued callables (e.g. columnar table exports) off the scraping thread.
+
+    Args:
+        batch_size (int): Most records handled per batch.
+        max_queue (int): Queue bound; producers only wait when the writer is this far behind.
+    """
+
+    def __init__(self, batch_size: int = 256, max_queue: int = 10000):
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.created_dirs = set()
+        self.errors = []
+        self.written = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='OutputWriter', daemon=True)
+        self.thread.start()
+
+    def write_bytes(self, path: str, data: bytes):
+        self._put((WRITE, path, data))
+
+    def write_text(self, path: str, text: str, encoding: str = 'utf-8'):
+        self._put((WRITE, path, text.encode(encoding)))
+
+    def append_text(self, path: str, text: str, encoding: str = 'utf-8'):
+        self._put((APPEND, path, text.encode(encoding)))
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Runs function(*args, **kwargs) on the writer thread, in order with the other records.
+        """
+        self._put((CALL, function, (args, kwargs)))
+
+    def _put(self, item):
+        if self.closed:
+            raise RuntimeError("OutputWriter is closed")
+        self.queue.put(item)
+
+    def flush(self):
+        """
+        Blocks until every record queued so far is on disk.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Flushes and stops the writer thread. Errors met while writing are printed.
+        """
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        for path, error in self.errors:
+            print(f"Could not write {path}: {error}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                # close() queues the stop marker last
+                stopping = True
+            try:
+                self._write_batch([item for item in batch if item is not None])
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write_batch(self, batch):
+        appends = {}
+        for kind, target, payload in batch:
+            if kind == APPEND:
+                # Merged per file, in queue order, and written once at the end of the batch
+                appends.setdefault(target, []).append(payload)
+                continue
+            try:
+                if kind == WRITE:
+                    self._write_atomic(target, payload)
+                else:
+                    args, kwargs = payload
+                    target(*args, **kwargs)
+                self.written += 1
+            except Exception as e:
+                self.errors.append((target if kind == WRITE else getattr(target, '__name__', target), e))
+        self._flush_appends(appends)
+
+    def _flush_appends(self, appends: dict):
+        for path, chunks in appends.items():
+            try:
+                self._ensure_dir(path)
+                with open(path, 'ab') as f:
+                    f.write(b''.join(chunks))
+                self.written += len(chunks)
+            except Exception as e:
+                self.errors.append((path, e))
+
+    def _ensure_dir(self, path: str):
+        directory = os.path.dirname(path)
+        if directory and directory not in self.created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self.created_dirs.add(directory)
+
+    def _write_atomic(self, path: str, data: bytes):
+        self._ensure_dir(path)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
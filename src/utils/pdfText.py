@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+PDF_TEXT_FOLDER = 'pdftext'
+PDF_TEXT_EXTENSION = '.pdf.txt'
+# pdf path -> size, mtime and SHA-256 of the PDF its text output was last written from
+EXTRACTED_STATE = 'extracted.json'
+
+
+def find_pdf_files(raw_dir: str):
+    """
+    Lists (pdf path, text output path) for every file in the bots' pdf folders.
+
+    The text goes to <keyword>/pdftext/<stem>.pdf.txt next to the other per-document outputs.
+    """
+    jobs = []
+    for website_folder in os.listdir(raw_dir):
+        website_path = os.path.join(raw_dir, website_folder)
+        if not os.path.isdir(website_path):
+            continue
+        for keyword_folder in os.listdir(website_path):
+            pdf_folder = os.path.join(website_path, keyword_folder, 'pdf')
+            if not os.path.isdir(pdf_folder):
+                continue
+            text_folder = os.path.join(website_path, keyword_folder, PDF_TEXT_FOLDER)
+            for file in os.listdir(pdf_folder):
+                stem = file[:-4] if file.lower().endswith('.pdf') else file
+                jobs.append((os.path.join(pdf_folder, file), os.path.join(text_folder, stem + PDF_TEXT_EXTENSION)))
+    return jobs
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def extract_pdf_text(pdf_path: str) -> str:
+    # Imported here so that the archive stage can use the folder constants without PyPDF2
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(pdf_path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def _process_pdf(job):
+    """
+    Worker: hashes one PDF, reuses the cached text when the content was seen before and
+    parses it otherwise. The output is left untouched when it was written from the same
+    content, so that its mtime only changes with the PDF. Returns (status, pdf path, SHA-256,
+    error message).
+    """
+    pdf_path, output_path, cache_dir, previous_digest = job
+    digest = None
+    try:
+        digest = file_digest(pdf_path)
+        if digest == previous_digest and os.path.exists(output_path):
+            return 'cached', pdf_path, digest, None
+        cache_path = os.path.join(cache_dir, digest[:2], digest + '.txt')
+        if os.path.exists(cache_path):
+            # Replaces an output of an older version of the PDF
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            temp_path = f"{output_path}.{os.getpid()}.tmp"
+            shutil.copyfile(cache_path, temp_path)
+            os.replace(temp_path, output_path)
+            return 'cached', pdf_path, digest, None
+
+        text = extract_pdf_text(pdf_path)
+        _write_atomic(cache_path, text)
+        _write_atomic(output_path, text)
+        return 'extracted', pdf_path, digest, None
+    except Exception as e:
+        return 'failed', pdf_path, digest, str(e)
+
+
+def _load_extracted(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def _save_extracted(path: str, extracted: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(extracted, f)
+    os.replace(temp_path, path)
+
+
+def extract_pdf_texts(raw_dir: str, cache_dir: str, max_workers: int = None) -> dict:
+    """
+    Extracts the text of every scraped PDF in a process pool.
+
+    Results are cached by the SHA-256 of the PDF content, so PDFs that were already parsed
+    (in this or an earlier run, under any name) are never parsed again. PDFs whose size and
+    mtime did not change since their text was written are not even hashed again.
+
+    Args:
+        raw_dir (str): The data/raw directory the bots write to.
+        cache_dir (str): Directory of the content-hash keyed text cache.
+        max_workers (int, optional): Worker processes, defaults to the CPU count.
+
+    Returns:
+        dict: Number of PDFs per status ('extracted', 'cached', 'unchanged', 'failed').
+    """
+    if not os.path.isdir(raw_dir):
+        return {}
+    state_path = os.path.join(cache_dir, EXTRACTED_STATE)
+    previous = _load_extracted(state_path)
+    extracted = {}
+    stats = {'extracted': 0, 'cached': 0, 'unchanged': 0, 'failed': 0}
+    jobs = []
+    sizes = {}
+    for pdf_path, output_path in find_pdf_files(raw_dir):
+        stat = os.stat(pdf_path)
+        sizes[pdf_path] = [stat.st_size, stat.st_mtime_ns]
+        known = previous.get(pdf_path)
+        if known is not None and known[:2] == sizes[pdf_path] and os.path.exists(output_path):
+            extracted[pdf_path] = known
+            stats['unchanged'] += 1
+            continue
+        jobs.append((pdf_path, output_path, cache_dir, known[2] if known else None))
+    if jobs:
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for status, pdf_path, digest, error in executor.map(_process_pdf, jobs, chunksize=chunksize):
+                stats[status] += 1
+                if error:
+                    print(f"Could not extract text from {pdf_path}: {error}")
+                else:
+                    extracted[pdf_path] = sizes[pdf_path] + [digest]
+    if extracted != previous:
+        _save_extracted(state_path, extracted)
+    return stats
@@ -0,0 +1,270 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; downloads are then only safe within one process
+    fcntl = None
+
+from requests.exceptions import ChunkedEncodingError, ConnectionError, RequestException, Timeout
+
+# Partial downloads (<sha1 of the URL>.part), their state (.json) and lock (.lock), kept across runs
+PARTIAL_DIR = os.path.join('data', 'state', 'partial')
+
+READ_SIZE = 1 << 16
+# Files at least this large are fetched in PARALLEL_PARTS ranges at once, where the server allows
+PARALLEL_THRESHOLD = 32 * 1024 * 1024
+PARALLEL_PARTS = 4
+# Resumes within one download after a dropped connection; the partial file outlives the run
+MAX_RESUMES = 5
+
+BROKEN_CONNECTION = (ChunkedEncodingError, ConnectionError, Timeout)
+
+# Sent with every request: lengths and ranges are counted in bytes of the file itself, and
+# iter_content would decode a gzip/deflate body into a different number of bytes
+IDENTITY = {'Accept-Encoding': 'identity'}
+
+
+class DownloadError(RequestException):
+    """
+    A download that could not be completed or verified. With restart set the part file is
+    of no use (the file changed on the server or does not verify) and is discarded.
+    """
+
+    def __init__(self, *args, restart: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.restart = restart
+
+
+def partial_paths(url: str, root: str = PARTIAL_DIR):
+    name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(root, name + '.part'), os.path.join(root, name + '.json')
+
+
+def content_range(value: str):
+    """
+    (first byte, total length) of a 'bytes 100-199/1000' Content-Range; the total is None
+    for '*'.
+    """
+    match = re.match(r'bytes\s+(\d+)-\d+/(\d+|\*)', value or '')
+    if match is None:
+        return None, None
+    return int(match.group(1)), int(match.group(2)) if match.group(2) != '*' else None
+
+
+def expected_digest(headers):
+    """
+    (hashlib algorithm, base64 digest) the server announces for the whole file: Repr-Digest
+    (RFC 9530), Digest (RFC 3230) or Content-MD5; None if it announces none we can check.
+    """
+    for header in ('Repr-Digest', 'Digest'):
+        for item in (headers.get(header) or '').split(','):
+            algorithm, _, value = item.strip().partition('=')
+            algorithm = {'sha-256': 'sha256', 'sha-512': 'sha512', 'md5': 'md5'}.get(algorithm.lower())
+            if algorithm and value:
+                return algorithm, value.strip(':')
+    if headers.get('Content-MD5'):
+        return 'md5', headers['Content-MD5'].strip()
+    return None
+
+
+def _load_state(state_path: str, part_path: str, url: str):
+    if not (os.path.exists(state_path) and os.path.exists(part_path)):
+        return None
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except ValueError:
+        return None
+    return state if state.get('url') == url else None
+
+
+def _save_state(state_path: str, state: dict):
+    temp_path = state_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(temp_path, state_path)
+
+
+def _discard(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _validator(headers):
+    # Sent as If-Range, so that a file changed since the partial download comes back whole
+    return headers.get('ETag') or headers.get('Last-Modified')
+
+
+def _range_headers(state: dict, first: int, last: int = None) -> dict:
+    headers = dict(IDENTITY, Range=f"bytes={first}-{'' if last is None else last}")
+    if state.get('validator'):
+        headers['If-Range'] = state['validator']
+    return headers
+
+
+def _stream(url: str, session, part_path: str, state_path: str, state: dict, max_resumes: int,
+            parallel_threshold: int, parts: int) -> bool:
+    """
+    Fetches the file into part_path in one stream, resuming from the bytes on disk. Returns
+    True when a large file should rather be fetched in parallel ranges.
+    """
+    resumes = 0
+    while True:
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if state['length'] is not None and offset >= state['length']:
+            return False
+        try:
+            headers = _range_headers(state, offset) if offset else dict(IDENTITY)
+            with session.get(url, headers=headers, stream=True) as response:
+                response.raise_for_status()
+                if response.status_code == 206:
+                    first, total = content_range(response.headers.get('Content-Range'))
+                    if first != offset:
+                        raise DownloadError(f'Range from {offset} answered from {first}', response=response, restart=True)
+                    state['length'] = total if total is not None else state['length']
+                else:
+                    # A new download, or the server ignored the range or the file changed
+                    offset = 0
+                    length = response.headers.get('Content-Length')
+                    state.update(length=int(length) if length and length.isdigit() else None,
+                                 validator=_validator(response.headers), digest=expected_digest(response.headers),
+                                 ranges='bytes' in response.headers.get('Accept-Ranges', ''))
+                    _save_state(state_path, state)
+                    if state['ranges'] and parts > 1 and (state['length'] or 0) >= parallel_threshold:
+                        return True
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for block in response.iter_content(READ_SIZE):
+                        f.write(block)
+        except BROKEN_CONNECTION as e:
+            resumes += 1
+            if resumes > max_resumes:
+                raise DownloadError(f'Download of {url} broke off {resumes} times: {e}') from e
+            continue
+        # Without an error, a body shorter than announced still needs the rest
+        size = os.path.getsize(part_path)
+        if state['length'] is None or size >= state['length']:
+            return False
+        resumes += 1
+        if resumes > max_resumes:
+            raise DownloadError(f'Download of {url} stopped at {size} of {state["length"]} bytes')
+
+
+def _fetch_parts(url: str, session, part_path: str, state_path: str, state: dict, parts: int, max_resumes: int):
+    """
+    Fetches the file in parallel ranges into a part file of its full length; each range
+    resumes from its own progress, which the state keeps across runs.
+    """
+    length = state['length']
+    if not state.get('chunks'):
+        size = -(-length // parts)
+        state['chunks'] = [[start, min(start + size, length) - 1, 0] for start in range(0, length, size)]
+        with open(part_path, 'wb') as f:
+            f.truncate(length)
+        _save_state(state_path, state)
+    lock = threading.Lock()
+
+    def fetch(chunk):
+        start, end = chunk[0], chunk[1]
+        resumes = 0
+        while chunk[2] < end - start + 1:
+            position = start + chunk[2]
+            try:
+                with session.get(url, headers=_range_headers(state, position, end), stream=True) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206 or content_range(response.headers.get('Content-Range'))[0] != position:
+                        raise DownloadError(f'{url} changed or ignored the range request', response=response, restart=True)
+                    with open(part_path, 'r+b') as f:
+                        f.seek(position)
+                        for block in response.iter_content(READ_SIZE):
+                            block = block[:end - start + 1 - chunk[2]]
+                            f.write(block)
+                            chunk[2] += len(block)
+            except BROKEN_CONNECTION as e:
+                resumes += 1
+                if resumes > max_resumes:
+                    raise DownloadError(f'Range {start}-{end} of {url} broke off {resumes} times: {e}') from e
+            finally:
+                with lock:
+                    _save_state(state_path, state)
+
+    with ThreadPoolExecutor(max_workers=len(state['chunks'])) as executor:
+        for future in [executor.submit(fetch, chunk) for chunk in state['chunks']]:
+            future.result()
+
+
+def verify(content: bytes, state: dict):
+    """
+    Raises DownloadError if the content does not have the announced length or digest.
+    """
+    if state.get('length') is not None and len(content) != state['length']:
+        raise DownloadError(f"{state['url']}: got {len(content)} of {state['length']} bytes", restart=True)
+    if state.get('digest'):
+        algorithm, expected = state['digest']
+        actual = hashlib.new(algorithm, content).digest()
+        for decode in (base64.b64decode, bytes.fromhex):
+            try:
+                if decode(expected) == actual:
+                    return
+            except ValueError:
+                continue
+        raise DownloadError(f"{state['url']}: {algorithm} digest does not match", restart=True)
+
+
+def download(session, url: str, root: str = PARTIAL_DIR, parallel_threshold: int = PARALLEL_THRESHOLD,
+             parts: int = PARALLEL_PARTS, max_resumes: int = MAX_RESUMES) -> bytes:
+    """
+    Downloads a file through a part file that survives broken connections and runs: a
+    dropped connection is resumed with a Range request from the bytes already on disk,
+    large files are fetched in parallel ranges, and the result is checked against the
+    announced length and digest before it is returned.
+
+    Args:
+        session (requests.Session): Session of the bot, with its scheduler and fetch policy.
+        url (str): URL of the file.
+        root (str): Directory of the part files.
+        parallel_threshold (int): Size in bytes from which the file is fetched in parallel ranges.
+        parts (int): Ranges fetched at once for large files; 1 for a single stream.
+        max_resumes (int): Resumes within this call before giving up.
+
+    Returns:
+        bytes: The complete file.
+
+    Raises:
+        DownloadError: The download broke off too often or failed verification; the part
+            file is kept so that the next attempt resumes it, unless it is corrupt.
+    """
+    os.makedirs(root, exist_ok=True)
+    part_path, state_path = partial_paths(url, root)
+    # Workers of a sharded crawl may fetch the same file; the second waits for the first
+    # rather than truncate its part file, then downloads it again
+    with open(os.path.splitext(part_path)[0] + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        state = _load_state(state_path, part_path, url)
+        if state is None:
+            _discard(part_path, state_path)
+            state = {'url': url, 'length': None, 'validator': None, 'digest': None, 'ranges': False}
+
+        try:
+            if state.get('chunks') or _stream(url, session, part_path, state_path, state, max_resumes,
+                                              parallel_threshold, parts):
+                _fetch_parts(url, session, part_path, state_path, state, parts, max_resumes)
+            with open(part_path, 'rb') as f:
+                content = f.read()
+            verify(content, state)
+        except DownloadError as e:
+            if e.restart:
+                _discard(part_path, state_path)
+            raise
+        _discard(part_path, state_path)
+        return content
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class FixtureArchive:
+    """
+    Directory-backed store of recorded HTTP responses and Selenium page snapshots.
+
+    Layout:
+        <root>/index.json        URL -> response record, site/keyword/key -> page record
+        <root>/bodies/<sha1>     raw response bodies
+        <root>/pages/<sha1>.html page sources captured from the browser
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+        self.lock = threading.Lock()
+        self.responses = {}
+        self.pages = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.responses = index.get('responses', {})
+            self.pages = index.get('pages', {})
+
+    def _write_blob(self, folder: str, data: bytes, suffix: str = '') -> str:
+        digest = hashlib.sha1(data).hexdigest()
+        relative_path = os.path.join(folder, digest + suffix)
+        path = os.path.join(self.root, relative_path)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        return relative_path
+
+    def add_response(self, url: str, status: int, content_type: str, body: bytes):
+        body_path = self._write_blob('bodies', body)
+        with self.lock:
+            self.responses[url] = {
+                'status': status,
+                'content_type': content_type,
+                'body': body_path
+            }
+
+    def get_response(self, url: str):
+        """
+        Returns (status, content_type, body) for a recorded URL, or None.
+        """
+        record = self.responses.get(url)
+        if record is None:
+            return None
+        with open(os.path.join(self.root, record['body']), 'rb') as f:
+            body = f.read()
+        return record['status'], record['content_type'], body
+
+    def add_page(self, site: str, keyword: str, key: str, url: str, html: str):
+        page_path = self._write_blob('pages', html.encode('utf-8'), '.html')
+        with self.lock:
+            self.pages.setdefault(site, {}).setdefault(keyword, {})[key] = {
+                'url': url,
+                'path': page_path
+            }
+
+    def page_keys(self, site: str, keyword: str, prefix: str = ''):
+        keys = self.pages.get(site, {}).get(keyword, {}).keys()
+        return sorted(key for key in keys if key.startswith(prefix))
+
+    def get_page_path(self, site: str, keyword: str, key: str):
+        record = self.pages.get(site, {}).get(keyword, {}).get(key)
+        if record is None:
+            return None
+        return os.path.join(self.root, record['path'])
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self.lock:
+            index = {'responses': self.responses, 'pages': self.pages}
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(temp_path, self.index_path)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Transport adapter that performs real requests and stores every response in the archive.
+    """
+
+    def __init__(self, archive: FixtureArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.archive.add_response(request.url, response.status_code,
+                                  response.headers.get('Content-Type', 'application/octet-stream'),
+                                  response.content)
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    Transport adapter that redirects every request to the local replay server.
+    """
+
+    def __init__(self, server: 'ReplayServer', **kwargs):
+        super().__init__(**kwargs)
+        self.server = server
+
+    def send(self, request, **kwargs):
+        request.url = self.server.fixture_url(request.url)
+        return super().send(request, **kwargs)
+
+
+class _ReplayRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        replay_server = self.server.replay_server
+        parts = urlsplit(self.path)
+
+        if parts.path == '/fixture':
+            url = parse_qs(parts.query).get('url', [''])[0]
+            recorded = replay_server.archive.get_response(url)
+        elif parts.path.startswith('/pages/'):
+            _, _, site, keyword, key = parts.path.split('/', 4)
+            page_path = replay_server.archive.get_page_path(unquote(site), unquote(keyword), unquote(key))
+            recorded = None
+            if page_path is not None:
+                with open(page_path, 'rb') as f:
+                    recorded = (200, 'text/html; charset=utf-8', f.read())
+        else:
+            recorded = None
+
+        replay_server.wait()
+
+        if recorded is None:
+            self.send_error(404, 'Not recorded')
+            return
+
+        status, content_type, body = recorded
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """
+    Local HTTP server that serves a FixtureArchive with configurable injected latency.
+
+    Args:
+        archive (FixtureArchive): Recorded fixtures to serve.
+        latency (float): Fixed delay in seconds added to every response.
+        jitter (float): Maximum extra random delay in seconds.
+        host (str): Interface to bind.
+        port (int): Port to bind, 0 picks a free one.
+    """
+
+    def __init__(self, archive: FixtureArchive, latency: float = 0.0, jitter: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+        self.httpd = ThreadingHTTPServer((host, port), _ReplayRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.replay_server = self
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def wait(self):
+        delay = self.latency
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def fixture_url(self, url: str) -> str:
+        return f"{self.base_url}/fixture?url={quote(url, safe='')}"
+
+    def page_url(self, site: str, keyword: str, key: str) -> str:
+        return f"{self.base_url}/pages/{quote(site, safe='')}/{quote(keyword, safe='')}/{quote(key, safe='')}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class Recorder:
+    """
+    Fixture hook passed to the bots in record mode.
+
+    Document fetches go through a recording session; result and detail pages are
+    captured from the driver whenever a bot calls record_page.
+    """
+
+    replaying = False
+
+    def __init__(self, archive: FixtureArchive):
+        self.archive = archive
+        self.session = requests.Session()
+        adapter = RecordingAdapter(archive)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def record_page(self, site: str, keyword: str, key: str, driver):
+        self.archive.add_page(site, keyword, key, driver.current_url, driver.page_source)
+
+    def close(self):
+        self.archive.save()
+
+
+class Replayer:
+    """
+    Fixture hook passed to the bots in replay mode.
+
+    Document fetches are answered by the replay server; the bots walk the recorded
+    result pages instead of searching the live site.
+    """
+
+    replaying = True
+
+    def __init__(self, archive: FixtureArchive, latency: float = 0.0, jitter: float = 0.0):
+        self.archive = archive
+        self.server = ReplayServer(archive, latency=latency, jitter=jitter).start()
+        self.session = requests.Session()
+        adapter = ReplayAdapter(self.server)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def record_page(self, site: str, keyword: str, key: str, driver):
+        pass
+
+    def page_keys(self, site: str, keyword: str, prefix: str = ''):
+        return self.archive.page_keys(site, keyword, prefix)
+
+    def page_url(self, site: str, keyword: str, key: str) -> str:
+        return self.server.page_url(site, keyword, key)
+
+    def close(self):
+        self.server.stop()
+
+
+def create_fixtures(mode: str, fixtures_dir: str, latency: float = 0.0, jitter: float = 0.0):
+    """
+    Builds the fixture hook for the given mode.
+
+    Args:
+        mode (str): 'record', 'replay' or empty for live scraping.
+        fixtures_dir (str): Directory of the fixture archive.
+        latency (float): Injected latency for replay mode.
+        jitter (float): Injected random latency for replay mode.
+
+    Returns:
+        Recorder | Replayer | None: Hook to pass to ScriptRunner, None for live runs.
+    """
+    if not mode:
+        return None
+    archive = FixtureArchive(fixtures_dir)
+    if mode == 'record':
+        return Recorder(archive)
+    if mode == 'replay':
+        return Replayer(archive, latency=latency, jitter=jitter)
+    raise ValueError(f"Unknown fixtures mode: {mode}")
+
+
+def results_page_key(page_number: int) -> str:
+    return f"results-{page_number:04d}"
+
+
+def detail_page_key(page_number: int, index: int) -> str:
+    return f"detail-{page_number:04d}-{index:04d}"
+
+
+def key_in_page_range(key: str, first_page: int = 1, last_page: int = 0) -> bool:
+    """
+    Whether a results/detail page key falls in [first_page, last_page]; last_page 0 means
+    no upper bound.
+    """
+    page_number = int(key.split('-')[1])
+    return page_number >= first_page and (not last_page or page_number <= last_page)
@@ -0,0 +1,308 @@
+"""
+Local full-text index over the scraped corpus, backed by SQLite FTS5.
+
+Fed by the bots' summaries (text/), tables (json/), metadata (the metadata catalog, or legacy
+metadata/ files) and extracted PDF text (pdftext/). Updating is incremental: only documents whose files changed since the last
+update are re-read.
+
+Usage:
+    python -m src.utils.searchIndex build --raw data/raw --index data/index/search.sqlite
+    python -m src.utils.searchIndex query "SVHC" --since 2024-03-01 --site ECHA
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+
+from src.utils.metadataCatalog import metadata_by_folder
+from src.utils.pdfText import PDF_TEXT_EXTENSION, PDF_TEXT_FOLDER
+
+DATE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    stem TEXT NOT NULL,
+    date TEXT,
+    title TEXT,
+    url TEXT,
+    UNIQUE (site, keyword, stem)
+);
+CREATE INDEX IF NOT EXISTS documents_date ON documents (date);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    document_id INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, summary, tables, pdf_text, metadata,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+'''
+
+
+def _stem(kind: str, file: str):
+    if kind == 'metadata':
+        if file.startswith('metadata_') and file.endswith('.json'):
+            return file[len('metadata_'):-len('.json')]
+        return None
+    if kind == PDF_TEXT_FOLDER:
+        return file[:-len(PDF_TEXT_EXTENSION)] if file.endswith(PDF_TEXT_EXTENSION) else None
+    return os.path.splitext(file)[0]
+
+
+def scan_corpus(raw_dir: str) -> dict:
+    """
+    Groups the indexable files of data/raw by document.
+
+    Returns:
+        dict: (site, keyword, stem) -> {kind: path}
+    """
+    documents = {}
+    if not os.path.isdir(raw_dir):
+        return documents
+    for site in os.listdir(raw_dir):
+        site_path = os.path.join(raw_dir, site)
+        if not os.path.isdir(site_path):
+            continue
+        for keyword in os.listdir(site_path):
+            for kind in ('text', 'json', 'metadata', PDF_TEXT_FOLDER):
+                folder = os.path.join(site_path, keyword, kind)
+                if not os.path.isdir(folder):
+                    continue
+                for file in os.listdir(folder):
+                    stem = _stem(kind, file)
+                    if stem:
+                        documents.setdefault((site, keyword, stem), {})[kind] = os.path.join(folder, file)
+    return documents
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def _table_text(path: str) -> str:
+    try:
+        tables = json.loads(_read_text(path))
+    except ValueError:
+        return ''
+    lines = []
+    for table in tables:
+        lines.append(' '.join(table.get('headers', [])))
+        lines.extend(' '.join(row) for row in table.get('rows', []))
+    return '\n'.join(lines)
+
+
+def _load_document(stem: str, files: dict, catalog_metadata: dict = None) -> dict:
+    document = {'title': stem, 'url': None, 'date': None, 'summary': '', 'tables': '', 'pdf_text': '',
+                'metadata': ''}
+
+    metadata = catalog_metadata
+    if 'metadata' in files:
+        try:
+            metadata = json.loads(_read_text(files['metadata']))
+        except ValueError:
+            metadata = {}
+    if metadata is not None:
+        document['title'] = metadata.get('name') or stem
+        document['url'] = metadata.get('URL')
+        document['date'] = metadata.get('notified_date')
+        document['metadata'] = ' '.join(str(value) for value in metadata.values() if value)
+
+    if 'text' in files:
+        document['summary'] = _read_text(files['text'])
+        if not document['date']:
+            for line in document['summary'].splitlines():
+                if line.startswith('Distribution date:'):
+                    document['date'] = line.split(':', 1)[1].strip()
+                    break
+
+    if 'json' in files:
+        document['tables'] = _table_text(files['json'])
+    if PDF_TEXT_FOLDER in files:
+        document['pdf_text'] = _read_text(files[PDF_TEXT_FOLDER])
+
+    if not document['date'] or not DATE_PATTERN.fullmatch(document['date']):
+        match = DATE_PATTERN.search(stem)
+        document['date'] = match.group(1) if match else None
+    return document
+
+
+def literal_query(text: str) -> str:
+    """
+    Turns free text such as 'substance very high concern (SVHC)' into an FTS5 query
+    matching all of its words, so that FTS5 operators in it are not interpreted.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join('"' + word + '"' for word in words)
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over the scraped corpus.
+
+    Args:
+        path (str): Location of the index database.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def update(self, raw_dir: str, catalog_dir: str = None) -> dict:
+        """
+        Brings the index in line with raw_dir, re-reading only changed documents.
+
+        Args:
+            raw_dir (str): The data/raw directory the bots write to.
+            catalog_dir (str, optional): Metadata catalog root, defaults to data/catalog next to raw_dir.
+
+        Returns:
+            dict: Number of documents 'indexed', 'unchanged' and 'removed'.
+        """
+        corpus = scan_corpus(raw_dir)
+        if catalog_dir is None:
+            catalog_dir = os.path.join(os.path.dirname(os.path.abspath(raw_dir)), 'catalog')
+        catalog_metadata = {}
+        for site in {site for site, _, _ in corpus}:
+            for (keyword, stem), metadata in metadata_by_folder(catalog_dir, site).items():
+                catalog_metadata[(site, keyword, stem)] = metadata
+        known = {row['path']: (row['mtime_ns'], row['size'], row['document_id'])
+                 for row in self.connection.execute('SELECT path, mtime_ns, size, document_id FROM sources')}
+        current_paths = {path for files in corpus.values() for path in files.values()}
+        # Documents that lost a file must be re-read even if their other files are unchanged
+        shrunk = {known[path][2] for path in known if path not in current_paths}
+        stats = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+
+        with self.connection:
+            for (site, keyword, stem), files in corpus.items():
+                states = {}
+                for path in files.values():
+                    stat = os.stat(path)
+                    states[path] = (stat.st_mtime_ns, stat.st_size)
+                previous = [known.get(path) for path in states]
+                if all(previous) and all(before[:2] == states[path] for path, before in zip(states, previous)) \
+                        and previous[0][2] not in shrunk:
+                    stats['unchanged'] += 1
+                    continue
+                self._index_document(site, keyword, stem, files, states,
+                                     catalog_metadata.get((site, keyword, stem)))
+                stats['indexed'] += 1
+
+            for path in known:
+                if path not in current_paths:
+                    self.connection.execute('DELETE FROM sources WHERE path = ?', (path,))
+            orphaned = [row['id'] for row in self.connection.execute(
+                'SELECT id FROM documents WHERE id NOT IN (SELECT document_id FROM sources)')]
+            for document_id in orphaned:
+                self.connection.execute('DELETE FROM documents_fts WHERE rowid = ?', (document_id,))
+                self.connection.execute('DELETE FROM documents WHERE id = ?', (document_id,))
+            stats['removed'] = len(orphaned)
+        return stats
+
+    def _index_document(self, site: str, keyword: str, stem: str, files: dict, states: dict,
+                        catalog_metadata: dict = None):
+        document = _load_document(stem, files, catalog_metadata)
+        row = self.connection.execute(
+            'SELECT id FROM documents WHERE site = ? AND keyword = ? AND stem = ?', (site, keyword, stem)).fetchone()
+        if row is None:
+            document_id = self.connection.execute(
+                'INSERT INTO documents (site, keyword, stem, date, title, url) VALUES (?, ?, ?, ?, ?, ?)',
+                (site, keyword, stem, document['date'], document['title'], document['url'])).lastrowid
+        else:
+            document_id = row['id']
+            self.connection.execute('UPDATE documents SET date = ?, title = ?, url = ? WHERE id = ?',
+                                    (document['date'], document['title'], document['url'], document_id))
+            self.connection.execute('DELETE FROM documents_fts WHERE rowid = ?', (document_id,))
+            self.connection.execute('DELETE FROM sources WHERE document_id = ?', (document_id,))
+
+        self.connection.execute(
+            'INSERT INTO documents_fts (rowid, title, summary, tables, pdf_text, metadata) VALUES (?, ?, ?, ?, ?, ?)',
+            (document_id, document['title'], document['summary'], document['tables'], document['pdf_text'],
+             document['metadata']))
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO sources (path, document_id, mtime_ns, size) VALUES (?, ?, ?, ?)',
+            [(path, document_id, mtime_ns, size) for path, (mtime_ns, size) in states.items()])
+
+    def search(self, query: str, since: str = None, until: str = None, site: str = None, keyword: str = None,
+               limit: int = 20) -> list:
+        """
+        Finds documents matching an FTS5 query, best matches first.
+
+        Args:
+            query (str): FTS5 query, e.g. 'SVHC', '"waste water" OR wastewater'. See literal_query.
+            since (str, optional): Earliest document date, YYYY-MM-DD.
+            until (str, optional): Latest document date, YYYY-MM-DD.
+            site (str, optional): Restrict to one site folder, e.g. 'ECHA'.
+            keyword (str, optional): Restrict to one keyword folder.
+            limit (int): Maximum number of hits.
+
+        Returns:
+            list: Dicts with site, keyword, stem, date, title, url and snippet.
+        """
+        sql = ('SELECT d.site, d.keyword, d.stem, d.date, d.title, d.url, '
+               "snippet(documents_fts, -1, '[', ']', '...', 12) AS snippet "
+               'FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid '
+               'WHERE documents_fts MATCH ?')
+        parameters = [query]
+        for clause, value in (('d.date >= ?', since), ('d.date <= ?', until), ('d.site = ?', site),
+                              ('d.keyword = ?', keyword)):
+            if value:
+                sql += ' AND ' + clause
+                parameters.append(value)
+        sql += ' ORDER BY bm25(documents_fts) LIMIT ?'
+        parameters.append(limit)
+        return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+
+def update_index(raw_dir: str, index_path: str) -> dict:
+    with SearchIndex(index_path) as index:
+        return index.update(raw_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--index', default=os.path.join('data', 'index', 'search.sqlite'))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Index new and changed documents.')
+    build_parser.add_argument('--raw', default=os.path.join('data', 'raw'))
+
+    query_parser = subparsers.add_parser('query', help='Search the index.')
+    query_parser.add_argument('query')
+    query_parser.add_argument('--since')
+    query_parser.add_argument('--until')
+    query_parser.add_argument('--site')
+    query_parser.add_argument('--keyword')
+    query_parser.add_argument('--limit', type=int, default=20)
+    query_parser.add_argument('--fts', action='store_true', help='Pass the query to FTS5 unchanged.')
+
+    args = parser.parse_args()
+    started = time.perf_counter()
+    if args.command == 'build':
+        print(update_index(args.raw, args.index))
+    else:
+        with SearchIndex(args.index) as search_index:
+            hits = search_index.search(args.query if args.fts else literal_query(args.query), since=args.since,
+                                       until=args.until, site=args.site, keyword=args.keyword, limit=args.limit)
+        for hit in hits:
+            print(f"{hit['date']}  {hit['site']}/{hit['keyword']}  {hit['title']}\n    {hit['snippet']}")
+        print(f"{len(hits)} hits")
+    print(f"took {(time.perf_counter() - started) * 1000:.1f} ms")
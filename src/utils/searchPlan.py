@@ -0,0 +1,187 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+
+SEARCH_PLAN_DIR = os.path.join('data', 'state', 'search_plans')
+
+# Total hit counters of the sites: ECHA and EUR-Lex '1 - 10 of 1,234 results', DataTables
+# 'Showing 1 to 10 of 57 entries' and its Turkish 'Toplam 1.234 kayıttan ...'
+HIT_COUNT_PATTERNS = [
+    r'of\s+([\d.,\s]+?)\s*(?:results?|entries|documents?)\b',
+    r'([\d.,]+)\s+kay[ıi]t',
+]
+
+# Empty result pages: ECHA and EUR-Lex 'No results found', DataTables 'No data available in
+# table' / 'No matching records found' and the Turkish 'Tabloda herhangi bir veri mevcut değil'
+NO_HITS_PATTERNS = [
+    r'\bno (?:results|matching records|data available)\b',
+    r'there are no results',
+    r'herhangi bir veri mevcut de[ğg]il',
+    r'kay[ıi]t bulunamad[ıi]',
+]
+
+
+def parse_hit_count(text: str):
+    """
+    Total number of hits from the text of a results page or counter: 0 for an empty result
+    page, None when it shows neither.
+    """
+    for pattern in HIT_COUNT_PATTERNS:
+        match = re.search(pattern, text or '', re.IGNORECASE)
+        if match is not None:
+            digits = re.sub(r'\D', '', match.group(1))
+            if digits:
+                return int(digits)
+    if any(re.search(pattern, text or '', re.IGNORECASE) for pattern in NO_HITS_PATTERNS):
+        return 0
+    return None
+
+
+def wait_for_hits(driver, locator, timeout: float = 20.0, poll_interval: float = 0.25):
+    """
+    Polls the elements at `locator` (a (By, value) pair) until their text shows the hit
+    count or an empty result, so that empty searches end as soon as the page says so.
+
+    Returns:
+        int | None: The hit count, None if the page showed neither within the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        for element in driver.find_elements(*locator):
+            try:
+                hits = parse_hit_count(element.text)
+            except Exception:
+                # Replaced while the results load
+                continue
+            if hits is not None:
+                return hits
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(poll_interval)
+
+
+class SearchPlan:
+    """
+    What a keyword's search will take, read from the site's hit counter right after searching.
+
+    Args:
+        site (str): Site folder name, e.g. 'ECHA'.
+        keyword (str): Keyword searched.
+        hits (int | None): Total hits; None when the site did not show a count.
+        page_size (int): Results on the first page.
+        limited_page (int): Page cap of the run, 0 for none.
+        seconds (float): Time the search and the probe took.
+    """
+
+    def __init__(self, site: str, keyword: str, hits, page_size: int, limited_page: int = 0, seconds: float = 0.0):
+        self.site = site
+        self.keyword = keyword
+        self.hits = hits
+        self.page_size = page_size
+        self.limited_page = limited_page
+        self.seconds = seconds
+
+    @property
+    def empty(self) -> bool:
+        return self.hits == 0
+
+    @property
+    def total_pages(self):
+        # Pages the whole result set spans, None when unknown
+        if self.hits is None:
+            return None
+        if self.hits == 0:
+            return 0
+        return math.ceil(self.hits / self.page_size) if self.page_size else None
+
+    @property
+    def pages(self):
+        # Pages the run will visit: the total, capped at limited_page
+        total = self.total_pages
+        if total is None:
+            return self.limited_page or None
+        return min(total, self.limited_page) if self.limited_page else total
+
+    def to_dict(self) -> dict:
+        return {'site': self.site, 'keyword': self.keyword, 'hits': self.hits, 'page_size': self.page_size,
+                'limited_page': self.limited_page, 'total_pages': self.total_pages, 'pages': self.pages,
+                'seconds': round(self.seconds, 2), 'planned_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+class SearchPlanLog:
+    """
+    Appends every search plan to data/state/search_plans/<site>.jsonl, read back by
+    latest_plans when work is planned.
+
+    Args:
+        root (str): Directory of the per-site logs.
+        writer (OutputWriter, optional): Background writer the lines are handed to.
+    """
+
+    def __init__(self, root: str = SEARCH_PLAN_DIR, writer=None):
+        self.root = root
+        self.writer = writer
+        self.lock = threading.Lock()
+
+    def add(self, plan: SearchPlan):
+        line = json.dumps(plan.to_dict(), ensure_ascii=False) + '\n'
+        path = os.path.join(self.root, f"{plan.site}.jsonl")
+        if self.writer is not None:
+            self.writer.append_text(path, line)
+            return
+        with self.lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+def latest_plans(root: str = SEARCH_PLAN_DIR, max_age: float = None) -> dict:
+    """
+    The most recent plan of every searched keyword.
+
+    Args:
+        root (str): Directory of the per-site logs.
+        max_age (float, optional): Leave out plans older than this many seconds, as sites
+            keep publishing.
+
+    Returns:
+        dict: (site, keyword) -> plan dict as written by SearchPlanLog.
+    """
+    oldest = time.time() - max_age if max_age is not None else None
+    plans = {}
+    if not os.path.isdir(root):
+        return plans
+    for file_name in sorted(os.listdir(root)):
+        if not file_name.endswith('.jsonl'):
+            continue
+        with open(os.path.join(root, file_name), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    plan = json.loads(line)
+                    planned = time.mktime(time.strptime(plan['planned_at'], '%Y-%m-%dT%H:%M:%S'))
+                except (ValueError, KeyError):
+                    continue
+                if oldest is None or planned >= oldest:
+                    plans[(plan['site'], plan['keyword'])] = plan
+    return plans
+
+
+def estimate_run(items, seconds_per_page: float = 15.0, target_seconds: float = 3600.0) -> dict:
+    """
+    Rough size of a sharded run from its (script, link, keyword, first page, last page)
+    work items.
+
+    Args:
+        items (list): Output of plan_shards; unbounded items (last page 0) count one page.
+        seconds_per_page (float): Time one results page and its documents take.
+        target_seconds (float): Wall-clock time the run should fit in.
+
+    Returns:
+        dict: Number of 'pages', single-worker 'seconds' and the 'workers' needed for the target.
+    """
+    pages = sum(max(last_page - first_page + 1, 1) for _, _, _, first_page, last_page in items)
+    seconds = pages * seconds_per_page
+    return {'pages': pages, 'seconds': round(seconds), 'workers': max(1, math.ceil(seconds / target_seconds))}
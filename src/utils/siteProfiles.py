@@ -0,0 +1,107 @@
+import shlex
+
+# Discovery backends: page through one search per keyword, search ECHA's date windows in
+# parallel, or search every keyword at once with an OR query
+DISCOVERY_BACKENDS = ('pages', 'windows', 'batch')
+
+
+def _flags(value: str) -> tuple:
+    return tuple(shlex.split(value))
+
+
+def _switch(value: str) -> bool:
+    if value.lower() in ('on', 'yes', 'true', '1'):
+        return True
+    if value.lower() in ('off', 'no', 'false', '0'):
+        return False
+    raise ValueError(value)
+
+
+# 'Key: value' lines a scripts.txt block may have between its Link and Keywords lines
+PROFILE_KEYS = {
+    'bot': ('bot', str),
+    'discovery': ('discovery', str),
+    'rate': ('rate', float),
+    'burst': ('burst', float),
+    'concurrency': ('concurrency', int),
+    'fetch timeout': ('fetch_timeout', float),
+    'wait timeout': ('wait_timeout', float),
+    'delay scale': ('delay_scale', float),
+    'browsers': ('browsers', int),
+    'browser profile': ('browser_profile', str),
+    'browser cache': ('browser_cache', _switch),
+    'chrome flags': ('chrome_flags', _flags),
+    'pages per shard': ('pages_per_shard', int),
+    'task budget': ('task_budget', float),
+}
+
+
+class SiteProfile:
+    """
+    Performance settings of one site from scripts.txt. Settings left out keep the runner's
+    and the bots' defaults.
+
+    Args:
+        bot (str, optional): Registry name or 'package.module:Class' of the bot, see
+            src/bots/registry.py; the block's Name by default.
+        discovery (str, optional): One of DISCOVERY_BACKENDS the bot supports.
+        rate (float, optional): Requests per second to the site's host at the start.
+        burst (float, optional): Requests the host may get at once after a pause.
+        concurrency (int, optional): Requests in flight to the host.
+        fetch_timeout (float, optional): Read timeout of document fetches, in seconds.
+        wait_timeout (float, optional): Seconds the bot waits for an element of a page.
+        delay_scale (float, optional): Factor on the bot's fixed pauses, e.g. 0.5 for half.
+        browsers (int, optional): Browsers searching date windows at once.
+        browser_profile (str, optional): Browser profile name, see src/utils/browserProfiles.py.
+        browser_cache (bool, optional): Whether the site's browsers keep a persistent profile
+            and disk cache when the runner has one, see src/utils/browserCache.py; on by default.
+        chrome_flags (tuple): Extra Chrome command line flags.
+        pages_per_shard (int, optional): Result pages per work item of a sharded crawl.
+        task_budget (float, optional): Wall-clock seconds the watchdog gives one keyword.
+    """
+
+    def __init__(self, bot=None, discovery=None, rate=None, burst=None, concurrency=None, fetch_timeout=None,
+                 wait_timeout=None, delay_scale=None, browsers=None, browser_profile=None, browser_cache=None,
+                 chrome_flags=(),
+                 pages_per_shard=None, task_budget=None):
+        self.bot = bot
+        self.discovery = discovery
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.fetch_timeout = fetch_timeout
+        self.wait_timeout = wait_timeout
+        self.delay_scale = delay_scale
+        self.browsers = browsers
+        self.browser_profile = browser_profile
+        self.browser_cache = browser_cache
+        self.chrome_flags = chrome_flags
+        self.pages_per_shard = pages_per_shard
+        self.task_budget = task_budget
+
+    def set(self, key: str, value: str) -> bool:
+        """
+        Applies one 'Key: value' line; returns False for keys that are not profile settings.
+        """
+        if key.strip().lower() not in PROFILE_KEYS:
+            return False
+        attribute, convert = PROFILE_KEYS[key.strip().lower()]
+        try:
+            setattr(self, attribute, convert(value.strip()))
+        except ValueError:
+            print(f'Invalid value for {key}: {value.strip()}')
+            return True
+        if attribute == 'discovery' and self.discovery not in DISCOVERY_BACKENDS:
+            print(f'Unknown discovery backend {self.discovery}, expected one of {", ".join(DISCOVERY_BACKENDS)}')
+            self.discovery = None
+        return True
+
+    def host_settings(self) -> dict:
+        # HostLimiter arguments for the site's host
+        settings = {'rate': self.rate, 'burst': self.burst, 'concurrency': self.concurrency}
+        return {name: value for name, value in settings.items() if value is not None}
+
+    def bot_options(self) -> dict:
+        # Constructor arguments every bot takes
+        options = {'wait_timeout': self.wait_timeout, 'delay_scale': self.delay_scale}
+        return {name: value for name, value in options.items() if value is not None}
@@ -0,0 +1,185 @@
+"""
+Shared logging of the bots: records are handed to a queue and formatted and written by
+one background thread, so scraping threads do not wait on the disk or the console.
+
+    logs/scraper.jsonl          one JSON object per record, rotated into scraper.jsonl.1.gz, ...
+
+Each record carries the logger ('scraper.<site>'), level and message, and the site,
+keyword, document and url fields the bot knows of, e.g.
+
+    jq -c 'select(.site == "ECHA" and .level == "ERROR")' logs/scraper.jsonl
+
+Levels are set per component (the part after 'scraper.', e.g. a site name) with
+configure_logging(levels={'ECHA': 'DEBUG'}); the console gets the plain format.
+"""
+import atexit
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+
+LOG_DIR = 'logs'
+LOG_FILE = 'scraper.jsonl'
+ROOT_LOGGER = 'scraper'
+
+# Context fields copied from a record into its JSON object
+CONTEXT_FIELDS = ('site', 'keyword', 'document', 'url', 'page')
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON line with its context fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records with their message merged and traceback rendered, and their context
+    fields kept for the JSON log (QueueHandler would flatten them into the message).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def rotating_json_handler(path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 10):
+    # Size-rotated JSON lines; rotated files are gzipped, the live one stays plain
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                   encoding='utf-8', delay=True)
+    handler.namer = lambda name: name + '.gz'
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def parse_levels(value: str) -> dict:
+    """
+    Component levels from 'ECHA=DEBUG,eur_lex=WARNING'.
+    """
+    levels = {}
+    for item in (value or '').split(','):
+        component, _, level = item.partition('=')
+        if component.strip() and level.strip():
+            levels[component.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(log_dir: str = LOG_DIR, level: str = 'INFO', levels=None, console: bool = True,
+                      max_bytes: int = 10 * 1024 * 1024, backup_count: int = 10):
+    """
+    Routes the 'scraper' loggers through a queue to a background thread writing the JSON
+    log and the console. Configuring again only updates the levels.
+
+    Args:
+        log_dir (str): Directory of the JSON log.
+        level (str): Level of every component without one of its own.
+        levels (dict, optional): Component (e.g. 'ECHA') -> level.
+        console (bool): Also print records to the console.
+        max_bytes (int): Size at which the JSON log is rotated.
+        backup_count (int): Rotated logs kept.
+
+    Returns:
+        logging.handlers.QueueListener: The background writer, stopped at exit.
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level.upper())
+    for component, component_level in (levels or {}).items():
+        logging.getLogger(f'{ROOT_LOGGER}.{component}').setLevel(component_level.upper())
+    with _lock:
+        if _listener is not None:
+            return _listener
+        os.makedirs(log_dir, exist_ok=True)
+        handlers = [rotating_json_handler(os.path.join(log_dir, LOG_FILE), max_bytes, backup_count)]
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(console_handler)
+        records = queue.SimpleQueue()
+        _queue_handler = ContextQueueHandler(records)
+        root.addHandler(_queue_handler)
+        # The records stay with the scraper's handlers, not the root logger's
+        root.propagate = False
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging():
+    # Writes out the queued records and stops the background thread
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+            _queue_handler = None
+
+
+class ContextAdapter(logging.LoggerAdapter):
+    """
+    Logger adding its context (site, keyword) to every record; fields passed as extra to
+    a call (document, url, page) are added to those.
+    """
+
+    def process(self, msg, kwargs):
+        kwargs['extra'] = {**self.extra, **(kwargs.get('extra') or {})}
+        return msg, kwargs
+
+
+def bot_logger(site_name: str, key_words) -> ContextAdapter:
+    """
+    Logger of a bot run, 'scraper.<site>', with the site and keywords as context. Sets up
+    the shared logging with its defaults if nothing did yet.
+
+    Args:
+        site_name (str): The name of the site (e.g., 'ECHA', 'eur_lex').
+        key_words (list): Keywords of the bot run.
+    """
+    if _listener is None:
+        configure_logging()
+    return ContextAdapter(logging.getLogger(f'{ROOT_LOGGER}.{site_name}'),
+                          {'site': site_name, 'keyword': ', '.join(key_words)})
@@ -0,0 +1,329 @@
+import json
+import os
+from typing import List
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# Upper bound for colspan/rowspan, malformed pages sometimes carry huge values
+MAX_SPAN = 1000
+
+SKIPPED_TAGS = {'table', 'script', 'style'}
+
+# Output formats for extracted tables; the columnar ones go to <keyword>/tables/<stem>/
+TABLE_FORMATS = ('json', 'parquet', 'feather')
+COLUMNAR_FOLDER = 'tables'
+COLUMNAR_EXTENSIONS = {'parquet': '.parquet', 'feather': '.feather'}
+# Written instead of Parquet/Feather when pyarrow is not installed
+FALLBACK_FORMAT = 'csv'
+
+
+def _span(cell, attribute: str) -> int:
+    try:
+        value = int(cell.get(attribute, 1))
+    except (TypeError, ValueError):
+        return 1
+    return min(max(value, 1), MAX_SPAN)
+
+
+def _cell_text(cell) -> str:
+    """
+    Text of a cell, leaving out nested tables (they are extracted on their own) and scripts.
+    """
+    if len(cell) == 0:
+        return (cell.text or '').strip()
+    parts = []
+
+    def walk(element):
+        if element.text:
+            parts.append(element.text)
+        for child in element:
+            if isinstance(child.tag, str) and child.tag not in SKIPPED_TAGS:
+                walk(child)
+            if child.tail:
+                parts.append(child.tail)
+
+    walk(cell)
+    return ''.join(parts).strip()
+
+
+def _table_rows(table):
+    """
+    Rows that belong to this table itself, not to tables nested in its cells.
+    """
+    for child in table:
+        if child.tag == 'tr':
+            yield child
+        elif child.tag in ('thead', 'tbody', 'tfoot'):
+            for row in child:
+                if row.tag == 'tr':
+                    yield row
+
+
+def parse_table(table) -> dict:
+    """
+    Walks a table element once, expanding rowspan/colspan into a rectangular grid.
+
+    Rows made only of <th> cells above the first data row become the headers (several
+    header rows are joined per column with ' / '), rows with at least one <td> become data
+    rows. The <th> cells of data rows are row labels, as in key/value tables, and stay in
+    the row like its other cells; so do <th>-only rows below the first data row, e.g.
+    section titles.
+
+    Returns:
+        dict: {'headers': [...], 'rows': [[...], ...]}
+    """
+    header_rows = []
+    rows = []
+    # column index -> [rows still to fill, text] for cells spanning down from previous rows
+    pending = {}
+
+    for row in _table_rows(table):
+        values = []
+        started = {}
+        has_data_cell = False
+        column = 0
+
+        def take_pending(index):
+            span = pending[index]
+            values.append(span[1])
+            span[0] -= 1
+            if span[0] == 0:
+                del pending[index]
+
+        for cell in row:
+            if cell.tag not in ('td', 'th'):
+                continue
+            while column in pending:
+                take_pending(column)
+                column += 1
+            if cell.tag == 'td':
+                has_data_cell = True
+            text = _cell_text(cell)
+            rowspan = _span(cell, 'rowspan')
+            for _ in range(_span(cell, 'colspan')):
+                values.append(text)
+                if rowspan > 1:
+                    started[column] = [rowspan - 1, text]
+                column += 1
+
+        last_pending = max(pending, default=-1)
+        while column <= last_pending:
+            if column in pending:
+                take_pending(column)
+            else:
+                values.append('')
+            column += 1
+        pending.update(started)
+
+        if not values:
+            continue
+        if has_data_cell or rows:
+            rows.append(values)
+        else:
+            header_rows.append(values)
+
+    headers = []
+    if header_rows:
+        width = max(len(header_row) for header_row in header_rows)
+        for index in range(width):
+            pieces = []
+            for header_row in header_rows:
+                if index < len(header_row) and header_row[index] and header_row[index] not in pieces:
+                    pieces.append(header_row[index])
+            headers.append(' / '.join(pieces))
+
+    return {'headers': headers, 'rows': rows}
+
+
+def extract_tables(content) -> List[dict]:
+    """
+    Extracts every table of an HTML page, nested tables included, in document order.
+
+    Tables without data rows are skipped; tables without header rows are kept with empty
+    headers.
+
+    Args:
+        content (bytes | str): Raw HTML of the page.
+
+    Returns:
+        List[dict]: One {'headers': [...], 'rows': [[...], ...]} entry per table.
+    """
+    if not content or not content.strip():
+        return []
+    try:
+        document = lxml_html.fromstring(content)
+    except (etree.ParserError, ValueError):
+        return []
+
+    tables_data = []
+    for table in document.iter('table'):
+        table_data = parse_table(table)
+        if table_data['rows']:
+            tables_data.append(table_data)
+    return tables_data
+
+
+def save_tables(tables_data: List[dict], table_file_name: str):
+    """
+    Writes extracted tables as compact JSON.
+    """
+    os.makedirs(os.path.dirname(table_file_name), exist_ok=True)
+    temp_file_name = f"{table_file_name}.{os.getpid()}.tmp"
+    with open(temp_file_name, 'w', encoding='utf-8') as table_file:
+        json.dump(tables_data, table_file, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_file_name, table_file_name)
+
+
+def _column_names(headers: List[str], width: int) -> List[str]:
+    names = list(headers) if len(headers) == width else [f"column_{i}" for i in range(width)]
+    seen = {}
+    for index, name in enumerate(names):
+        name = name or f"column_{index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        names[index] = name
+    return names
+
+
+def table_frame(table_data: dict):
+    """
+    Turns an extracted table into a DataFrame, typing numeric columns as numbers.
+    """
+    import pandas as pd
+
+    width = max([len(table_data['headers'])] + [len(row) for row in table_data['rows']])
+    rows = [row + [None] * (width - len(row)) for row in table_data['rows']]
+    frame = pd.DataFrame(rows, columns=_column_names(table_data['headers'], width))
+    for column in frame.columns:
+        try:
+            frame[column] = pd.to_numeric(frame[column])
+        except (ValueError, TypeError):
+            frame[column] = frame[column].astype('string')
+    return frame
+
+
+def save_tables_columnar(tables_data: List[dict], document_folder: str, table_formats=('parquet',)):
+    """
+    Writes every extracted table of a document as its own typed Parquet/Feather file, plus
+    an index.json listing each table's files, headers, columns and row count. Without
+    pyarrow the tables are written as CSV instead.
+
+    Args:
+        tables_data (List[dict]): Output of extract_tables.
+        document_folder (str): Folder for this document, <keyword>/tables/<stem>.
+        table_formats (tuple): Any of 'parquet' and 'feather'.
+    """
+    os.makedirs(document_folder, exist_ok=True)
+    index = []
+    for number, table_data in enumerate(tables_data):
+        frame = table_frame(table_data)
+        files = {}
+        for table_format in table_formats:
+            file_name = f"table_{number:03d}{COLUMNAR_EXTENSIONS[table_format]}"
+            path = os.path.join(document_folder, file_name)
+            try:
+                if table_format == 'parquet':
+                    frame.to_parquet(path, index=False)
+                else:
+                    frame.to_feather(path)
+            except ImportError as e:
+                if FALLBACK_FORMAT not in files:
+                    print(f"Writing table {number} of {document_folder} as CSV, {table_format} is unavailable: {e}")
+                    file_name = f"table_{number:03d}.{FALLBACK_FORMAT}"
+                    frame.to_csv(os.path.join(document_folder, file_name), index=False)
+                    files[FALLBACK_FORMAT] = file_name
+                continue
+            files[table_format] = file_name
+        index.append({
+            'table': number,
+            'files': files,
+            'headers': table_data['headers'],
+            'columns': list(frame.columns),
+            'rows': len(frame)
+        })
+    with open(os.path.join(document_folder, 'index.json'), 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, ensure_ascii=False, separators=(',', ':'))
+
+
+def parse_table_formats(value: str) -> tuple:
+    """
+    Parses a comma separated format list such as 'json,parquet'.
+    """
+    table_formats = tuple(item.strip().lower() for item in value.split(',') if item.strip())
+    unknown = [item for item in table_formats if item not in TABLE_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown table format(s) {unknown}, expected any of {TABLE_FORMATS}")
+    return table_formats or ('json',)
+
+
+def document_table_paths(keyword_folder: str, stem: str, table_formats=('json',)) -> List[str]:
+    """
+    Paths save_document_tables writes to: <keyword>/json/<stem>.json and/or
+    <keyword>/tables/<stem>/ for the columnar formats.
+    """
+    paths = []
+    if 'json' in table_formats:
+        paths.append(os.path.join(keyword_folder, 'json', f"{stem}.json"))
+    if any(table_format in COLUMNAR_EXTENSIONS for table_format in table_formats):
+        paths.append(os.path.join(keyword_folder, COLUMNAR_FOLDER, stem))
+    return paths
+
+
+def save_document_tables(tables_data: List[dict], keyword_folder: str, stem: str, table_formats=('json',)) -> List[str]:
+    """
+    Writes a document's tables in every requested format, see document_table_paths.
+
+    Returns:
+        List[str]: The written JSON file and/or columnar folder.
+    """
+    paths = document_table_paths(keyword_folder, stem, table_formats)
+    columnar_formats = [table_format for table_format in table_formats if table_format in COLUMNAR_EXTENSIONS]
+    for path in paths:
+        if path.endswith('.json'):
+            save_tables(tables_data, path)
+        else:
+            save_tables_columnar(tables_data, path, columnar_formats)
+    return paths
+
+
+def load_tables_index(document_folder: str) -> List[dict]:
+    with open(os.path.join(document_folder, 'index.json'), 'r', encoding='utf-8') as index_file:
+        return json.load(index_file)
+
+
+def load_tables(document_folder: str, tables: List[int] = None, columns: List[str] = None) -> list:
+    """
+    Reads a document's columnar tables, only touching the requested tables and columns.
+    Parquet files are preferred when a table was written in both formats, CSV files are
+    read for tables written without pyarrow.
+
+    Args:
+        document_folder (str): Folder written by save_tables_columnar.
+        tables (List[int], optional): Table numbers to read, all by default.
+        columns (List[str], optional): Columns to read; tables lacking all of them are skipped.
+
+    Returns:
+        list: One pandas.DataFrame per table read.
+    """
+    import pandas as pd
+
+    frames = []
+    for entry in load_tables_index(document_folder):
+        if tables is not None and entry['table'] not in tables:
+            continue
+        selected = None
+        if columns is not None:
+            selected = [column for column in columns if column in entry['columns']]
+            if not selected:
+                continue
+        if 'parquet' in entry['files']:
+            frames.append(pd.read_parquet(os.path.join(document_folder, entry['files']['parquet']), columns=selected))
+        elif 'feather' in entry['files']:
+            frames.append(pd.read_feather(os.path.join(document_folder, entry['files']['feather']), columns=selected))
+        else:
+            frames.append(pd.read_csv(os.path.join(document_folder, entry['files'][FALLBACK_FORMAT]), usecols=selected))
+    return frames
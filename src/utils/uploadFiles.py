@@ -18,26 +18,32 @@ def create_container(container_name: str, blob_service_client: BlobServiceClient
     except:
         blob_container_client.create_container()
 
-def upload_blob(local_file_path: str, blob_service_client: BlobServiceClient, container_name: str):
+def upload_blob(local_file_path: str, blob_service_client: BlobServiceClient, container_name: str,
+                overwrite: bool = False, replace_resized: bool = False):
     dir_list = list(Path(local_file_path).parts)
     container_name = container_name
     blob_name = os.path.join(*dir_list)
     blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
-    try:
-        blob_properties = blob_client.get_blob_properties()
-    except:
-        blob_properties = None
-    if blob_properties:
-        return
+    # Without overwrite, blobs that already exist are left alone; with replace_resized only
+    # while their size matches the file's (bundles grow when appended to)
+    if not overwrite:
+        try:
+            blob_properties = blob_client.get_blob_properties()
+        except:
+            blob_properties = None
+        if blob_properties:
+            if not replace_resized or blob_properties['size'] == os.path.getsize(local_file_path):
+                return
+            overwrite = True
     with open(file=local_file_path, mode='rb') as f:
         blob_client = blob_service_client.get_blob_client(container_name, blob_name)
         _, extension = os.path.splitext(local_file_path)
         # Get the mime_type based on file extension
         mime_type = mimetypes.types_map.get(extension, 'application/octet-stream')
         content_settings = ContentSettings(content_type=mime_type)
-        blob_client.upload_blob(data=f, content_settings=content_settings)
+        blob_client.upload_blob(data=f, content_settings=content_settings, overwrite=overwrite)
 
-def upload_all(account_key, account_name, account_url, root_dir, container_name):
+def create_blob_service_client(account_key, account_name, account_url):
     sas_token = generate_account_sas(
         account_name=account_name,
         account_key=account_key,
@@ -45,8 +51,15 @@ def upload_all(account_key, account_name, account_url, root_dir, container_name)
         permission=AccountSasPermissions(read=True, write=True, create=True, delete=True, list=True),
         expiry=datetime.utcnow() + timedelta(days=30)
     )
-    b_s_c = BlobServiceClient(account_url=account_url,
-                              credential=sas_token)
+    return BlobServiceClient(account_url=account_url,
+                             credential=sas_token)
+
+def upload_all(account_key, account_name, account_url, root_dir, container_name, blob_service_client=None,
+               replace_resized=False):
+    # A ready client (e.g. LocalBlobServiceClient in benchmarks) skips the SAS round trip
+    b_s_c = blob_service_client
+    if b_s_c is None:
+        b_s_c = create_blob_service_client(account_key, account_name, account_url)
     # Iterate through the root directory and create containers and blobs
     for root, dirs, files in os.walk(root_dir):
         if root == root_dir and len(dirs) == 0:
@@ -54,4 +67,10 @@ def upload_all(account_key, account_name, account_url, root_dir, container_name)
             break
         elif len(files) > 0:
             for file in files:
-                upload_blob(os.path.join(root, file), b_s_c, container_name)
\ No newline at end of file
+                upload_blob(os.path.join(root, file), b_s_c, container_name, replace_resized=replace_resized)
+
+
+def upload_files(file_paths, container_name, blob_service_client, overwrite=True):
+    # Uploads the given paths only, e.g. archives rebuilt by a refresh, replacing older blobs
+    for file_path in file_paths:
+        upload_blob(file_path, blob_service_client, container_name, overwrite=overwrite)
@@ -0,0 +1,234 @@
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def process_rss(pid: int):
+    """
+    Resident memory of a process in bytes from /proc, None where there is no /proc or the
+    process is gone.
+    """
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def process_tree(pid: int) -> list:
+    # The process and all of its descendants, e.g. chromedriver and every Chrome it started
+    children = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return [pid]
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # The command name may hold spaces and parentheses, the fields after it do not
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    tree = [pid]
+    for process in tree:
+        tree.extend(children.get(process, []))
+    return tree
+
+
+def driver_pids(driver) -> list:
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    if process is None:
+        return []
+    return process_tree(process.pid)
+
+
+def driver_alive(driver) -> bool:
+    """
+    Whether the chromedriver of a browser is still running; drivers without one (e.g.
+    remote ones) are taken as alive.
+    """
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return process is None or process.poll() is None
+
+
+def kill_driver(driver):
+    """
+    Kills a browser and its chromedriver outright, which makes the WebDriver call blocked on
+    it fail at once, then releases what is left of the session.
+    """
+    for pid in reversed(driver_pids(driver)):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            continue
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class TaskWatch:
+    """
+    One supervised (site, keyword) task: its browsers, when it last made progress and the
+    results page it can resume after. Bots get it as their checkpoint.
+
+    Args:
+        name (str): Task name for the log, e.g. 'eur_lexWebScraping.py Water'.
+        first_page (int): First results page of the task.
+        budget (float): Wall-clock seconds the task may take, 0 for no limit.
+    """
+
+    def __init__(self, name: str, first_page: int = 1, budget: float = 0.0):
+        self.name = name
+        self.budget = budget
+        self.started = time.monotonic()
+        self.last_progress = self.started
+        self.next_page = first_page
+        self.search_finished = False
+        self.stop_reason = None
+        self.drivers = []
+        self.lock = threading.Lock()
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop_reason is not None
+
+    def track(self, driver):
+        # Browsers the task drives; all of them are killed when it is stopped
+        with self.lock:
+            self.drivers.append(driver)
+        return driver
+
+    def heartbeat(self):
+        self.last_progress = time.monotonic()
+
+    def page_done(self, page_number: int):
+        """
+        The URLs of a results page are collected; a stopped task resumes after it. Pages
+        reported after the stop are not trusted, the browser died under them.
+        """
+        with self.lock:
+            if self.stopped:
+                return
+            self.last_progress = time.monotonic()
+            self.next_page = max(self.next_page, page_number + 1)
+
+    def search_done(self):
+        # Every URL is collected; what is left uses no browser and is not watched
+        with self.lock:
+            if not self.stopped:
+                self.search_finished = True
+
+
+class Watchdog:
+    """
+    Supervises the running tasks from a background thread. A task over its wall-clock
+    budget, without progress for stall_timeout seconds, or whose browsers grow beyond
+    max_browser_rss is stopped by killing its browsers; the runner then retries it from
+    its checkpoint on a new browser, up to `restarts` times.
+
+    Hung document fetches are bounded by the timeouts of FetchPolicy, so a task is only
+    watched until its URLs are collected.
+
+    Args:
+        budget (float): Wall-clock seconds per task, 0 for no limit.
+        stall_timeout (float): Seconds without a results page before a task counts as hung.
+        max_browser_rss (float): MB the browsers of a task may use, 0 for no limit.
+        max_process_rss (float): MB of this process above which a warning is printed.
+        restarts (int): Retries of a stopped task.
+        poll_interval (float): Seconds between checks.
+    """
+
+    def __init__(self, budget: float = 3600.0, stall_timeout: float = 600.0, max_browser_rss: float = 2048.0,
+                 max_process_rss: float = 4096.0, restarts: int = 2, poll_interval: float = 5.0):
+        self.budget = budget
+        self.stall_timeout = stall_timeout
+        self.max_browser_rss = max_browser_rss
+        self.max_process_rss = max_process_rss
+        self.restarts = restarts
+        self.poll_interval = poll_interval
+        self.watches = set()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.warned_rss = False
+
+    @contextmanager
+    def watch(self, name: str, first_page: int = 1, budget: float = None):
+        """
+        Supervises the task run inside the block.
+
+        Args:
+            name (str): Task name for the log.
+            first_page (int): First results page of the task.
+            budget (float, optional): Budget of this task, e.g. from its site profile.
+
+        Yields:
+            TaskWatch: Register the task's browsers with track() and hand it to the bot.
+        """
+        watch = TaskWatch(name, first_page, self.budget if budget is None else budget)
+        with self.lock:
+            self.watches.add(watch)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._monitor, name='watchdog', daemon=True)
+                self.thread.start()
+        try:
+            yield watch
+        finally:
+            with self.lock:
+                self.watches.discard(watch)
+
+    def _monitor(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self.lock:
+                watches = list(self.watches)
+            for watch in watches:
+                reason = self.check(watch)
+                if reason is not None:
+                    self.stop(watch, reason)
+            self.check_process()
+
+    def check(self, watch: TaskWatch):
+        """
+        Returns why the task has to be stopped, None while it is fine.
+        """
+        if watch.stopped or watch.search_finished:
+            return None
+        now = time.monotonic()
+        if watch.budget and now - watch.started > watch.budget:
+            return f'over its budget of {watch.budget:.0f}s'
+        if self.stall_timeout and now - watch.last_progress > self.stall_timeout:
+            return f'no progress for {now - watch.last_progress:.0f}s'
+        if self.max_browser_rss:
+            with watch.lock:
+                drivers = list(watch.drivers)
+            rss = sum(process_rss(pid) or 0 for driver in drivers for pid in driver_pids(driver))
+            if rss > self.max_browser_rss * MB:
+                return f'browsers use {rss / MB:.0f} MB'
+        return None
+
+    def check_process(self):
+        # The scraper's own memory cannot be recycled from here, it is only reported
+        rss = process_rss(os.getpid())
+        if self.max_process_rss and rss is not None and rss > self.max_process_rss * MB:
+            if not self.warned_rss:
+                print(f'Watchdog: this process uses {rss / MB:.0f} MB')
+            self.warned_rss = True
+        else:
+            self.warned_rss = False
+
+    def stop(self, watch: TaskWatch, reason: str):
+        with watch.lock:
+            watch.stop_reason = reason
+            drivers = list(watch.drivers)
+        print(f'Watchdog: stopping {watch.name}, {reason}')
+        for driver in drivers:
+            kill_driver(driver)
@@ -0,0 +1,278 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+WORK_QUEUE_PATH = os.path.join('data', 'state', 'work_queue.sqlite')
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    script TEXT NOT NULL,
+    link TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL NOT NULL,
+    UNIQUE (run_id, script, link, keyword, first_page)
+);
+CREATE INDEX IF NOT EXISTS work_items_status ON work_items (run_id, status);
+"""
+
+
+def plan_shards(scripts, pages_per_shard: int = 5, whole_scripts=('echaWebScraping.py',), page_counts=None,
+                shard_pages=None):
+    """
+    Splits the scripts of scripts.txt into (script, link, keyword, first page, last page)
+    work items. Scripts with an unlimited page count (0) stay one item, as their last page
+    is unknown up front.
+
+    Args:
+        scripts (list): Output of ScriptRunner.read_scripts_from_file.
+        pages_per_shard (int): Result pages per work item.
+        whole_scripts (tuple): Scripts kept one item per keyword, as their bot splits the
+            search itself (ECHA date windows).
+        page_counts (dict, optional): (script, keyword) -> pages its search plan found, see
+            src/utils/searchPlan.py; keywords with no hits are left out, the others get
+            shards for their pages only.
+        shard_pages (dict, optional): script -> result pages per work item, overriding
+            pages_per_shard (site profiles of scripts.txt).
+    """
+    items = []
+    page_counts = page_counts or {}
+    shard_pages = shard_pages or {}
+    for script, link, keywords, limited_page in scripts:
+        script_pages_per_shard = shard_pages.get(script, pages_per_shard)
+        for keyword in keywords:
+            pages = page_counts.get((script, keyword))
+            if pages == 0:
+                continue
+            last_page = limited_page
+            if pages is not None and script not in whole_scripts:
+                last_page = min(limited_page, pages) if limited_page else pages
+            if not last_page or script_pages_per_shard <= 0 or script in whole_scripts:
+                items.append((script, link, keyword, 1, last_page or 0))
+                continue
+            for first_page in range(1, last_page + 1, script_pages_per_shard):
+                items.append((script, link, keyword, first_page,
+                              min(first_page + script_pages_per_shard - 1, last_page)))
+    return items
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Work queue with leases in a SQLite file, shared by every worker of a sharded crawl.
+
+    A worker leases one item at a time and must heartbeat before the lease expires; items
+    whose lease ran out (the worker died) go back to other workers, up to `max_attempts`.
+
+    Args:
+        path (str): SQLite file, on storage every worker can reach.
+        max_attempts (int): Leases an item gets before it is marked failed.
+    """
+
+    def __init__(self, path: str = WORK_QUEUE_PATH, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, the heartbeat runs on its own thread
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            self.local.connection = connection
+        return connection
+
+    def enqueue(self, run_id: str, items) -> int:
+        """
+        Adds (script, link, keyword, first page, last page) items to a run; items already
+        in the run are left alone. Returns the number of new items.
+        """
+        connection = self._connect()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO work_items (run_id, script, link, keyword, first_page, last_page, status, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, *item, PENDING, now) for item in items])
+            added = connection.total_changes - before
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return added
+
+    def lease(self, worker: str, lease_seconds: float = 300.0, run_id: str = None):
+        """
+        Takes the oldest pending item, or one whose lease expired.
+
+        Returns:
+            dict | None: The leased item, None when nothing is available right now.
+        """
+        connection = self._connect()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Expired leases that used up their attempts are given up on
+            connection.execute(
+                "UPDATE work_items SET status = ?, error = 'lease expired', updated = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts))
+            query = ("SELECT * FROM work_items WHERE (status = ? OR (status = ? AND lease_expires < ?))"
+                     + (" AND run_id = ?" if run_id else "") + " ORDER BY id LIMIT 1")
+            parameters = [PENDING, LEASED, now] + ([run_id] if run_id else [])
+            row = connection.execute(query, parameters).fetchone()
+            if row is None:
+                connection.execute('COMMIT')
+                return None
+            connection.execute(
+                "UPDATE work_items SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, updated = ? "
+                "WHERE id = ?",
+                (LEASED, worker, now + lease_seconds, now, row['id']))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        item = dict(row)
+        item['attempts'] += 1
+        return item
+
+    def heartbeat(self, item_id: int, worker: str, lease_seconds: float = 300.0) -> bool:
+        """
+        Extends a lease. Returns False when the worker no longer holds it.
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE work_items SET lease_expires = ?, updated = ? WHERE id = ? AND worker = ? AND status = ?",
+            (now + lease_seconds, now, item_id, worker, LEASED))
+        return cursor.rowcount == 1
+
+    def complete(self, item_id: int, worker: str) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE work_items SET status = ?, lease_expires = NULL, error = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (DONE, time.time(), item_id, worker, LEASED))
+        return cursor.rowcount == 1
+
+    def fail(self, item_id: int, worker: str, error: str) -> bool:
+        """
+        Releases a lease after an error; the item is retried until it used up its attempts.
+        """
+        cursor = self._connect().execute(
+            "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "lease_expires = NULL, error = ?, updated = ? WHERE id = ? AND worker = ? AND status = ?",
+            (self.max_attempts, FAILED, PENDING, str(error), time.time(), item_id, worker, LEASED))
+        return cursor.rowcount == 1
+
+    def counts(self, run_id: str = None) -> dict:
+        query = "SELECT status, COUNT(*) FROM work_items" + (" WHERE run_id = ?" if run_id else "") + " GROUP BY status"
+        rows = self._connect().execute(query, [run_id] if run_id else []).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def finished(self, run_id: str = None) -> bool:
+        counts = self.counts(run_id)
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+
+class LeaseKeeper:
+    """
+    Heartbeats a leased item from a background thread while a worker processes it.
+    """
+
+    def __init__(self, queue: WorkQueue, item_id: int, worker: str, lease_seconds: float = 300.0):
+        self.queue = queue
+        self.item_id = item_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                if not self.queue.heartbeat(self.item_id, self.worker, self.lease_seconds):
+                    self.lost = True
+                    return
+        finally:
+            # Closes this thread's connection
+            self.queue.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_worker(queue: WorkQueue, process_item, worker: str = None, lease_seconds: float = 300.0,
+               poll_interval: float = 10.0, run_id: str = None, exit_when_idle: bool = True) -> dict:
+    """
+    Leases items and hands them to process_item(item) until the queue is drained.
+
+    Args:
+        queue (WorkQueue): Shared queue.
+        process_item (callable): Does the work of one item; raising marks the attempt failed.
+        worker (str, optional): Worker id, defaults to host name and pid.
+        lease_seconds (float): Lease length, renewed every third of it.
+        poll_interval (float): Wait between polls while other workers hold the remaining items.
+        run_id (str, optional): Only take items of this run.
+        exit_when_idle (bool): Return once no item is pending or leased.
+
+    Returns:
+        dict: Number of items completed and failed by this worker.
+    """
+    worker = worker or default_worker_id()
+    stats = {DONE: 0, FAILED: 0}
+    while True:
+        item = queue.lease(worker, lease_seconds, run_id)
+        if item is None:
+            if exit_when_idle and queue.finished(run_id):
+                return stats
+            time.sleep(poll_interval)
+            continue
+        try:
+            with LeaseKeeper(queue, item['id'], worker, lease_seconds):
+                process_item(item)
+        except Exception as e:
+            print(f"Work item {item['id']} failed on {worker}: {e}")
+            queue.fail(item['id'], worker, e)
+            stats[FAILED] += 1
+        else:
+            queue.complete(item['id'], worker)
+            stats[DONE] += 1
@@ -2,6 +2,11 @@ import zlib
 import zipfile
 import os
 import shutil
+import json
+
+from src.utils.pdfText import PDF_TEXT_EXTENSION, PDF_TEXT_FOLDER
+from src.utils.metadataCatalog import metadata_by_folder
+from src.utils.tableExtractor import COLUMNAR_FOLDER
 
 """
 Burası tam bir mass ama gece ikide biten bir işin parçası
@@ -13,7 +18,7 @@ para -= (dışardan söylenen yemek ücreti)
 """
 
 
-def copy_raw_data(source_dir, dest_dir):
+def copy_raw_data(source_dir, dest_dir, sites=None):
     # Create the destination directory if it doesn't exist
     if not os.path.exists(dest_dir):
         os.makedirs(dest_dir)
@@ -21,7 +26,8 @@ def copy_raw_data(source_dir, dest_dir):
     # Iterate through each website folder in the source directory
     for website_folder in os.listdir(source_dir):
         website_path = os.path.join(source_dir, website_folder)
-        if os.path.isdir(website_path):
+        # sites limits the copy to some website folders, e.g. ['ECHA']
+        if os.path.isdir(website_path) and (not sites or website_folder in sites):
             dest_website_path = os.path.join(dest_dir, website_folder)
             # Create the destination website folder
             os.makedirs(dest_website_path, exist_ok=True)
@@ -33,13 +39,21 @@ def copy_raw_data(source_dir, dest_dir):
                     dest_keyword_path = os.path.join(dest_website_path, keyword_folder)
                     os.makedirs(dest_keyword_path, exist_ok=True)
                     
-def zip_files_with_same_names(source_dir, dest_dir):
+def zip_files_with_same_names(source_dir, dest_dir, catalog_dir=None, sites=None):
+    # Keyed by the archive path without '.zip' (destination folder + stem): a document saved
+    # under several keywords is archived in each of their folders
     filenames = dict()
     destination_path_list = list()
+    # The metadata catalog lives next to data/raw unless told otherwise
+    if catalog_dir is None:
+        catalog_dir = os.path.join(os.path.dirname(os.path.abspath(source_dir)), 'catalog')
+    kinds = ['text', 'pdf', 'json', 'metadata', PDF_TEXT_FOLDER]
+    extensions = ['.txt', '.pdf', '.json', '.json', PDF_TEXT_EXTENSION]
     # Iterate through each website folder in the source directory
     for website_folder in os.listdir(source_dir):
         website_path = os.path.join(source_dir, website_folder)
-        if os.path.isdir(website_path):
+        if os.path.isdir(website_path) and (not sites or website_folder in sites):
+            catalog_metadata = metadata_by_folder(catalog_dir, website_folder)
             # Iterate through each keyword folder in the website folder
             for keyword_folder in os.listdir(website_path):
                 keyword_path = os.path.join(website_path, keyword_folder)
@@ -48,33 +62,61 @@ def zip_files_with_same_names(source_dir, dest_dir):
                     dest_keyword_path = os.path.join(dest_dir, website_folder, keyword_folder)
                     os.makedirs(dest_keyword_path, exist_ok=True)
 
-                    # Collect filenames without extension across text, json, and pdf folders
-
-                    text_folder_path = os.path.join(keyword_path, 'text')
-                    text_files = os.listdir(text_folder_path)
-                    for file in text_files:
-                        filenames[os.path.splitext(file)[0]] = list()
-                        destination_path_list.append(dest_keyword_path)
-                    extensions = ['.txt', '.pdf', '.json', '.json']
-                    for index_, extension in enumerate(['text', 'pdf', 'json', 'metadata']):
-                        current_extension_directory = os.path.join(keyword_path, extension)
+                    # List every kind folder once instead of once per document
+                    listings = dict()
+                    for kind in kinds:
+                        kind_path = os.path.join(keyword_path, kind)
+                        listings[kind] = set(os.listdir(kind_path)) if os.path.isdir(kind_path) else set()
 
-                        for file in filenames.keys():
-                            temp_file = file + extensions[index_]
-                            if temp_file in os.listdir(current_extension_directory) or 'metadata_' + temp_file in os.listdir(current_extension_directory):
-                                if extension == 'metadata':
-                                    file_ = 'metadata_' + file
-                                    will_append_file_name = file_ + extensions[index_]
-                                    path_to_add = os.path.join(current_extension_directory, will_append_file_name)
-                                    filenames[file].append(path_to_add)
-                                else:
-                                    will_append_file_name = file + extensions[index_]
-                                    path_to_add = os.path.join(current_extension_directory, will_append_file_name)
-                                    filenames[file].append(path_to_add)
+                    # Collect filenames without extension across text and pdftext folders;
+                    # PDFs have no summary, their extracted text stands in for it
+                    stems = [os.path.splitext(file)[0] for file in sorted(listings['text'])]
+                    stems += [file[:-len(PDF_TEXT_EXTENSION)] for file in sorted(listings[PDF_TEXT_FOLDER])
+                              if file.endswith(PDF_TEXT_EXTENSION)]
 
+                    for file in stems:
+                        document = os.path.join(dest_keyword_path, file)
+                        if document in filenames:
+                            continue
+                        filenames[document] = list()
+                        destination_path_list.append(dest_keyword_path)
+                        for kind, extension in zip(kinds, extensions):
+                            will_append_file_name = file + extension
+                            if kind == 'metadata':
+                                will_append_file_name = 'metadata_' + will_append_file_name
+                            if kind == 'pdf' and will_append_file_name not in listings[kind]:
+                                # ECHA saves its PDFs without the extension, see find_pdf_files
+                                will_append_file_name = file
+                            if will_append_file_name in listings[kind]:
+                                filenames[document].append(os.path.join(keyword_path, kind, will_append_file_name))
+                            elif kind == 'metadata' and (keyword_folder, file) in catalog_metadata:
+                                # Written into the archive straight from the catalog
+                                metadata = catalog_metadata[(keyword_folder, file)]
+                                filenames[document].append(
+                                    (will_append_file_name, json.dumps(metadata, ensure_ascii=False, indent=4).encode('utf-8')))
+                        # Columnar tables are a folder per document
+                        table_folder = os.path.join(keyword_path, COLUMNAR_FOLDER, file)
+                        if os.path.isdir(table_folder):
+                            for table_file in sorted(os.listdir(table_folder)):
+                                filenames[document].append(
+                                    (os.path.join(COLUMNAR_FOLDER, table_file), os.path.join(table_folder, table_file)))
 
     return filenames, destination_path_list
     
+def newest_mtime(file_names):
+    # Latest modification time among the files of an archive, generated entries left out
+    mtimes = []
+    for file_name in file_names:
+        if isinstance(file_name, tuple):
+            file_name = file_name[1]
+            if isinstance(file_name, bytes):
+                continue
+        try:
+            mtimes.append(os.path.getmtime(file_name))
+        except OSError:
+            continue
+    return max(mtimes, default=0)
+
 def compress(file_names, path_to_write, zip_name):
     # Select the compression mode ZIP_DEFLATED for compression
     # or zipfile.ZIP_STORED to just store the file
@@ -84,6 +126,15 @@ def compress(file_names, path_to_write, zip_name):
     zf = zipfile.ZipFile(os.path.join(path_to_write, zip_name), mode="w")
     try:
         for file_name in file_names:
+            if isinstance(file_name, tuple):
+                arcname, source = file_name
+                if isinstance(source, bytes):
+                    # (name in zip, content) entries are generated, e.g. metadata from the catalog
+                    zf.writestr(arcname, source, compress_type=compression)
+                else:
+                    # (name in zip, path) entries keep a sub folder, e.g. columnar tables
+                    zf.write(source, arcname, compress_type=compression)
+                continue
             # Add file to the zip file
             # first parameter file to zip, second filename in zip
             zf.write(file_name, file_name.split('\\')[-1], compress_type=compression)
@@ -92,4 +143,4 @@ def compress(file_names, path_to_write, zip_name):
         print("An error occurred")
     finally:
         # Don't forget to close the file!
-        zf.close()
\ No newline at end of file
+        zf.close()